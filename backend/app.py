@@ -1,13 +1,38 @@
-from flask import Flask, jsonify, request
+from flask import Flask, Response, g, jsonify, request
 from flask_cors import CORS
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Tuple
 import traceback
 import os
+import time
+import numpy as np
 import requests
 from dotenv import load_dotenv
-from stock_data_provider import StockDataProvider, YahooFinanceDirectProvider
-from vaulto_scraper import scrape_vaulto_data
+from calculations import (
+    MAX_SWEEP_CELLS, build_comparison, fees_for_period, find_pool, map_tokenized_to_traditional, parse_investment,
+    parse_investment_grid, sweep_records, sweep_returns
+)
+from circuit_breaker import CircuitOpenError
+from downsample import downsample_frame
+from http_session import get_session_pool
+import metrics
+from price_archive import PriceArchive
+from price_store import PriceStore
+from json_stream import stream_object
+from responses import (
+    MAX_BATCH_SYMBOLS, NDJSON_MIMETYPE, STREAM_MODES, VALID_FORMATS, VALID_PERIODS, alpha_vantage_error,
+    fetch_error_message, format_batch_results, format_stock_data, ndjson_lines, parse_date_range, parse_interval,
+    parse_max_points, parse_symbols, quota_headers, rate_limit_response, stream_alpha_vantage, stream_stock_data
+)
+from rate_limiter import RateLimitExceeded, get_alpha_vantage_quota
+from resample import resample_frame
+from retry import DeadlineExceeded, reset_deadline, set_deadline
+from shared_cache import shared_cache_from_env
+from stock_data_provider import (
+    AlphaVantageProvider, NoDataError, StockDataProvider, YahooFinanceDirectProvider, is_time_series_key
+)
+from timing import RequestProfiler, current_timer, finish_request, span, start_request
+from vaulto_refresher import VaultoRefresher
 
 # Load environment variables from .env file
 load_dotenv()
@@ -20,11 +45,95 @@ CORS(app)
 # Optional: Set ALPHA_VANTAGE_API_KEY environment variable to use Alpha Vantage (free tier: 5 calls/min, 500/day)
 # Get free API key at: https://www.alphavantage.co/support/#api-key
 alpha_vantage_key = os.getenv('ALPHA_VANTAGE_API_KEY')
+# Daily bars are persisted to a local SQLite store so repeat requests only fetch the missing tail.
+# Set PRICE_STORE_PATH to an empty string to disable it.
+price_store_path = os.getenv('PRICE_STORE_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'prices.sqlite3'))
+# Optional cache shared by all workers and nodes, e.g. SHARED_CACHE_URL=redis://cache:6379/0
+# ('memory://' keeps it in-process). Fetched series and the Vaulto snapshot are filled once and reused.
+shared_cache = shared_cache_from_env(os.getenv('SHARED_CACHE_URL'))
+# Optional directory of memory-mapped daily histories, built with `python price_archive.py DIR SYMBOL...`
+price_archive_path = os.getenv('PRICE_ARCHIVE_PATH', '')
+# Fetched series are cached in-process (see StockDataProvider.CACHE_TTLS for per-period TTLs)
 stock_provider = StockDataProvider(
     use_alpha_vantage=bool(alpha_vantage_key),
-    alpha_vantage_key=alpha_vantage_key
+    alpha_vantage_key=alpha_vantage_key,
+    cache_size=int(os.getenv('STOCK_CACHE_SIZE', '256')),
+    # Opt-in: cache closes as float32 (half the memory, ~7 significant digits)
+    cache_float32=os.getenv('STOCK_CACHE_FLOAT32', '').lower() in ('1', 'true', 'yes'),
+    store=PriceStore(price_store_path) if price_store_path else None,
+    archive=PriceArchive(price_archive_path) if price_archive_path else None,
+    # Opt-in: when the routed provider is slower than its usual latency percentile,
+    # send the same request to a second provider and use whichever answers first
+    hedge=os.getenv('STOCK_HEDGING', '').lower() in ('1', 'true', 'yes'),
+    hedge_percentile=float(os.getenv('STOCK_HEDGE_PERCENTILE', '95')),
+    hedge_provider=os.getenv('STOCK_HEDGE_PROVIDER', 'yfinance'),
+    shared_cache=shared_cache
 )
 
+# Vaulto pool data is polled in the background and served from memory
+vaulto_refresher = VaultoRefresher(interval=float(os.getenv('VAULTO_REFRESH_INTERVAL', '60')),
+                                   shared_cache=shared_cache)
+
+# Thread pool size for /api/stock-data/batch
+BATCH_MAX_WORKERS = int(os.getenv('BATCH_MAX_WORKERS', '8'))
+
+# End-to-end time budget per request; upstream retries and back-offs stop once it is spent
+REQUEST_DEADLINE_SECONDS = float(os.getenv('REQUEST_DEADLINE_SECONDS', '25'))
+
+
+@app.before_request
+def start_request_deadline() -> None:
+    g.deadline_token = set_deadline(REQUEST_DEADLINE_SECONDS)
+
+
+@app.teardown_request
+def end_request_deadline(error=None) -> None:
+    token = g.pop('deadline_token', None)
+    if token is not None:
+        reset_deadline(token)
+
+
+# Opt-in cProfile reports for slow requests (PROFILE_MODE=header|sample, see timing.RequestProfiler)
+profiler = RequestProfiler.from_env(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'profiles'))
+
+
+@app.before_request
+def start_request_timer() -> None:
+    g.request_started = time.perf_counter()
+    g.timer_token = start_request()
+    g.profile = profiler.start(request.headers) if profiler.enabled else None
+
+
+@app.after_request
+def record_request_metrics(response):
+    started = g.pop('request_started', None)
+    if started is not None:
+        elapsed = time.perf_counter() - started
+        # Label by route pattern rather than raw path to keep label cardinality bounded
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        metrics.observe_request(route, request.method, response.status_code, elapsed)
+        
+        timer = current_timer()
+        if timer is not None:
+            # Stage breakdown (upstream, decode, frame, store, serialize, jsonify) for browser dev tools
+            response.headers['Server-Timing'] = timer.server_timing()
+            response.headers['Timing-Allow-Origin'] = '*'
+        
+        profile = g.pop('profile', None)
+        if profile is not None:
+            profiler.finish(profile, f'{request.method} {request.full_path}', elapsed)
+    return response
+
+
+@app.teardown_request
+def end_request_timer(error=None) -> None:
+    token = g.pop('timer_token', None)
+    if token is not None:
+        finish_request(token)
+    # Profiling may still be on if the request failed before after_request
+    profile = g.pop('profile', None)
+    if profile is not None:
+        profiler.finish(profile, f'{request.method} {request.full_path}', 0.0)
 
 
 @app.route('/api/stock-data', methods=['GET'])
@@ -34,7 +143,18 @@ def get_stock_data() -> Dict[str, Any]:
     
     Query Parameters:
         symbol: Stock ticker symbol (e.g., 'NVDA', 'AAPL')
-        period: Time period ('24h', '7d', '30d')
+        period: Time period ('24h', '7d', '30d', '3m', '6m', '1y')
+        start: Optional ISO start date; with it, bars from start to end are sliced out
+            of the symbol's cached daily history instead of using period
+        end: Optional ISO end date (inclusive, defaults to the latest bar)
+        interval: Optional '1d', '1wk' or '1mo'; bars are aggregated locally
+        ohlc: Optional 'true' to return open/high/low with each point, aggregated
+            from the closes within each interval
+        format: 'rows' (default) or 'columnar' for parallel dates/prices arrays
+        stream: Optional 'json' (chunked JSON) or 'ndjson' (one price point per line)
+            to serialize the response incrementally
+        maxPoints: Optional cap on the number of price points; longer series are
+            downsampled with Largest-Triangle-Three-Buckets, keeping the chart's shape
     
     Returns:
         JSON response with symbol, prices array, and current price
@@ -45,18 +165,50 @@ def get_stock_data() -> Dict[str, Any]:
     try:
         symbol = request.args.get('symbol', '').upper()
         period = request.args.get('period', '30d')
+        response_format = request.args.get('format', 'rows')
+        stream_mode = request.args.get('stream', '')
         
         if not symbol:
             return jsonify({'error': 'Symbol parameter is required'}), 400
         
-        if period not in ['24h', '7d', '30d']:
+        if response_format not in VALID_FORMATS:
             return jsonify({
-                'error': f'Invalid period: {period}. Must be one of: 24h, 7d, 30d',
+                'error': f'Invalid format: {response_format}. Must be one of: {", ".join(VALID_FORMATS)}',
                 'symbol': symbol
             }), 400
         
+        if stream_mode and stream_mode not in STREAM_MODES:
+            return jsonify({
+                'error': f'Invalid stream mode: {stream_mode}. Must be one of: {", ".join(STREAM_MODES)}',
+                'symbol': symbol
+            }), 400
+        
+        if period not in VALID_PERIODS:
+            return jsonify({
+                'error': f'Invalid period: {period}. Must be one of: {", ".join(VALID_PERIODS)}',
+                'symbol': symbol
+            }), 400
+        
+        max_points = parse_max_points(request.args.get('maxPoints'))
+        date_range = parse_date_range(request.args.get('start'), request.args.get('end'))
+        interval = parse_interval(request.args.get('interval'))
+        ohlc = request.args.get('ohlc', '').lower() in ('1', 'true', 'yes')
+        
         # Fetch stock data using the provider
-        hist = stock_provider.fetch_data(symbol, period)
+        if date_range:
+            hist = stock_provider.fetch_history(symbol, *date_range, interval=interval or '1d', ohlc=ohlc)
+        elif interval or ohlc:
+            hist = stock_provider.fetch_data(symbol, period)
+            with span('resample'):
+                hist = resample_frame(hist, interval or '1d', ohlc)
+        elif max_points:
+            hist = stock_provider.fetch_downsampled(symbol, period, max_points)
+        else:
+            hist = stock_provider.fetch_data(symbol, period)
+        
+        if max_points and len(hist) > max_points and (date_range or interval or ohlc):
+            with span('downsample'):
+                hist = downsample_frame(hist, max_points)
         
         if hist.empty:
             return jsonify({
@@ -65,24 +217,46 @@ def get_stock_data() -> Dict[str, Any]:
                 'period': period
             }), 404
         
-        # Format price data
-        prices = []
-        for date, row in hist.iterrows():
-            # Use Close price as the price point
-            price = float(row['Close'])
-            prices.append({
-                'date': date.strftime('%Y-%m-%dT%H:%M:%S'),
-                'price': price
-            })
-        
-        # Get current price (last close price)
-        current_price = float(hist['Close'].iloc[-1])
+        if stream_mode:
+            return Response(stream_stock_data(symbol, hist, response_format, stream_mode),
+                            mimetype=NDJSON_MIMETYPE if stream_mode == 'ndjson' else 'application/json')
         
+        body = format_stock_data(symbol, hist, response_format)
+        with span('jsonify'):
+            return jsonify(body)
+    
+    except RateLimitExceeded as e:
+        # Alpha Vantage budget used up and no fallback succeeded
+        print(f"Rate limited fetching {symbol}: {e}")
+        body, headers = rate_limit_response(e)
+        body.update({'symbol': symbol, 'period': period})
+        return jsonify(body), 429, headers
+    
+    except DeadlineExceeded as e:
+        print(f"Deadline exceeded fetching {symbol}: {e}")
         return jsonify({
+            'error': f'Timed out fetching stock data for {symbol}. Please try again in a moment.',
             'symbol': symbol,
-            'prices': prices,
-            'currentPrice': current_price
-        })
+            'period': period
+        }), 504
+    
+    except CircuitOpenError as e:
+        # Every provider is tripped; fail fast instead of queueing on retries
+        print(f"Providers unavailable for {symbol}: {e}")
+        return jsonify({
+            'error': str(e),
+            'symbol': symbol,
+            'period': period
+        }), 503, {'Retry-After': str(max(1, round(e.retry_after)))}
+    
+    except NoDataError as e:
+        # Unknown symbol, or nothing in the requested range
+        print(f"No data for {symbol}: {e}")
+        return jsonify({
+            'error': str(e),
+            'symbol': symbol,
+            'period': period
+        }), 404
     
     except ValueError as e:
         # Validation errors
@@ -100,27 +274,281 @@ def get_stock_data() -> Dict[str, Any]:
         print(traceback.format_exc())
         
         # Provide more helpful error message
-        if "Yahoo Finance API error" in error_msg:
-            user_error = f"Unable to fetch data for {symbol}. This may be due to Yahoo Finance API rate limiting or temporary issues. Please try again in a moment."
-        else:
-            user_error = f"Failed to fetch stock data for {symbol}: {error_msg}"
+        return jsonify({
+            'error': fetch_error_message(symbol, error_msg),
+            'symbol': symbol or 'unknown',
+            'period': period or 'unknown'
+        }), 500
+
+@app.route('/api/stock-data/batch', methods=['GET'])
+def get_stock_data_batch() -> Dict[str, Any]:
+    """
+    Fetch historical stock price data for several symbols in one request.
+    Symbols are fetched concurrently; a failure for one symbol does not fail the batch.
+    
+    Query Parameters:
+        symbols: Comma-separated ticker symbols (e.g., 'NVDA,AAPL,TSLA')
+        period: Time period ('24h', '7d', '30d', '3m', '6m', '1y')
+        format: 'rows' (default) or 'columnar' for parallel dates/prices arrays
+    
+    Returns:
+        JSON response with a per-symbol map of /api/stock-data results or errors
+    """
+    period = request.args.get('period', '30d')
+    raw_symbols = request.args.get('symbols', '')
+    response_format = request.args.get('format', 'rows')
+    
+    symbols = parse_symbols(raw_symbols)
+    
+    if not symbols:
+        return jsonify({'error': 'Symbols parameter is required'}), 400
+    
+    if len(symbols) > MAX_BATCH_SYMBOLS:
+        return jsonify({
+            'error': f'Too many symbols: {len(symbols)}. At most {MAX_BATCH_SYMBOLS} are allowed per request'
+        }), 400
+    
+    if period not in VALID_PERIODS:
+        return jsonify({
+            'error': f'Invalid period: {period}. Must be one of: {", ".join(VALID_PERIODS)}'
+        }), 400
+    
+    if response_format not in VALID_FORMATS:
+        return jsonify({
+            'error': f'Invalid format: {response_format}. Must be one of: {", ".join(VALID_FORMATS)}'
+        }), 400
+    
+    fetched = stock_provider.fetch_many(symbols, period, max_workers=BATCH_MAX_WORKERS)
+    
+    body = format_batch_results(symbols, fetched, period, response_format)
+    with span('jsonify'):
+        return jsonify(body)
+
+@app.route('/api/comparison', methods=['GET'])
+def get_comparison() -> Dict[str, Any]:
+    """
+    Compare holding a stock directly with holding its tokenized version in the
+    Vaulto pool, computed server-side with the model in src/utils/calculations.ts.
+    
+    Query Parameters:
+        symbol: Traditional or tokenized symbol (e.g., 'NVDA' or 'NVDAon')
+        period: Time period ('24h', '7d', '30d', '3m', '6m', '1y')
+        investment: Investment amount in dollars (at least 1)
+        format: 'rows' (default) or 'columnar' for parallel chart arrays
+    
+    Returns:
+        JSON response matching the frontend ComparisonData shape. Responses carry
+        an ETag and are cacheable for the shorter of the period's price cache TTL
+        and the Vaulto refresh interval.
+    """
+    symbol = None
+    period = None
+    
+    try:
+        symbol = request.args.get('symbol', '')
+        period = request.args.get('period', '30d')
+        response_format = request.args.get('format', 'rows')
+        
+        if not symbol:
+            return jsonify({'error': 'Symbol parameter is required'}), 400
+        
+        if response_format not in VALID_FORMATS:
+            return jsonify({
+                'error': f'Invalid format: {response_format}. Must be one of: {", ".join(VALID_FORMATS)}',
+                'symbol': symbol
+            }), 400
         
+        if period not in VALID_PERIODS:
+            return jsonify({
+                'error': f'Invalid period: {period}. Must be one of: {", ".join(VALID_PERIODS)}',
+                'symbol': symbol
+            }), 400
+        
+        investment = parse_investment(request.args.get('investment'))
+        
+        stocks = vaulto_refresher.snapshot()['stocks']
+        if stocks is None:
+            return jsonify({
+                'error': 'Vaulto pool data is unavailable. Please try again in a moment.',
+                'symbol': symbol
+            }), 500
+        
+        stock = find_pool(stocks, symbol)
+        if stock is None:
+            return jsonify({
+                'error': f'No Vaulto pool found for symbol {symbol}',
+                'symbol': symbol
+            }), 404
+        
+        symbol = map_tokenized_to_traditional(stock['symbol']).upper()
+        hist = stock_provider.fetch_data(symbol, period)
+        
+        if hist.empty:
+            return jsonify({
+                'error': f'No data available for symbol {symbol}',
+                'symbol': symbol,
+                'period': period
+            }), 404
+        
+        with span('compute'):
+            body = build_comparison(stock, hist, period, investment, response_format)
+        with span('jsonify'):
+            response = jsonify(body)
+        
+        max_age = int(min(stock_provider.cache_ttls.get(period, 60), vaulto_refresher.interval))
+        response.headers['Cache-Control'] = f'public, max-age={max_age}'
+        response.add_etag()
+        return response.make_conditional(request)
+    
+    except RateLimitExceeded as e:
+        print(f"Rate limited fetching {symbol}: {e}")
+        body, headers = rate_limit_response(e)
+        body.update({'symbol': symbol, 'period': period})
+        return jsonify(body), 429, headers
+    
+    except DeadlineExceeded as e:
+        print(f"Deadline exceeded fetching {symbol}: {e}")
+        return jsonify({
+            'error': f'Timed out fetching stock data for {symbol}. Please try again in a moment.',
+            'symbol': symbol,
+            'period': period
+        }), 504
+    
+    except CircuitOpenError as e:
+        print(f"Providers unavailable for {symbol}: {e}")
         return jsonify({
-            'error': user_error,
+            'error': str(e),
+            'symbol': symbol,
+            'period': period
+        }), 503, {'Retry-After': str(max(1, round(e.retry_after)))}
+    
+    except NoDataError as e:
+        print(f"No data for {symbol}: {e}")
+        return jsonify({
+            'error': str(e),
+            'symbol': symbol,
+            'period': period
+        }), 404
+    
+    except ValueError as e:
+        error_msg = str(e)
+        print(f"Validation error for {symbol}: {error_msg}")
+        return jsonify({
+            'error': error_msg,
+            'symbol': symbol or 'unknown',
+            'period': period or 'unknown'
+        }), 400
+    
+    except Exception as e:
+        error_msg = str(e)
+        print(f"Error computing comparison for {symbol}: {error_msg}")
+        print(traceback.format_exc())
+        return jsonify({
+            'error': fetch_error_message(symbol, error_msg),
             'symbol': symbol or 'unknown',
             'period': period or 'unknown'
         }), 500
 
+@app.route('/api/comparison/sweep', methods=['GET'])
+def get_comparison_sweep() -> Response:
+    """
+    Evaluate the /api/comparison return model over a grid of investment amounts,
+    symbols and periods. The grid is computed in one vectorized pass and the
+    results are streamed back as newline-delimited JSON.
+    
+    Query Parameters:
+        investments: Comma-separated investment amounts, or
+        minInvestment, maxInvestment, steps: log-spaced amounts (steps defaults to 50)
+        symbols: Comma-separated traditional or tokenized symbols (default: every Vaulto pool)
+        periods: Comma-separated periods (default: all supported periods)
+    
+    Returns:
+        application/x-ndjson: a header line with the grid axes, then one line per
+        symbol and period with returns, fees and TVL fractions for each investment
+        amount (or an error for that symbol and period)
+    """
+    try:
+        investments = parse_investment_grid(
+            request.args.get('investments'), request.args.get('minInvestment'),
+            request.args.get('maxInvestment'), request.args.get('steps')
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    periods = list(dict.fromkeys(p.strip() for p in request.args.get('periods', ','.join(VALID_PERIODS)).split(',') if p.strip()))
+    invalid_periods = [p for p in periods if p not in VALID_PERIODS]
+    if not periods or invalid_periods:
+        return jsonify({
+            'error': f'Invalid periods: {", ".join(invalid_periods)}. Must be among: {", ".join(VALID_PERIODS)}'
+        }), 400
+    
+    all_stocks = vaulto_refresher.snapshot()['stocks']
+    if all_stocks is None:
+        return jsonify({'error': 'Vaulto pool data is unavailable. Please try again in a moment.'}), 500
+    
+    raw_symbols = request.args.get('symbols', '')
+    if raw_symbols:
+        requested = parse_symbols(raw_symbols)
+        stocks = [find_pool(all_stocks, symbol) for symbol in requested]
+        unknown = [symbol for symbol, stock in zip(requested, stocks) if stock is None]
+        if unknown:
+            return jsonify({'error': f'No Vaulto pool found for: {", ".join(unknown)}'}), 404
+        stocks = list({stock['symbol']: stock for stock in stocks}.values())
+    else:
+        stocks = all_stocks
+    
+    cells = len(stocks) * len(periods) * len(investments)
+    if cells > MAX_SWEEP_CELLS:
+        return jsonify({
+            'error': f'Sweep too large: {cells} cells. At most {MAX_SWEEP_CELLS} are allowed per request'
+        }), 400
+    
+    # Start and end closes per (symbol, period); cells that could not be fetched stay NaN
+    symbols = [map_tokenized_to_traditional(stock['symbol']).upper() for stock in stocks]
+    start_prices = np.full((len(stocks), len(periods)), np.nan)
+    end_prices = np.full((len(stocks), len(periods)), np.nan)
+    errors = {}
+    for p, period in enumerate(periods):
+        fetched = stock_provider.fetch_many(symbols, period, max_workers=BATCH_MAX_WORKERS)
+        for s, symbol in enumerate(symbols):
+            hist = fetched[symbol]
+            if isinstance(hist, Exception):
+                errors[(s, p)] = fetch_error_message(symbol, str(hist))
+            elif hist.empty:
+                errors[(s, p)] = f'No data available for symbol {symbol}'
+            else:
+                closes = hist['Close'].to_numpy(dtype='float64')
+                start_prices[s, p], end_prices[s, p] = closes[0], closes[-1]
+    
+    with span('compute'):
+        pool_tvl = np.array([stock['poolTVL'] for stock in stocks], dtype='float64')
+        total_fees = np.array([[fees_for_period(stock, period) for period in periods] for stock in stocks], dtype='float64')
+        grid = sweep_returns(investments, pool_tvl, total_fees.reshape(len(stocks), len(periods)), start_prices, end_prices)
+    
+    records = sweep_records(stocks, periods, investments, grid, errors)
+    return Response(ndjson_lines(records), mimetype=NDJSON_MIMETYPE)
+
 @app.route('/api/vaulto-data', methods=['GET'])
 def get_vaulto_data() -> Dict[str, Any]:
     """
-    Fetch TVL and volume data from stake.vaulto.ai
+    Serve TVL and volume data from stake.vaulto.ai
+    
+    Data is refreshed in the background (VAULTO_REFRESH_INTERVAL seconds);
+    the last good snapshot keeps being served if a refresh fails.
     
     Returns:
-        JSON response with array of tokenized stocks matching TokenizedStock format
+        JSON response with array of tokenized stocks matching TokenizedStock format,
+        plus the snapshot's fetch time, age in seconds and staleness
     """
     try:
-        stocks = scrape_vaulto_data()
+        snapshot = vaulto_refresher.snapshot()
+        stocks = snapshot['stocks']
+        
+        if stocks is None:
+            return jsonify({
+                'error': f"Failed to fetch data from stake.vaulto.ai: {snapshot['lastError']}",
+                'stocks': []
+            }), 500
         
         if not stocks:
             return jsonify({
@@ -130,7 +558,10 @@ def get_vaulto_data() -> Dict[str, Any]:
         
         return jsonify({
             'stocks': stocks,
-            'count': len(stocks)
+            'count': len(stocks),
+            'fetchedAt': snapshot['fetchedAt'],
+            'age': snapshot['age'],
+            'stale': snapshot['stale']
         })
     
     except Exception as e:
@@ -153,6 +584,9 @@ def get_alpha_vantage_data() -> Dict[str, Any]:
         symbol: Stock ticker symbol (e.g., 'NVDA', 'AAPL')
         period: Time period ('24h', '7d', '30d') - not used by Alpha Vantage directly
         outputsize: 'compact' (100 data points) or 'full' (default: 'compact')
+        stream: Optional 'json' (chunked, same document shape) or 'ndjson' (a header
+            line, then one line per day). The upstream body is parsed as it arrives
+            and re-emitted incrementally, so memory stays flat for 'full' histories.
     
     Returns:
         JSON response matching Alpha Vantage API format
@@ -160,10 +594,14 @@ def get_alpha_vantage_data() -> Dict[str, Any]:
     try:
         symbol = request.args.get('symbol', '').upper()
         outputsize = request.args.get('outputsize', 'compact')
+        stream_mode = request.args.get('stream', '')
         
         if not symbol:
             return jsonify({'error': 'Symbol parameter is required'}), 400
         
+        if stream_mode and stream_mode not in STREAM_MODES:
+            return jsonify({'error': f'Invalid stream mode: {stream_mode}. Must be one of: {", ".join(STREAM_MODES)}'}), 400
+        
         # Get API key from environment variable
         # Try both VITE_ALPHA_VANTAGE_API_KEY (for Netlify compatibility) and ALPHA_VANTAGE_API_KEY
         api_key = os.getenv('VITE_ALPHA_VANTAGE_API_KEY') or os.getenv('ALPHA_VANTAGE_API_KEY')
@@ -173,7 +611,7 @@ def get_alpha_vantage_data() -> Dict[str, Any]:
         
         # Build Alpha Vantage API URL
         function_type = 'TIME_SERIES_DAILY'
-        url = 'https://www.alphavantage.co/query'
+        url = AlphaVantageProvider.BASE_URL
         params = {
             'function': function_type,
             'symbol': symbol,
@@ -182,30 +620,36 @@ def get_alpha_vantage_data() -> Dict[str, Any]:
             'datatype': 'json'
         }
         
+        # Spend from the shared quota before the call instead of discovering the limit afterwards
+        get_alpha_vantage_quota().acquire('interactive')
+        
         # Fetch from Alpha Vantage API
-        response = requests.get(url, params=params, timeout=30)
+        with metrics.track_upstream('alpha_vantage'):
+            response = get_session_pool().get(url, params=params, timeout=30, stream=bool(stream_mode))
         
         if not response.ok:
+            response.close()
             return jsonify({
-                'error': f'Alpha Vantage API error: {response.status_text}'
+                'error': f'Alpha Vantage API error: {response.reason}'
             }), response.status_code
         
+        if stream_mode:
+            return stream_alpha_vantage_response(response, stream_mode)
+        
         data = response.json()
         
         # Check for API errors
-        if 'Error Message' in data:
-            return jsonify({
-                'error': data['Error Message']
-            }), 400
-        
-        if 'Note' in data:
-            return jsonify({
-                'error': 'API rate limit exceeded. Please try again later. (Alpha Vantage free tier: 5 calls/min, 500/day)'
-            }), 429
+        api_error = alpha_vantage_error(data)
+        if api_error:
+            error_msg, status = api_error
+            return jsonify({'error': error_msg}), status
         
         # Return the data with CORS headers (handled by CORS middleware)
-        return jsonify(data), 200
+        return jsonify(data), 200, quota_headers()
     
+    except RateLimitExceeded as e:
+        body, headers = rate_limit_response(e)
+        return jsonify(body), 429, headers
     except requests.exceptions.RequestException as e:
         return jsonify({
             'error': f'Failed to fetch data from Alpha Vantage API: {str(e)}'
@@ -218,10 +662,59 @@ def get_alpha_vantage_data() -> Dict[str, Any]:
             'error': error_msg or 'Internal server error'
         }), 500
 
+def stream_alpha_vantage_response(response: requests.Response, stream_mode: str) -> Any:
+    """
+    Relay an Alpha Vantage body as it downloads. The members before the time
+    series are read first, so API errors still get a regular JSON error
+    response; after that, days are parsed and re-emitted in batches.
+    """
+    try:
+        parser, items = stream_object(response.iter_content(AlphaVantageProvider.STREAM_CHUNK_SIZE), is_time_series_key)
+    except Exception:
+        response.close()
+        raise
+    
+    api_error = alpha_vantage_error(parser.header)
+    if api_error or parser.stream_key is None:
+        response.close()
+        error_msg, status = api_error or ('Invalid response structure from Alpha Vantage', 502)
+        return jsonify({'error': error_msg}), status
+    
+    def generate():
+        try:
+            yield from stream_alpha_vantage(parser, items, stream_mode)
+        finally:
+            response.close()
+    
+    mimetype = NDJSON_MIMETYPE if stream_mode == 'ndjson' else 'application/json'
+    return Response(generate(), mimetype=mimetype, headers=quota_headers())
+
 @app.route('/api/health', methods=['GET'])
 def health_check() -> Dict[str, str]:
     """Health check endpoint"""
     return jsonify({'status': 'ok'})
 
+@app.route('/api/stats', methods=['GET'])
+def get_stats() -> Dict[str, Any]:
+    """Runtime statistics for the backend's caches, stores, refreshers and upstream connection pools"""
+    return jsonify({
+        'stockCache': stock_provider.cache.stats(),
+        'stockInflight': stock_provider.inflight.stats(),
+        'sharedCache': shared_cache.stats() if shared_cache else None,
+        'providerBreakers': stock_provider.breaker_stats(),
+        'hedging': stock_provider.hedge_stats(),
+        'upstreamPools': get_session_pool().stats(),
+        'priceStore': stock_provider.store.stats() if stock_provider.store else None,
+        'priceArchive': stock_provider.archive.stats() if stock_provider.archive else None,
+        'vaultoRefresher': vaulto_refresher.stats(),
+        'alphaVantageBudget': get_alpha_vantage_quota().budget()
+    })
+
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics() -> Response:
+    """Prometheus text-format metrics: request and upstream latency histograms, retries, cache and breaker state"""
+    body = metrics.render(metrics.provider_metrics(stock_provider, vaulto_refresher, get_alpha_vantage_quota()))
+    return Response(body, content_type=metrics.CONTENT_TYPE)
+
 if __name__ == '__main__':
     app.run(debug=True, port=5001, host='0.0.0.0')
@@ -0,0 +1,538 @@
+"""
+Asyncio (ASGI) serving mode for the backend.
+Exposes the same routes and response shapes as the Flask app in app.py, but
+upstream calls (and their retry back-offs) are awaited, so a single process
+can hold hundreds of concurrent slow upstream calls without tying up a
+thread for each.
+
+Run with:
+    uvicorn async_app:app --port 5001
+"""
+
+import asyncio
+import json
+import os
+import time
+import traceback
+from typing import Any, Awaitable, Callable, Dict, Iterable, NamedTuple, Optional, Tuple
+from urllib.parse import parse_qsl
+
+import httpx
+import numpy as np
+from dotenv import load_dotenv
+
+from async_providers import AsyncStockDataProvider, create_client, scrape_vaulto_data_async
+from calculations import (
+    MAX_SWEEP_CELLS, build_comparison, fees_for_period, find_pool, map_tokenized_to_traditional, parse_investment,
+    parse_investment_grid, sweep_records, sweep_returns
+)
+from circuit_breaker import CircuitOpenError
+import metrics
+from responses import (
+    MAX_BATCH_SYMBOLS, NDJSON_MIMETYPE, VALID_FORMATS, VALID_PERIODS, alpha_vantage_error,
+    fetch_error_message, format_batch_results, format_stock_data, ndjson_lines, parse_max_points, parse_symbols,
+    quota_headers, rate_limit_response
+)
+from rate_limiter import RateLimitExceeded, get_alpha_vantage_quota
+from retry import DeadlineExceeded, deadline
+from stock_data_provider import AlphaVantageProvider, NoDataError
+from timing import current_timer, finish_request, span, start_request
+from vaulto_refresher import VaultoRefresher
+
+# Load environment variables from .env file
+load_dotenv()
+
+
+class Stream(NamedTuple):
+    """Response body sent chunk by chunk instead of as one JSON document"""
+    chunks: Iterable[str]
+    content_type: str
+
+
+# (status, body) or (status, body, extra headers); body is JSON-compatible, a str or a Stream
+Response = Tuple[Any, ...]
+Handler = Callable[[Dict[str, str]], Awaitable[Response]]
+
+ROUTES: Dict[str, Handler] = {}
+
+CORS_HEADERS = [
+    (b'access-control-allow-origin', b'*'),
+    (b'access-control-allow-methods', b'GET, OPTIONS'),
+    (b'access-control-allow-headers', b'*'),
+]
+
+# Concurrent upstream fetches per /api/stock-data/batch request
+BATCH_MAX_CONCURRENCY = int(os.getenv('BATCH_MAX_WORKERS', '8'))
+VAULTO_REFRESH_INTERVAL = float(os.getenv('VAULTO_REFRESH_INTERVAL', '60'))
+REQUEST_DEADLINE_SECONDS = float(os.getenv('REQUEST_DEADLINE_SECONDS', '25'))
+
+# /api/stock-data parameters the Flask app accepts but this mode does not implement yet
+UNSUPPORTED_STOCK_DATA_PARAMS = ('start', 'end', 'interval', 'ohlc', 'stream')
+
+
+class _State:
+    """Process-wide clients and providers, created on first use"""
+
+    def __init__(self):
+        self.client: Optional[httpx.AsyncClient] = None
+        self.stock_provider: Optional[AsyncStockDataProvider] = None
+        # Used only as a snapshot holder; refreshes are driven by the asyncio task below
+        self.vaulto = VaultoRefresher(interval=VAULTO_REFRESH_INTERVAL)
+        self.vaulto_lock: Optional[asyncio.Lock] = None
+        self.vaulto_task: Optional[asyncio.Task] = None
+
+    def ensure_started(self) -> None:
+        if self.client is not None:
+            return
+        alpha_vantage_key = os.getenv('ALPHA_VANTAGE_API_KEY')
+        self.client = create_client()
+        self.stock_provider = AsyncStockDataProvider(
+            self.client,
+            use_alpha_vantage=bool(alpha_vantage_key),
+            alpha_vantage_key=alpha_vantage_key,
+            cache_size=int(os.getenv('STOCK_CACHE_SIZE', '256'))
+        )
+        self.vaulto_lock = asyncio.Lock()
+        self.vaulto_task = asyncio.get_running_loop().create_task(_vaulto_refresh_loop())
+
+    async def close(self) -> None:
+        if self.vaulto_task is not None:
+            self.vaulto_task.cancel()
+        if self.client is not None:
+            await self.client.aclose()
+        self.client = None
+
+
+state = _State()
+
+
+def route(path: str) -> Callable[[Handler], Handler]:
+    """Register an async GET handler for path"""
+    def register(handler: Handler) -> Handler:
+        ROUTES[path] = handler
+        return handler
+    return register
+
+
+async def _refresh_vaulto() -> None:
+    async with state.vaulto_lock:
+        try:
+            stocks = await scrape_vaulto_data_async(state.client)
+        except Exception as e:
+            state.vaulto.record_failure(e)
+        else:
+            state.vaulto.record_success(stocks)
+
+
+async def _vaulto_refresh_loop() -> None:
+    while True:
+        await _refresh_vaulto()
+        await asyncio.sleep(VAULTO_REFRESH_INTERVAL)
+
+
+@route('/api/stock-data')
+async def get_stock_data(args: Dict[str, str]) -> Response:
+    """Async counterpart of app.get_stock_data"""
+    symbol = args.get('symbol', '').upper()
+    period = args.get('period', '30d')
+    response_format = args.get('format', 'rows')
+
+    if not symbol:
+        return 400, {'error': 'Symbol parameter is required'}
+
+    unsupported = [name for name in UNSUPPORTED_STOCK_DATA_PARAMS if name in args]
+    if unsupported:
+        return 501, {
+            'error': f'Not supported by the async server: {", ".join(unsupported)}. Use the Flask app for these parameters.',
+            'symbol': symbol
+        }
+
+    if response_format not in VALID_FORMATS:
+        return 400, {
+            'error': f'Invalid format: {response_format}. Must be one of: {", ".join(VALID_FORMATS)}',
+            'symbol': symbol
+        }
+
+    if period not in VALID_PERIODS:
+        return 400, {
+            'error': f'Invalid period: {period}. Must be one of: {", ".join(VALID_PERIODS)}',
+            'symbol': symbol
+        }
+
+    try:
+        max_points = parse_max_points(args.get('maxPoints'))
+        if max_points:
+            hist = await state.stock_provider.fetch_downsampled(symbol, period, max_points)
+        else:
+            hist = await state.stock_provider.fetch_data(symbol, period)
+    except RateLimitExceeded as e:
+        print(f"Rate limited fetching {symbol}: {e}")
+        body, headers = rate_limit_response(e)
+        body.update({'symbol': symbol, 'period': period})
+        return 429, body, headers
+    except DeadlineExceeded as e:
+        print(f"Deadline exceeded fetching {symbol}: {e}")
+        return 504, {'error': f'Timed out fetching stock data for {symbol}. Please try again in a moment.', 'symbol': symbol, 'period': period}
+    except CircuitOpenError as e:
+        print(f"Providers unavailable for {symbol}: {e}")
+        return 503, {'error': str(e), 'symbol': symbol, 'period': period}, {'Retry-After': str(max(1, round(e.retry_after)))}
+    except NoDataError as e:
+        print(f"No data for {symbol}: {e}")
+        return 404, {'error': str(e), 'symbol': symbol, 'period': period}
+    except ValueError as e:
+        print(f"Validation error for {symbol}: {e}")
+        return 400, {'error': str(e), 'symbol': symbol, 'period': period}
+    except Exception as e:
+        print(f"Error fetching stock data for {symbol}: {e}")
+        return 500, {'error': fetch_error_message(symbol, str(e)), 'symbol': symbol, 'period': period}
+
+    if hist.empty:
+        return 404, {'error': f'No data available for symbol {symbol}', 'symbol': symbol, 'period': period}
+
+    return 200, format_stock_data(symbol, hist, response_format)
+
+
+@route('/api/stock-data/batch')
+async def get_stock_data_batch(args: Dict[str, str]) -> Response:
+    """Async counterpart of app.get_stock_data_batch"""
+    period = args.get('period', '30d')
+    response_format = args.get('format', 'rows')
+    symbols = parse_symbols(args.get('symbols', ''))
+
+    if not symbols:
+        return 400, {'error': 'Symbols parameter is required'}
+
+    if len(symbols) > MAX_BATCH_SYMBOLS:
+        return 400, {'error': f'Too many symbols: {len(symbols)}. At most {MAX_BATCH_SYMBOLS} are allowed per request'}
+
+    if period not in VALID_PERIODS:
+        return 400, {'error': f'Invalid period: {period}. Must be one of: {", ".join(VALID_PERIODS)}'}
+
+    if response_format not in VALID_FORMATS:
+        return 400, {'error': f'Invalid format: {response_format}. Must be one of: {", ".join(VALID_FORMATS)}'}
+
+    fetched = await state.stock_provider.fetch_many(symbols, period, max_concurrency=BATCH_MAX_CONCURRENCY)
+    return 200, format_batch_results(symbols, fetched, period, response_format)
+
+
+@route('/api/comparison')
+async def get_comparison(args: Dict[str, str]) -> Response:
+    """Async counterpart of app.get_comparison (without If-None-Match revalidation)"""
+    symbol = args.get('symbol', '')
+    period = args.get('period', '30d')
+    response_format = args.get('format', 'rows')
+
+    if not symbol:
+        return 400, {'error': 'Symbol parameter is required'}
+
+    if response_format not in VALID_FORMATS:
+        return 400, {
+            'error': f'Invalid format: {response_format}. Must be one of: {", ".join(VALID_FORMATS)}',
+            'symbol': symbol
+        }
+
+    if period not in VALID_PERIODS:
+        return 400, {
+            'error': f'Invalid period: {period}. Must be one of: {", ".join(VALID_PERIODS)}',
+            'symbol': symbol
+        }
+
+    try:
+        investment = parse_investment(args.get('investment'))
+    except ValueError as e:
+        return 400, {'error': str(e), 'symbol': symbol, 'period': period}
+
+    if not state.vaulto.has_snapshot():
+        await _refresh_vaulto()
+    stocks = state.vaulto.current()['stocks']
+    if stocks is None:
+        return 500, {'error': 'Vaulto pool data is unavailable. Please try again in a moment.', 'symbol': symbol}
+
+    stock = find_pool(stocks, symbol)
+    if stock is None:
+        return 404, {'error': f'No Vaulto pool found for symbol {symbol}', 'symbol': symbol}
+
+    symbol = map_tokenized_to_traditional(stock['symbol']).upper()
+    try:
+        hist = await state.stock_provider.fetch_data(symbol, period)
+    except RateLimitExceeded as e:
+        print(f"Rate limited fetching {symbol}: {e}")
+        body, headers = rate_limit_response(e)
+        body.update({'symbol': symbol, 'period': period})
+        return 429, body, headers
+    except DeadlineExceeded as e:
+        print(f"Deadline exceeded fetching {symbol}: {e}")
+        return 504, {'error': f'Timed out fetching stock data for {symbol}. Please try again in a moment.', 'symbol': symbol, 'period': period}
+    except CircuitOpenError as e:
+        print(f"Providers unavailable for {symbol}: {e}")
+        return 503, {'error': str(e), 'symbol': symbol, 'period': period}, {'Retry-After': str(max(1, round(e.retry_after)))}
+    except NoDataError as e:
+        print(f"No data for {symbol}: {e}")
+        return 404, {'error': str(e), 'symbol': symbol, 'period': period}
+    except ValueError as e:
+        print(f"Validation error for {symbol}: {e}")
+        return 400, {'error': str(e), 'symbol': symbol, 'period': period}
+    except Exception as e:
+        print(f"Error computing comparison for {symbol}: {e}")
+        return 500, {'error': fetch_error_message(symbol, str(e)), 'symbol': symbol, 'period': period}
+
+    if hist.empty:
+        return 404, {'error': f'No data available for symbol {symbol}', 'symbol': symbol, 'period': period}
+
+    max_age = int(min(state.stock_provider.cache_ttls.get(period, 60), VAULTO_REFRESH_INTERVAL))
+    return 200, build_comparison(stock, hist, period, investment, response_format), {'Cache-Control': f'public, max-age={max_age}'}
+
+
+@route('/api/comparison/sweep')
+async def get_comparison_sweep(args: Dict[str, str]) -> Response:
+    """Async counterpart of app.get_comparison_sweep (streams newline-delimited JSON)"""
+    try:
+        investments = parse_investment_grid(
+            args.get('investments'), args.get('minInvestment'), args.get('maxInvestment'), args.get('steps')
+        )
+    except ValueError as e:
+        return 400, {'error': str(e)}
+
+    periods = list(dict.fromkeys(p.strip() for p in args.get('periods', ','.join(VALID_PERIODS)).split(',') if p.strip()))
+    invalid_periods = [p for p in periods if p not in VALID_PERIODS]
+    if not periods or invalid_periods:
+        return 400, {
+            'error': f'Invalid periods: {", ".join(invalid_periods)}. Must be among: {", ".join(VALID_PERIODS)}'
+        }
+
+    if not state.vaulto.has_snapshot():
+        await _refresh_vaulto()
+    all_stocks = state.vaulto.current()['stocks']
+    if all_stocks is None:
+        return 500, {'error': 'Vaulto pool data is unavailable. Please try again in a moment.'}
+
+    raw_symbols = args.get('symbols', '')
+    if raw_symbols:
+        requested = parse_symbols(raw_symbols)
+        stocks = [find_pool(all_stocks, symbol) for symbol in requested]
+        unknown = [symbol for symbol, stock in zip(requested, stocks) if stock is None]
+        if unknown:
+            return 404, {'error': f'No Vaulto pool found for: {", ".join(unknown)}'}
+        stocks = list({stock['symbol']: stock for stock in stocks}.values())
+    else:
+        stocks = all_stocks
+
+    cells = len(stocks) * len(periods) * len(investments)
+    if cells > MAX_SWEEP_CELLS:
+        return 400, {'error': f'Sweep too large: {cells} cells. At most {MAX_SWEEP_CELLS} are allowed per request'}
+
+    # Start and end closes per (symbol, period); cells that could not be fetched stay NaN
+    symbols = [map_tokenized_to_traditional(stock['symbol']).upper() for stock in stocks]
+    start_prices = np.full((len(stocks), len(periods)), np.nan)
+    end_prices = np.full((len(stocks), len(periods)), np.nan)
+    errors = {}
+    for p, period in enumerate(periods):
+        fetched = await state.stock_provider.fetch_many(symbols, period, max_concurrency=BATCH_MAX_CONCURRENCY)
+        for s, symbol in enumerate(symbols):
+            hist = fetched[symbol]
+            if isinstance(hist, Exception):
+                errors[(s, p)] = fetch_error_message(symbol, str(hist))
+            elif hist.empty:
+                errors[(s, p)] = f'No data available for symbol {symbol}'
+            else:
+                closes = hist['Close'].to_numpy(dtype='float64')
+                start_prices[s, p], end_prices[s, p] = closes[0], closes[-1]
+
+    with span('compute'):
+        pool_tvl = np.array([stock['poolTVL'] for stock in stocks], dtype='float64')
+        total_fees = np.array([[fees_for_period(stock, period) for period in periods] for stock in stocks], dtype='float64')
+        grid = sweep_returns(investments, pool_tvl, total_fees.reshape(len(stocks), len(periods)), start_prices, end_prices)
+
+    records = sweep_records(stocks, periods, investments, grid, errors)
+    return 200, Stream(ndjson_lines(records), NDJSON_MIMETYPE)
+
+
+@route('/api/vaulto-data')
+async def get_vaulto_data(args: Dict[str, str]) -> Response:
+    """Async counterpart of app.get_vaulto_data"""
+    if not state.vaulto.has_snapshot():
+        await _refresh_vaulto()
+
+    snapshot = state.vaulto.current()
+    stocks = snapshot['stocks']
+
+    if stocks is None:
+        return 500, {
+            'error': f"Failed to fetch data from stake.vaulto.ai: {snapshot['lastError']}",
+            'stocks': []
+        }
+
+    if not stocks:
+        return 404, {'error': 'No data could be scraped from stake.vaulto.ai', 'stocks': []}
+
+    return 200, {
+        'stocks': stocks,
+        'count': len(stocks),
+        'fetchedAt': snapshot['fetchedAt'],
+        'age': snapshot['age'],
+        'stale': snapshot['stale']
+    }
+
+
+@route('/api/alpha-vantage')
+async def get_alpha_vantage_data(args: Dict[str, str]) -> Response:
+    """Async counterpart of app.get_alpha_vantage_data"""
+    symbol = args.get('symbol', '').upper()
+    outputsize = args.get('outputsize', 'compact')
+
+    if not symbol:
+        return 400, {'error': 'Symbol parameter is required'}
+
+    api_key = os.getenv('VITE_ALPHA_VANTAGE_API_KEY') or os.getenv('ALPHA_VANTAGE_API_KEY')
+    if not api_key:
+        return 500, {'error': 'API key not configured. Set VITE_ALPHA_VANTAGE_API_KEY or ALPHA_VANTAGE_API_KEY environment variable'}
+
+    params = {
+        'function': 'TIME_SERIES_DAILY',
+        'symbol': symbol,
+        'apikey': api_key,
+        'outputsize': outputsize,
+        'datatype': 'json'
+    }
+
+    try:
+        await get_alpha_vantage_quota().acquire_async('interactive')
+        with metrics.track_upstream('alpha_vantage'):
+            response = await state.client.get(AlphaVantageProvider.BASE_URL, params=params, timeout=30)
+    except RateLimitExceeded as e:
+        body, headers = rate_limit_response(e)
+        return 429, body, headers
+    except httpx.HTTPError as e:
+        return 500, {'error': f'Failed to fetch data from Alpha Vantage API: {str(e)}'}
+
+    if not response.is_success:
+        return response.status_code, {'error': f'Alpha Vantage API error: {response.reason_phrase}'}
+
+    data = response.json()
+    api_error = alpha_vantage_error(data)
+    if api_error:
+        error_msg, status = api_error
+        return status, {'error': error_msg}
+
+    return 200, data, quota_headers()
+
+
+@route('/api/health')
+async def health_check(args: Dict[str, str]) -> Response:
+    """Health check endpoint"""
+    return 200, {'status': 'ok'}
+
+
+@route('/api/stats')
+async def get_stats(args: Dict[str, str]) -> Response:
+    """Runtime statistics for the async serving mode"""
+    return 200, {
+        'stockCache': state.stock_provider.cache.stats(),
+        'stockInflight': state.stock_provider.inflight.stats(),
+        'providerBreakers': state.stock_provider.breaker_stats(),
+        'vaultoRefresher': state.vaulto.stats(),
+        'alphaVantageBudget': get_alpha_vantage_quota().budget()
+    }
+
+
+@route('/api/metrics')
+async def get_metrics(args: Dict[str, str]) -> Response:
+    """Prometheus text-format metrics (see app.get_metrics)"""
+    return 200, metrics.render(metrics.provider_metrics(state.stock_provider, state.vaulto, get_alpha_vantage_quota()))
+
+
+async def _send_json(send, status: int, body: Any, headers: Optional[Dict[str, str]] = None) -> None:
+    """Send a JSON body, or a pre-rendered text body when body is a str"""
+    if isinstance(body, str):
+        payload, content_type = body.encode('utf-8'), metrics.CONTENT_TYPE.encode('latin-1')
+    else:
+        payload, content_type = json.dumps(body).encode('utf-8'), b'application/json'
+    extra = [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in (headers or {}).items()]
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [
+            (b'content-type', content_type),
+            (b'content-length', str(len(payload)).encode('ascii')),
+        ] + CORS_HEADERS + extra
+    })
+    await send({'type': 'http.response.body', 'body': payload})
+
+
+async def _send_stream(send, status: int, body: Stream, headers: Optional[Dict[str, str]] = None) -> None:
+    """Send a Stream body, one ASGI message per chunk"""
+    extra = [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in (headers or {}).items()]
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', body.content_type.encode('latin-1'))] + CORS_HEADERS + extra
+    })
+    for chunk in body.chunks:
+        await send({'type': 'http.response.body', 'body': chunk.encode('utf-8'), 'more_body': True})
+    await send({'type': 'http.response.body', 'body': b''})
+
+
+async def _lifespan(receive, send) -> None:
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            state.ensure_started()
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await state.close()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def app(scope, receive, send) -> None:
+    """ASGI entry point"""
+    if scope['type'] == 'lifespan':
+        await _lifespan(receive, send)
+        return
+    if scope['type'] != 'http':
+        return
+
+    state.ensure_started()
+
+    if scope['method'] == 'OPTIONS':
+        await send({'type': 'http.response.start', 'status': 204, 'headers': CORS_HEADERS})
+        await send({'type': 'http.response.body', 'body': b''})
+        return
+
+    started = time.perf_counter()
+    path = scope['path'].rstrip('/') or '/'
+    handler = ROUTES.get(path)
+    if handler is None:
+        await _send_json(send, 404, {'error': 'Not found'})
+        metrics.observe_request('unmatched', scope['method'], 404, time.perf_counter() - started)
+        return
+    if scope['method'] not in ('GET', 'HEAD'):
+        await _send_json(send, 405, {'error': 'Method not allowed'})
+        metrics.observe_request(path, scope['method'], 405, time.perf_counter() - started)
+        return
+
+    args = dict(parse_qsl(scope.get('query_string', b'').decode('latin-1')))
+    headers = {}
+    timer_token = start_request()
+    try:
+        # The budget follows awaited calls, gathered tasks and asyncio.to_thread
+        with deadline(REQUEST_DEADLINE_SECONDS):
+            result = await handler(args)
+        status, body = result[0], result[1]
+        if len(result) > 2:
+            headers.update(result[2])
+    except Exception as e:
+        print(f"Error in {scope['path']}: {e}")
+        print(traceback.format_exc())
+        status, body = 500, {'error': str(e) or 'Internal server error'}
+    finally:
+        timer = current_timer()
+        finish_request(timer_token)
+
+    headers['Server-Timing'] = timer.server_timing()
+    headers['Timing-Allow-Origin'] = '*'
+    if isinstance(body, Stream):
+        await _send_stream(send, status, body, headers)
+    else:
+        await _send_json(send, status, body, headers)
+    metrics.observe_request(path, scope['method'], status, time.perf_counter() - started)
@@ -0,0 +1,327 @@
+"""
+Asyncio versions of the upstream data sources, for the ASGI serving mode.
+Upstream calls and retry back-offs are awaited instead of blocking a
+thread, so one process can hold many slow upstream calls at once. Parsing
+is shared with the synchronous providers in stock_data_provider.py and
+vaulto_scraper.py.
+"""
+
+import asyncio
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional
+
+import httpx
+import pandas as pd
+
+from cache import TTLCache
+from circuit_breaker import HALF_OPEN, CircuitBreaker, CircuitOpenError, rank_providers
+from downsample import downsample_frame
+from json_stream import StreamingObjectParser
+from metrics import track_upstream
+from price_codec import decode_frame, encode_frame
+from rate_limiter import RateLimitExceeded, get_alpha_vantage_quota
+from retry import DeadlineExceeded, RetryPolicy, UpstreamHTTPError, attempt_timeout, check_response
+from stock_data_provider import (
+    AlphaVantageProvider, NoDataError, StockDataProvider, YahooFinanceDirectProvider, alpha_vantage_frame,
+    is_client_error, is_time_series_key
+)
+from timing import span
+from vaulto_scraper import API_ENDPOINT, HEADERS, parse_pools
+
+
+def create_client(max_connections: int = 100) -> httpx.AsyncClient:
+    """Create the shared keep-alive HTTP client used by the async providers"""
+    return httpx.AsyncClient(
+        limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        timeout=httpx.Timeout(10.0)
+    )
+
+
+class AsyncSingleFlight:
+    """Asyncio counterpart of singleflight.SingleFlight"""
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+        self.leaders = 0
+        self.shared = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Await fn once for all concurrent callers with the same key"""
+        future = self._calls.get(key)
+        if future is not None:
+            self.shared += 1
+            return await asyncio.shield(future)
+
+        self.leaders += 1
+        future = asyncio.get_running_loop().create_future()
+        self._calls[key] = future
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark retrieved so an unawaited error is not logged as lost
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._calls[key]
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'inFlight': len(self._calls),
+            'leaders': self.leaders,
+            'coalesced': self.shared
+        }
+
+
+class AsyncYahooFinanceDirectProvider:
+    """Non-blocking Yahoo Finance chart API provider"""
+
+    def __init__(self, client: httpx.AsyncClient):
+        self.client = client
+        self.sync = YahooFinanceDirectProvider()
+
+    async def fetch_data(self, symbol: str, period: str, max_retries: int = 3) -> pd.DataFrame:
+        """Fetch stock data using direct Yahoo Finance API, Alpha Vantage for 1y, or yfinance as fallback"""
+        if period == '1y':
+            alpha_vantage_key = os.getenv('ALPHA_VANTAGE_API_KEY')
+            if alpha_vantage_key:
+                try:
+                    av_provider = AsyncAlphaVantageProvider(self.client, alpha_vantage_key)
+                    return await av_provider.fetch_data(symbol, period, max_retries)
+                except Exception as e:
+                    print(f"Alpha Vantage failed for 1y, falling back to yfinance: {e}")
+
+            # yfinance is a blocking library; keep it off the event loop
+            return await asyncio.to_thread(self.sync.fetch_yfinance, symbol, max_retries)
+
+        interval = self.sync.get_interval_for_period(period)
+        period1, period2 = self.sync.get_timestamps_for_period(period)
+        url = self.sync.chart_url(symbol, period1, period2, interval)
+
+        async def attempt() -> pd.DataFrame:
+            with track_upstream('yahoo_direct'), span('upstream'):
+                response = await self.client.get(url, headers=self.sync.headers, timeout=attempt_timeout(10))
+                check_response(response, response.text[:200])
+            with span('decode'):
+                data = response.json()
+            with span('frame'):
+                return self.sync.parse_chart(data, symbol)
+
+        try:
+            return await RetryPolicy(max_retries, give_up_on=(NoDataError,), name='yahoo_direct').call_async(
+                attempt, f"chart fetch for {symbol}")
+        except (DeadlineExceeded, NoDataError):
+            raise
+        except UpstreamHTTPError as e:
+            # Yahoo answers an unknown symbol with 404
+            if e.status == 404:
+                raise NoDataError(f"No data found for symbol {symbol}") from e
+            raise
+        except Exception as e:
+            raise Exception(f"Failed to fetch data for {symbol}: {str(e)}")
+
+
+class AsyncAlphaVantageProvider:
+    """Non-blocking Alpha Vantage API provider (requires API key)"""
+
+    def __init__(self, client: httpx.AsyncClient, api_key: Optional[str] = None):
+        self.client = client
+        self.sync = AlphaVantageProvider(api_key)
+
+    async def fetch_data(self, symbol: str, period: str, max_retries: int = 3) -> pd.DataFrame:
+        """Fetch stock data using Alpha Vantage API, slicing periods out of the kept series"""
+        outputsize = self.sync.outputsize_for_period(period)
+        cached = self.sync.cached_series(symbol, outputsize)
+        if cached is not None:
+            return AlphaVantageProvider.slice_period(cached, symbol, period)
+        params = self.sync.series_params(symbol, outputsize)
+
+        async def attempt() -> pd.DataFrame:
+            # Wait for a token on the event loop, not in a to_thread worker
+            with span('quota'):
+                await get_alpha_vantage_quota().acquire_async(self.sync.priority)
+            with track_upstream('alpha_vantage'), span('upstream'):
+                request = self.client.build_request('GET', AlphaVantageProvider.BASE_URL, params=params,
+                                                    timeout=attempt_timeout(10))
+                response = await self.client.send(request, stream=True)
+            try:
+                check_response(response)
+                # Parse as the body arrives, keeping only dates and closes
+                with span('decode'):
+                    parser = StreamingObjectParser(is_time_series_key)
+                    dates, closes = [], []
+                    async for chunk in response.aiter_bytes(AlphaVantageProvider.STREAM_CHUNK_SIZE):
+                        for date, values in parser.feed(chunk):
+                            dates.append(date)
+                            closes.append(values['4. close'])
+                    for date, values in parser.close():
+                        dates.append(date)
+                        closes.append(values['4. close'])
+            finally:
+                await response.aclose()
+            AlphaVantageProvider.check_api_error(parser.header)
+            if parser.stream_key is None:
+                raise Exception("Invalid response structure from Alpha Vantage")
+            with span('frame'):
+                return alpha_vantage_frame(dates, closes)
+
+        policy = RetryPolicy(max_retries, give_up_on=(RateLimitExceeded,), name='alpha_vantage')
+        df = await policy.call_async(attempt, f"Alpha Vantage fetch for {symbol}")
+        self.sync.remember_series(symbol, outputsize, df)
+        return AlphaVantageProvider.slice_period(df, symbol, period)
+
+
+class AsyncStockDataProvider:
+    """Asyncio counterpart of StockDataProvider with caching, coalescing and fallback"""
+
+    def __init__(self, client: httpx.AsyncClient, use_alpha_vantage: bool = False,
+                 alpha_vantage_key: Optional[str] = None, cache_size: int = 256,
+                 cache_ttls: Optional[Dict[str, float]] = None):
+        self.primary_provider = (
+            AsyncAlphaVantageProvider(client, alpha_vantage_key) if use_alpha_vantage and alpha_vantage_key
+            else AsyncYahooFinanceDirectProvider(client)
+        )
+        self.fallback_provider = AsyncYahooFinanceDirectProvider(client) if use_alpha_vantage else None
+        self.providers = [(self.provider_name(self.primary_provider), self.primary_provider)]
+        if self.fallback_provider:
+            name = self.provider_name(self.fallback_provider)
+            if name == self.providers[0][0]:
+                name += '-fallback'
+            self.providers.append((name, self.fallback_provider))
+        self.breakers = {name: CircuitBreaker(name) for name, _ in self.providers}
+        self.cache_ttls = dict(StockDataProvider.CACHE_TTLS, **(cache_ttls or {}))
+        self.cache = TTLCache(max_entries=cache_size)
+        self.inflight = AsyncSingleFlight()
+
+    async def fetch_data(self, symbol: str, period: str, max_retries: int = 3) -> pd.DataFrame:
+        """Fetch stock data, serving from the cache when a fresh copy exists (read-only, as in StockDataProvider)"""
+        key = (symbol.upper(), period)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return decode_frame(cached)
+
+        async def load() -> bytes:
+            df = await self._fetch_upstream(symbol, period, max_retries)
+            data = encode_frame(df, **StockDataProvider.CACHE_CODEC)
+            self.cache.set(key, data, ttl=self.cache_ttls.get(period))
+            return data
+
+        return decode_frame(await self.inflight.do(key, load))
+
+    async def fetch_downsampled(self, symbol: str, period: str, max_points: int, max_retries: int = 3) -> pd.DataFrame:
+        """Fetch stock data reduced to at most max_points rows with LTTB (cached like the raw series)"""
+        key = (symbol.upper(), period, 'lttb', max_points)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return decode_frame(cached)
+
+        df = await self.fetch_data(symbol, period, max_retries)
+        if len(df) <= max_points:
+            return df
+        with span('downsample'):
+            data = encode_frame(downsample_frame(df, max_points), **StockDataProvider.CACHE_CODEC)
+        self.cache.set(key, data, ttl=self.cache_ttls.get(period))
+        return decode_frame(data)
+
+    async def fetch_many(self, symbols: List[str], period: str, max_concurrency: int = 8,
+                         max_retries: int = 3) -> Dict[str, Any]:
+        """Fetch several symbols concurrently, at most max_concurrency at a time
+
+        Returns:
+            Dict mapping each symbol to its DataFrame, or to the Exception
+            raised while fetching it
+        """
+        semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+        async def fetch_one(symbol: str) -> Any:
+            async with semaphore:
+                try:
+                    return await self.fetch_data(symbol, period, max_retries)
+                except Exception as e:
+                    return e
+
+        results = await asyncio.gather(*(fetch_one(symbol) for symbol in symbols))
+        return dict(zip(symbols, results))
+
+    @staticmethod
+    def provider_name(provider: Any) -> str:
+        """Short name used for a provider's circuit breaker and in stats"""
+        return 'alphavantage' if isinstance(provider, AsyncAlphaVantageProvider) else 'yahoo'
+
+    async def _fetch_upstream(self, symbol: str, period: str, max_retries: int = 3) -> pd.DataFrame:
+        """Fetch stock data from the healthiest available provider (see StockDataProvider._route)"""
+        candidates = rank_providers(self.providers, self.breakers)
+        last_error: Optional[Exception] = None
+
+        for index, (name, provider) in enumerate(candidates):
+            breaker = self.breakers[name]
+            if not breaker.allow_request():
+                continue
+
+            _, score, _ = breaker.health()
+            is_last = index == len(candidates) - 1
+            retries = max_retries if is_last or (score == 0 and breaker.state != HALF_OPEN) else 1
+
+            started = time.monotonic()
+            try:
+                df = await provider.fetch_data(symbol, period, retries)
+            except (asyncio.CancelledError, DeadlineExceeded, NoDataError):
+                breaker.release()
+                raise
+            except Exception as e:
+                last_error = e
+                if is_client_error(e):
+                    breaker.release()
+                    continue
+                breaker.record_failure(time.monotonic() - started)
+                if not is_last:
+                    print(f"Provider {name} failed for {symbol}, trying next: {e}")
+            else:
+                breaker.record_success(time.monotonic() - started)
+                return df
+
+        if last_error is not None:
+            raise last_error
+        retry_after = min(breaker.retry_after() for breaker in self.breakers.values())
+        raise CircuitOpenError(
+            f"All providers are unavailable for {symbol}, retry in {retry_after:.0f}s",
+            retry_after=retry_after
+        )
+
+    def breaker_stats(self) -> Dict[str, Any]:
+        """Circuit breaker state for each provider"""
+        return {name: breaker.stats() for name, breaker in self.breakers.items()}
+
+
+async def scrape_vaulto_data_async(client: httpx.AsyncClient) -> List[Dict[str, Any]]:
+    """
+    Non-blocking version of vaulto_scraper.scrape_vaulto_data
+
+    Raises:
+        Exception: If fetching fails
+    """
+    async def attempt() -> Dict[str, Any]:
+        with track_upstream('vaulto'):
+            response = await client.get(API_ENDPOINT, headers=HEADERS, timeout=attempt_timeout(15))
+            check_response(response)
+        return response.json()
+
+    try:
+        print(f"Fetching data from {API_ENDPOINT}...")
+        return parse_pools(await RetryPolicy(max_attempts=3, name='vaulto').call_async(attempt, "Vaulto pool fetch"))
+
+    except DeadlineExceeded:
+        raise
+    except (httpx.HTTPError, UpstreamHTTPError) as e:
+        raise Exception(f"Failed to fetch data from API: {str(e)}")
+    except ValueError as e:
+        raise Exception(f"Failed to parse JSON response: {str(e)}")
+    except Exception as e:
+        raise Exception(f"Failed to process data: {str(e)}")
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for building price DataFrames from upstream JSON.
+Compares the original row-by-row loops against the columnar parse path
+in stock_data_provider on synthetic Yahoo chart and Alpha Vantage payloads.
+
+Usage:
+    python benchmarks/bench_parse.py [--repeat N]
+"""
+
+import argparse
+import os
+import sys
+import timeit
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+from stock_data_provider import frame_from_alpha_vantage, frame_from_yahoo_chart
+
+
+def make_yahoo_payload(n: int, seed: int = 0):
+    """Timestamps/closes shaped like a Yahoo chart result, with ~1% null closes"""
+    rng = np.random.default_rng(seed)
+    start = int(datetime(2000, 1, 3, 14, 30).timestamp())
+    timestamps = [start + i * 86400 for i in range(n)]
+    closes = list(100 + np.cumsum(rng.normal(0, 1, n)))
+    for i in rng.choice(n, size=max(1, n // 100), replace=False):
+        closes[int(i)] = None
+    return timestamps, closes
+
+
+def make_alpha_vantage_payload(n: int, seed: int = 0):
+    """A "Time Series (Daily)" object with n days, newest first"""
+    rng = np.random.default_rng(seed)
+    closes = 100 + np.cumsum(rng.normal(0, 1, n))
+    end = datetime(2024, 12, 31)
+    series = {}
+    for i in range(n):
+        date = (end - timedelta(days=i)).strftime('%Y-%m-%d')
+        close = f"{closes[i]:.4f}"
+        series[date] = {
+            '1. open': close,
+            '2. high': close,
+            '3. low': close,
+            '4. close': close,
+            '5. volume': '1000000'
+        }
+    return series
+
+
+def legacy_yahoo(timestamps, closes):
+    """Row-by-row construction previously used by YahooFinanceDirectProvider"""
+    df_data = []
+    for i, timestamp in enumerate(timestamps):
+        if closes[i] is not None:
+            df_data.append({
+                'Date': datetime.fromtimestamp(timestamp),
+                'Close': closes[i]
+            })
+    df = pd.DataFrame(df_data)
+    df.set_index('Date', inplace=True)
+    df.sort_index(inplace=True)
+    return df
+
+
+def legacy_alpha_vantage(time_series):
+    """Row-by-row construction previously used by AlphaVantageProvider"""
+    df_data = []
+    for date_str, values in time_series.items():
+        df_data.append({
+            'Date': pd.to_datetime(date_str),
+            'Close': float(values['4. close'])
+        })
+    df = pd.DataFrame(df_data)
+    df.set_index('Date', inplace=True)
+    df.sort_index(inplace=True)
+    return df
+
+
+def best_of(fn, repeat: int) -> float:
+    """Best wall time of fn in seconds, over repeat runs"""
+    return min(timeit.repeat(fn, number=1, repeat=repeat))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'payload':<22}{'rows':>7}{'legacy ms':>12}{'columnar ms':>14}{'speedup':>10}")
+    for n in (100, 250, 5000):
+        timestamps, closes = make_yahoo_payload(n)
+        old = legacy_yahoo(timestamps, closes)
+        new = frame_from_yahoo_chart(timestamps, closes)
+        assert np.allclose(old['Close'].to_numpy(), new['Close'].to_numpy())
+        assert (old.index == new.index).all()
+
+        legacy = best_of(lambda: legacy_yahoo(timestamps, closes), args.repeat)
+        columnar = best_of(lambda: frame_from_yahoo_chart(timestamps, closes), args.repeat)
+        print(f"{'yahoo chart':<22}{n:>7}{legacy * 1000:>12.2f}{columnar * 1000:>14.2f}{legacy / columnar:>9.1f}x")
+
+    for n in (100, 250, 5000):
+        series = make_alpha_vantage_payload(n)
+        old = legacy_alpha_vantage(series)
+        new = frame_from_alpha_vantage(series)
+        assert np.allclose(old['Close'].to_numpy(), new['Close'].to_numpy())
+        assert (old.index == new.index).all()
+
+        legacy = best_of(lambda: legacy_alpha_vantage(series), args.repeat)
+        columnar = best_of(lambda: frame_from_alpha_vantage(series), args.repeat)
+        print(f"{'alpha vantage daily':<22}{n:>7}{legacy * 1000:>12.2f}{columnar * 1000:>14.2f}{legacy / columnar:>9.1f}x")
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
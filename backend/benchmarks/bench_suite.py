@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark suite for the backend.
+Replays recorded upstream JSON from a local stub server (stub_server.py)
+and measures latency percentiles and throughput of:
+
+- each provider's parse path (JSON decode + DataFrame build), in-process
+- each provider's full fetch path against the stub (HTTP + parse)
+- each Flask route under concurrent load, through a real threaded server
+
+Results are written as JSON; pass --compare with an earlier results file
+to fail (exit 1) when a benchmark's p50 regresses by more than
+--max-regression.
+
+Usage:
+    python benchmarks/bench_suite.py [--quick] [--concurrency 8] [--output results.json]
+                                     [--compare baseline.json] [--max-regression 0.25]
+"""
+
+import argparse
+import contextlib
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# The app must not write a price store or refresh Vaulto on its own during a run
+os.environ['PRICE_STORE_PATH'] = ''
+os.environ.setdefault('VAULTO_REFRESH_INTERVAL', '3600')
+os.environ.pop('ALPHA_VANTAGE_API_KEY', None)
+
+import numpy as np
+import pandas as pd
+import requests
+
+import rate_limiter
+from stub_server import FIXTURES_DIR, StubUpstream
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+
+
+def summarize(latencies: List[float], wall: float, errors: int = 0) -> Dict[str, Any]:
+    """Latency percentiles (ms) and throughput for one benchmark"""
+    ms = np.asarray(latencies) * 1000
+    return {
+        'iterations': len(latencies),
+        'errors': errors,
+        'opsPerSec': len(latencies) / wall if wall > 0 else None,
+        'meanMs': float(ms.mean()),
+        'p50Ms': float(np.percentile(ms, 50)),
+        'p95Ms': float(np.percentile(ms, 95)),
+        'p99Ms': float(np.percentile(ms, 99)),
+        'maxMs': float(ms.max()),
+    }
+
+
+def run_serial(fn: Callable[[], Any], iterations: int, warmup: int = 3) -> Dict[str, Any]:
+    """Time fn back to back"""
+    for _ in range(warmup):
+        fn()
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - t0)
+    return summarize(latencies, time.perf_counter() - started)
+
+
+def run_concurrent(fn: Callable[[int], bool], requests_total: int, concurrency: int) -> Dict[str, Any]:
+    """Call fn(i) requests_total times from concurrency threads; fn returns False on error"""
+    def timed(i: int):
+        t0 = time.perf_counter()
+        ok = fn(i)
+        return time.perf_counter() - t0, ok
+
+    fn(0)  # warm connection pools and code paths
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        outcomes = list(pool.map(timed, range(requests_total)))
+    wall = time.perf_counter() - started
+    return summarize([t for t, _ in outcomes], wall, errors=sum(1 for _, ok in outcomes if not ok))
+
+
+def bench_parse(iterations: int) -> Dict[str, Dict[str, Any]]:
+    """Decode + DataFrame build for each recorded payload, without any I/O"""
+    from price_codec import decode_frame, encode_frame
+    from responses import format_stock_data
+    from stock_data_provider import AlphaVantageProvider, StockDataProvider, YahooFinanceDirectProvider
+    from vaulto_scraper import parse_pools
+
+    def raw(name: str) -> bytes:
+        with open(os.path.join(FIXTURES_DIR, name), 'rb') as f:
+            return f.read()
+
+    chart_1d, chart_1h = raw('yahoo_chart_1d.json'), raw('yahoo_chart_1h.json')
+    alpha_vantage, vaulto = raw('alpha_vantage_daily.json'), raw('vaulto_pools.json')
+    frame = YahooFinanceDirectProvider.parse_chart(json.loads(chart_1d), 'NVDA')
+    full_frame = AlphaVantageProvider.parse_series(json.loads(alpha_vantage))
+    encoded = encode_frame(full_frame, **StockDataProvider.CACHE_CODEC)
+
+    return {
+        'parse.yahoo_chart_1d': run_serial(
+            lambda: YahooFinanceDirectProvider.parse_chart(json.loads(chart_1d), 'NVDA'), iterations),
+        'parse.yahoo_chart_1h': run_serial(
+            lambda: YahooFinanceDirectProvider.parse_chart(json.loads(chart_1h), 'NVDA'), iterations),
+        'parse.alpha_vantage_full': run_serial(
+            lambda: AlphaVantageProvider.parse_series(json.loads(alpha_vantage)), iterations),
+        'parse.alpha_vantage_full_stream': run_serial(
+            lambda: AlphaVantageProvider.parse_series_stream(
+                alpha_vantage[i:i + AlphaVantageProvider.STREAM_CHUNK_SIZE]
+                for i in range(0, len(alpha_vantage), AlphaVantageProvider.STREAM_CHUNK_SIZE)), iterations),
+        'parse.vaulto_pools': run_serial(lambda: parse_pools(json.loads(vaulto)), iterations),
+        'serialize.stock_data_rows': run_serial(lambda: format_stock_data('NVDA', frame, 'rows'), iterations),
+        'serialize.stock_data_columnar': run_serial(lambda: format_stock_data('NVDA', frame, 'columnar'), iterations),
+        'cache.encode_frame': run_serial(lambda: encode_frame(full_frame, **StockDataProvider.CACHE_CODEC), iterations),
+        'cache.decode_frame': run_serial(lambda: decode_frame(encoded), iterations),
+    }
+
+
+def bench_providers(iterations: int) -> Dict[str, Dict[str, Any]]:
+    """Full provider fetches (HTTP to the stub + parse), one at a time"""
+    from stock_data_provider import AlphaVantageProvider, YahooFinanceDirectProvider
+    from vaulto_scraper import scrape_vaulto_data
+
+    yahoo = YahooFinanceDirectProvider()
+    alpha_vantage = AlphaVantageProvider('benchmark')
+    return {
+        'provider.yahoo_direct_30d': run_serial(lambda: yahoo.fetch_data('NVDA', '30d'), iterations),
+        'provider.yahoo_direct_24h': run_serial(lambda: yahoo.fetch_data('NVDA', '24h'), iterations),
+        # A fresh provider each time, so the kept series never answers and every call fetches and parses
+        'provider.alpha_vantage_1y': run_serial(
+            lambda: AlphaVantageProvider('benchmark').fetch_data('NVDA', '1y'), iterations),
+        'provider.alpha_vantage_1y_kept': run_serial(
+            lambda: alpha_vantage.fetch_data('NVDA', '1y'), iterations),
+        'provider.vaulto': run_serial(scrape_vaulto_data, iterations),
+    }
+
+
+def bench_routes(requests_total: int, concurrency: int) -> Dict[str, Dict[str, Any]]:
+    """Each Flask route under concurrent load, through a real threaded server"""
+    from werkzeug.serving import make_server
+
+    import app as backend
+    from stock_data_provider import StockDataProvider
+
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    server = make_server('127.0.0.1', 0, backend.app, threaded=True)
+    threading.Thread(target=server.serve_forever, name='bench-flask', daemon=True).start()
+    base = f'http://127.0.0.1:{server.server_port}'
+    local = threading.local()
+
+    def get(path: str, **params) -> bool:
+        session = getattr(local, 'session', None)
+        if session is None:
+            session = local.session = requests.Session()
+        return session.get(base + path, params=params, timeout=30).status_code == 200
+
+    cached_provider = backend.stock_provider
+    # Zero TTLs: every request goes through the stub upstream and the parse path
+    uncached_provider = StockDataProvider(cache_ttls={period: 0 for period in StockDataProvider.CACHE_TTLS})
+    symbols = [f'S{i:02d}' for i in range(50)]
+
+    results = {}
+    try:
+        results['route.health'] = run_concurrent(lambda i: get('/api/health'), requests_total, concurrency)
+        results['route.stock_data_cached'] = run_concurrent(
+            lambda i: get('/api/stock-data', symbol='NVDA', period='30d'), requests_total, concurrency)
+        results['route.stock_data_columnar_cached'] = run_concurrent(
+            lambda i: get('/api/stock-data', symbol='NVDA', period='30d', format='columnar'), requests_total, concurrency)
+
+        backend.stock_provider = uncached_provider
+        results['route.stock_data_uncached'] = run_concurrent(
+            lambda i: get('/api/stock-data', symbol=symbols[i % len(symbols)], period='30d'), requests_total, concurrency)
+        results['route.batch_5_uncached'] = run_concurrent(
+            lambda i: get('/api/stock-data/batch', symbols=','.join(symbols[i % 45:i % 45 + 5]), period='7d'),
+            max(requests_total // 5, 10), concurrency)
+        backend.stock_provider = cached_provider
+
+        results['route.vaulto_data'] = run_concurrent(lambda i: get('/api/vaulto-data'), requests_total, concurrency)
+        results['route.metrics'] = run_concurrent(lambda i: get('/api/metrics'), max(requests_total // 5, 10), concurrency)
+    finally:
+        backend.stock_provider = cached_provider
+        server.shutdown()
+    return results
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: Dict[str, Dict[str, Any]], baseline_path: str, max_regression: float) -> List[str]:
+    """Names and details of benchmarks whose p50 regressed beyond max_regression"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)['results']
+    regressions = []
+    for name, current in results.items():
+        before = baseline.get(name)
+        if not before or not before.get('p50Ms'):
+            continue
+        change = current['p50Ms'] / before['p50Ms'] - 1
+        if change > max_regression:
+            regressions.append(f"{name}: p50 {before['p50Ms']:.2f}ms -> {current['p50Ms']:.2f}ms (+{change:.0%})")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--quick', action='store_true', help='Fewer iterations, for smoke runs')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='Artificial stub upstream latency')
+    parser.add_argument('--output', help='Results file (default: benchmarks/results/<timestamp>.json)')
+    parser.add_argument('--compare', help='Earlier results file to check for regressions')
+    parser.add_argument('--max-regression', type=float, default=0.25, help='Allowed p50 slowdown (0.25 = 25%%)')
+    args = parser.parse_args()
+
+    parse_iterations, provider_iterations, route_requests = (30, 10, 40) if args.quick else (300, 60, 400)
+
+    stub = StubUpstream(latency_ms=args.latency_ms).start()
+    stub.point_providers_here()
+    # The stub has no quota; keep the scheduler from throttling the run
+    rate_limiter._alpha_vantage_quota = rate_limiter.QuotaScheduler(per_minute=10 ** 6, per_day=10 ** 9)
+
+    results: Dict[str, Dict[str, Any]] = {}
+    # Providers log every fetch with print(); keep that out of the timings' output
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        results.update(bench_parse(parse_iterations))
+        results.update(bench_providers(provider_iterations))
+        results.update(bench_routes(route_requests, args.concurrency))
+    stub.stop()
+
+    print(f"{'benchmark':<36}{'n':>6}{'ops/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    for name, r in results.items():
+        print(f"{name:<36}{r['iterations']:>6}{r['opsPerSec']:>10.1f}{r['p50Ms']:>10.2f}"
+              f"{r['p95Ms']:>10.2f}{r['p99Ms']:>10.2f}{r['errors']:>8}")
+
+    output = args.output or os.path.join(RESULTS_DIR, datetime.now().strftime('%Y%m%dT%H%M%S') + '.json')
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump({
+            'meta': {
+                'timestamp': datetime.now().isoformat(),
+                'revision': git_revision(),
+                'python': platform.python_version(),
+                'pandas': pd.__version__,
+                'numpy': np.__version__,
+                'platform': platform.platform(),
+                'concurrency': args.concurrency,
+                'stubLatencyMs': args.latency_ms,
+                'quick': args.quick,
+            },
+            'results': results
+        }, f, indent=2)
+    print(f"\nWrote {output}")
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.max_regression)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.max_regression:.0%}:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print(f"\nNo p50 regressions beyond {args.max_regression:.0%} against {args.compare}")
+
+    failed = [name for name, r in results.items() if r['errors']]
+    if failed:
+        print(f"\nBenchmarks with failed requests: {', '.join(failed)}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Write the upstream JSON fixtures replayed by the benchmark stub server.
+
+By default the fixtures are generated deterministically in the exact shape
+of each upstream response, so the suite runs without network access or API
+keys. With --live the real responses are recorded instead (Alpha Vantage
+needs ALPHA_VANTAGE_API_KEY).
+
+Usage:
+    python benchmarks/record_fixtures.py [--live] [--symbol NVDA]
+"""
+
+import argparse
+import json
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import requests
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+# Fixture file -> what it stands in for
+FIXTURES = {
+    'yahoo_chart_1d.json': 'Yahoo chart API, one year of daily bars',
+    'yahoo_chart_1h.json': 'Yahoo chart API, five days of hourly bars',
+    'alpha_vantage_daily.json': 'Alpha Vantage TIME_SERIES_DAILY, outputsize=full',
+    'vaulto_pools.json': 'Vaulto tokenized-stock-pools endpoint',
+}
+
+ALPHA_VANTAGE_DAYS = 1000
+VAULTO_SYMBOLS = ['NVDA', 'AAPL', 'TSLA', 'MSFT', 'AMZN', 'GOOGL', 'META', 'SPY', 'QQQ', 'SLV',
+                  'GLD', 'COIN', 'MSTR', 'AMD', 'NFLX', 'PLTR', 'HOOD', 'CRCL', 'IBM', 'ORCL']
+
+
+def _walk(n: int, rng: np.random.Generator) -> np.ndarray:
+    return np.round(150 + np.cumsum(rng.normal(0, 1.5, n)), 4)
+
+
+def yahoo_chart(symbol: str, timestamps, rng: np.random.Generator, interval: str):
+    closes = _walk(len(timestamps), rng).tolist()
+    # Yahoo leaves nulls for bars with no trades
+    for i in rng.choice(len(closes), size=max(1, len(closes) // 100), replace=False):
+        closes[int(i)] = None
+    return {
+        'chart': {
+            'result': [{
+                'meta': {'currency': 'USD', 'symbol': symbol, 'dataGranularity': interval},
+                'timestamp': timestamps,
+                'indicators': {'quote': [{'close': closes, 'open': closes, 'high': closes, 'low': closes}]}
+            }],
+            'error': None
+        }
+    }
+
+
+def synthetic_fixtures(symbol: str):
+    """Deterministic stand-ins for each upstream response"""
+    rng = np.random.default_rng(42)
+    end = datetime(2024, 12, 31, 14, 30, tzinfo=timezone.utc)
+
+    daily = [int((end - timedelta(days=i)).timestamp()) for i in range(365, -1, -1)
+             if (end - timedelta(days=i)).weekday() < 5]
+    hourly = [int((end - timedelta(hours=i)).timestamp()) for i in range(24 * 5, -1, -1)
+              if 14 <= (end - timedelta(hours=i)).hour <= 21]
+
+    closes = _walk(ALPHA_VANTAGE_DAYS, rng)
+    series = {}
+    day = end
+    for close in closes:
+        while day.weekday() >= 5:
+            day -= timedelta(days=1)
+        value = f'{close:.4f}'
+        series[day.strftime('%Y-%m-%d')] = {
+            '1. open': value, '2. high': value, '3. low': value, '4. close': value, '5. volume': '31245000'
+        }
+        day -= timedelta(days=1)
+
+    pools = []
+    for i, stock in enumerate(VAULTO_SYMBOLS):
+        tvl = float(rng.uniform(5e4, 5e6))
+        pools.append({
+            'hash': f'0x{i:040x}',
+            'token0': {'symbol': f'{stock}on'},
+            'token1': {'symbol': 'USDC'},
+            'tvl': tvl,
+            'fees24h': tvl * 0.0004,
+            'volume24h': tvl * 0.4,
+            'fees30d': tvl * 0.012,
+            'volume30d': tvl * 12,
+            'apr': None if i % 7 == 0 else round(float(rng.uniform(1, 60)), 2)
+        })
+
+    return {
+        'yahoo_chart_1d.json': yahoo_chart(symbol, daily, rng, '1d'),
+        'yahoo_chart_1h.json': yahoo_chart(symbol, hourly, rng, '1h'),
+        'alpha_vantage_daily.json': {
+            'Meta Data': {'1. Information': 'Daily Prices', '2. Symbol': symbol},
+            'Time Series (Daily)': series
+        },
+        'vaulto_pools.json': {'pools': pools},
+    }
+
+
+def live_fixtures(symbol: str):
+    """Record the real upstream responses"""
+    from stock_data_provider import AlphaVantageProvider, YahooFinanceDirectProvider
+    from vaulto_scraper import API_ENDPOINT, HEADERS
+
+    yahoo = YahooFinanceDirectProvider()
+    now = int(datetime.now().timestamp())
+    fixtures = {}
+    for name, days, interval in (('yahoo_chart_1d.json', 365, '1d'), ('yahoo_chart_1h.json', 5, '1h')):
+        url = yahoo.chart_url(symbol, now - days * 86400, now, interval)
+        response = requests.get(url, headers=yahoo.headers, timeout=15)
+        response.raise_for_status()
+        fixtures[name] = response.json()
+
+    api_key = os.getenv('ALPHA_VANTAGE_API_KEY')
+    if api_key:
+        response = requests.get(AlphaVantageProvider.BASE_URL,
+                                params=AlphaVantageProvider(api_key).series_params(symbol, 'full'), timeout=30)
+        response.raise_for_status()
+        fixtures['alpha_vantage_daily.json'] = response.json()
+    else:
+        print("ALPHA_VANTAGE_API_KEY not set; keeping the existing Alpha Vantage fixture")
+
+    response = requests.get(API_ENDPOINT, headers=HEADERS, timeout=15)
+    response.raise_for_status()
+    fixtures['vaulto_pools.json'] = response.json()
+    return fixtures
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--live', action='store_true', help='Record real upstream responses')
+    parser.add_argument('--symbol', default='NVDA')
+    args = parser.parse_args()
+
+    fixtures = live_fixtures(args.symbol) if args.live else synthetic_fixtures(args.symbol)
+    os.makedirs(FIXTURES_DIR, exist_ok=True)
+    for name, payload in fixtures.items():
+        path = os.path.join(FIXTURES_DIR, name)
+        with open(path, 'w') as f:
+            json.dump(payload, f, separators=(',', ':'))
+        print(f"Wrote {path} ({FIXTURES[name]}, {os.path.getsize(path) / 1024:.0f} KiB)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Yahoo chart, Alpha Vantage and Vaulto endpoints.
+Replays the JSON fixtures in benchmarks/fixtures (see record_fixtures.py),
+with timestamps shifted so the newest bar is today, so period slicing in
+the providers behaves as it would against the live services.
+
+Usage:
+    python benchmarks/stub_server.py [--port 8765] [--latency-ms 0]
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from datetime import date, datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+from urllib.parse import parse_qs, urlparse
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+YAHOO_CHART_PATH = '/v8/finance/chart/'
+ALPHA_VANTAGE_PATH = '/query'
+VAULTO_PATH = '/api/cache/tokenized-stock-pools'
+
+
+def load_fixture(name: str) -> Dict:
+    with open(os.path.join(FIXTURES_DIR, name)) as f:
+        return json.load(f)
+
+
+def rebase_yahoo(payload: Dict) -> Dict:
+    """Shift chart timestamps so the last bar is just before now"""
+    result = payload['chart']['result'][0]
+    timestamps = result['timestamp']
+    shift = int(time.time()) - 60 - timestamps[-1]
+    result['timestamp'] = [t + shift for t in timestamps]
+    return payload
+
+
+def rebase_alpha_vantage(payload: Dict) -> Dict:
+    """Shift daily series dates so the newest day is today"""
+    key = next(k for k in payload if 'Time Series' in k)
+    series = payload[key]
+    newest = max(datetime.strptime(d, '%Y-%m-%d').date() for d in series)
+    shift = date.today() - newest
+    payload[key] = {
+        (datetime.strptime(d, '%Y-%m-%d').date() + shift).strftime('%Y-%m-%d'): values
+        for d, values in series.items()
+    }
+    return payload
+
+
+class StubUpstream:
+    """Threaded HTTP server replaying the upstream fixtures"""
+
+    def __init__(self, port: int = 0, latency_ms: float = 0.0):
+        """
+        Args:
+            port: Port to listen on (0 picks a free one)
+            latency_ms: Artificial delay added to every response
+        """
+        bodies = {
+            'chart_1d': json.dumps(rebase_yahoo(load_fixture('yahoo_chart_1d.json'))).encode('utf-8'),
+            'chart_1h': json.dumps(rebase_yahoo(load_fixture('yahoo_chart_1h.json'))).encode('utf-8'),
+            'alpha_vantage': json.dumps(rebase_alpha_vantage(load_fixture('alpha_vantage_daily.json'))).encode('utf-8'),
+            'vaulto': json.dumps(load_fixture('vaulto_pools.json')).encode('utf-8'),
+        }
+        delay = latency_ms / 1000.0
+        self.requests = 0
+        counter_lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                with counter_lock:
+                    stub.requests += 1
+                url = urlparse(self.path)
+                if url.path.startswith(YAHOO_CHART_PATH):
+                    interval = parse_qs(url.query).get('interval', ['1d'])[0]
+                    body = bodies['chart_1h' if interval.endswith('h') or interval.endswith('m') else 'chart_1d']
+                elif url.path == ALPHA_VANTAGE_PATH:
+                    body = bodies['alpha_vantage']
+                elif url.path == VAULTO_PATH:
+                    body = bodies['vaulto']
+                else:
+                    self.send_error(404)
+                    return
+                if delay:
+                    time.sleep(delay)
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+        self.server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self) -> 'StubUpstream':
+        self._thread = threading.Thread(target=self.server.serve_forever, name='stub-upstream', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def point_providers_here(self) -> None:
+        """Redirect the provider modules' upstream URLs to this server"""
+        import stock_data_provider
+        import vaulto_scraper
+
+        stock_data_provider.YahooFinanceDirectProvider.BASE_URL = self.url + YAHOO_CHART_PATH.rstrip('/')
+        stock_data_provider.AlphaVantageProvider.BASE_URL = self.url + ALPHA_VANTAGE_PATH
+        vaulto_scraper.API_ENDPOINT = self.url + VAULTO_PATH
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency-ms', type=float, default=0.0)
+    args = parser.parse_args()
+
+    stub = StubUpstream(args.port, args.latency_ms).start()
+    print(f"Replaying fixtures on {stub.url} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        stub.stop()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
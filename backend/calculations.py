@@ -0,0 +1,298 @@
+"""
+Traditional vs tokenized return model, computed server-side.
+Mirrors src/utils/calculations.ts, with the per-point chart math done as
+NumPy array operations over the whole price series.
+"""
+
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+# Periods whose fees/volume are extrapolated from the 30-day daily rate
+EXTRAPOLATED_DAYS = {'3m': 90, '6m': 180, '1y': 365}
+
+# Smallest investment the comparison accepts (same floor as the frontend form)
+MIN_INVESTMENT = 1.0
+
+
+def map_tokenized_to_traditional(symbol: str) -> str:
+    """Map a tokenized stock symbol to its traditional symbol (e.g. 'NVDAon' -> 'NVDA')"""
+    return symbol.replace('on', '', 1)
+
+
+def find_pool(stocks: List[Dict[str, Any]], symbol: str) -> Optional[Dict[str, Any]]:
+    """
+    Find the Vaulto pool for a symbol.
+
+    Args:
+        stocks: TokenizedStock dictionaries from the Vaulto snapshot
+        symbol: Tokenized symbol (e.g. 'NVDAon') or traditional symbol (e.g. 'nvda')
+
+    Returns:
+        The matching TokenizedStock dictionary, or None
+    """
+    for stock in stocks:
+        if stock['symbol'] == symbol:
+            return stock
+    wanted = symbol.upper()
+    for stock in stocks:
+        if wanted in (stock['symbol'].upper(), map_tokenized_to_traditional(stock['symbol']).upper()):
+            return stock
+    return None
+
+
+def _for_period(value_24h: float, value_30d: float, period: str) -> float:
+    if period == '7d':
+        return value_24h * 7
+    if period == '30d':
+        return value_30d
+    if period in EXTRAPOLATED_DAYS:
+        return value_30d / 30 * EXTRAPOLATED_DAYS[period]
+    return value_24h
+
+
+def fees_for_period(stock: Dict[str, Any], period: str) -> float:
+    """Pool fees earned over the period (longer periods are extrapolated from the 30-day rate)"""
+    return _for_period(stock['fees24h'], stock['fees30d'], period)
+
+
+def volume_for_period(stock: Dict[str, Any], period: str) -> float:
+    """Pool volume over the period (longer periods are extrapolated from the 30-day rate)"""
+    return _for_period(stock['volume24h'], stock['volume30d'], period)
+
+
+def tvl_fraction(investment, pool_tvl):
+    """
+    User's fraction of the pool TVL, capped at 1.0. Works on scalars or
+    broadcastable arrays; an empty pool counts as fully owned, as in the frontend.
+    """
+    investment = np.asarray(investment, dtype='float64')
+    pool_tvl = np.asarray(pool_tvl, dtype='float64')
+    share = np.divide(investment, pool_tvl, out=np.ones(np.broadcast_shapes(investment.shape, pool_tvl.shape)),
+                      where=pool_tvl > 0)
+    return np.minimum(share, 1.0)
+
+
+def calculate_returns(investment: float, pool_tvl: float, total_fees: float,
+                      start_price: float, end_price: float) -> Dict[str, float]:
+    """
+    Returns and fees for holding the stock directly vs the tokenized stock in its pool.
+
+    Returns:
+        Dictionary matching the frontend CalculationResult type
+    """
+    price_change = (end_price - start_price) / start_price
+    traditional_return = price_change * investment
+    fraction = float(tvl_fraction(investment, pool_tvl))
+    fees_claimed = total_fees * fraction
+    tokenized_return = traditional_return + fees_claimed
+    return {
+        'traditionalReturn': traditional_return,
+        'traditionalReturnPercentage': price_change * 100,
+        'tokenizedReturn': tokenized_return,
+        'tokenizedReturnPercentage': tokenized_return / investment * 100,
+        'feesClaimed': fees_claimed,
+        'userTVLFraction': fraction,
+        'totalTokenizedValue': investment + tokenized_return
+    }
+
+
+def chart_values(closes: np.ndarray, investment: float, pool_tvl: float,
+                 total_fees: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Position values at each price point. Fees accrue evenly across the points.
+
+    Args:
+        closes: Close prices, oldest first
+        investment: Amount invested at the first close
+        pool_tvl: Pool TVL
+        total_fees: Pool fees over the whole series
+
+    Returns:
+        (traditional values, tokenized values), floored at zero
+    """
+    start_price = closes[0]
+    traditional = investment + (closes - start_price) / start_price * investment
+    fees_per_point = total_fees / len(closes)
+    accumulated = fees_per_point * np.arange(1, len(closes) + 1) * tvl_fraction(investment, pool_tvl)
+    return np.maximum(traditional, 0.0), np.maximum(traditional + accumulated, 0.0)
+
+
+def effective_apr(investment: float, pool_tvl: float, apr: Optional[float]) -> Optional[float]:
+    """The pool APR scaled by the user's share of the pool"""
+    if apr is None or pool_tvl == 0:
+        return None
+    return float(tvl_fraction(investment, pool_tvl)) * apr
+
+
+def build_comparison(stock: Dict[str, Any], hist, period: str, investment: float,
+                     response_format: str = 'rows') -> Dict[str, Any]:
+    """
+    Build the /api/comparison response body.
+
+    Chart values are rounded to cents, which keeps the body a fraction of the
+    size of the raw price series and pool list it is computed from.
+
+    Args:
+        stock: TokenizedStock dictionary for the symbol's pool
+        hist: DataFrame indexed by date with a Close column
+        period: Time period the prices cover
+        investment: Investment amount in dollars
+        response_format: 'rows' for chartData [{date, traditionalValue, tokenizedValue}, ...]
+            or 'columnar' for parallel dates/traditionalValues/tokenizedValues arrays
+
+    Returns:
+        Dictionary matching the frontend ComparisonData type, plus the symbols and period
+    """
+    closes = hist['Close'].to_numpy(dtype='float64')
+    dates = hist.index.strftime('%Y-%m-%dT%H:%M:%S').tolist()
+    start_price, end_price = float(closes[0]), float(closes[-1])
+    pool_tvl = stock['poolTVL']
+    total_fees = fees_for_period(stock, period)
+
+    traditional, tokenized = chart_values(closes, investment, pool_tvl, total_fees)
+    traditional = np.round(traditional, 2).tolist()
+    tokenized = np.round(tokenized, 2).tolist()
+
+    body = {
+        'symbol': map_tokenized_to_traditional(stock['symbol']),
+        'tokenizedSymbol': stock['symbol'],
+        'period': period,
+        'calculationResult': calculate_returns(investment, pool_tvl, total_fees, start_price, end_price),
+        'apr': effective_apr(investment, pool_tvl, stock['apr']),
+        'poolTVL': pool_tvl,
+        'volumeForPeriod': volume_for_period(stock, period),
+        'investmentAmount': investment,
+        'currentPrice': end_price,
+        'startPrice': start_price
+    }
+    if response_format == 'columnar':
+        body['chartData'] = {'dates': dates, 'traditionalValues': traditional, 'tokenizedValues': tokenized}
+    else:
+        body['chartData'] = [
+            {'date': date, 'traditionalValue': t, 'tokenizedValue': v}
+            for date, t, v in zip(dates, traditional, tokenized)
+        ]
+    return body
+
+
+def parse_investment(raw: Optional[str]) -> float:
+    """
+    Parse the investment query parameter.
+
+    Raises:
+        ValueError: If it is missing, not a number, or below MIN_INVESTMENT
+    """
+    if not raw:
+        raise ValueError('Investment parameter is required')
+    try:
+        investment = float(raw)
+    except ValueError:
+        raise ValueError(f'Invalid investment amount: {raw}')
+    if not np.isfinite(investment) or investment < MIN_INVESTMENT:
+        raise ValueError(f'Investment amount must be at least ${MIN_INVESTMENT:.0f}')
+    return investment
+
+
+# Upper bounds for /api/comparison/sweep
+MAX_SWEEP_INVESTMENTS = 10000
+MAX_SWEEP_CELLS = 1000000
+
+
+def parse_investment_grid(raw_investments: Optional[str], raw_min: Optional[str] = None,
+                          raw_max: Optional[str] = None, raw_steps: Optional[str] = None) -> np.ndarray:
+    """
+    Parse the sweep's investment amounts: either an explicit comma-separated
+    list, or minInvestment/maxInvestment/steps for log-spaced amounts.
+
+    Returns:
+        Sorted, deduplicated investment amounts
+
+    Raises:
+        ValueError: If the amounts are missing or invalid
+    """
+    if raw_investments:
+        investments = np.array([parse_investment(raw.strip()) for raw in raw_investments.split(',') if raw.strip()])
+    elif raw_min and raw_max:
+        minimum, maximum = parse_investment(raw_min), parse_investment(raw_max)
+        try:
+            steps = int(raw_steps or '50')
+        except ValueError:
+            raise ValueError(f'Invalid steps: {raw_steps}')
+        if maximum < minimum or not 1 <= steps <= MAX_SWEEP_INVESTMENTS:
+            raise ValueError(f'Expected minInvestment <= maxInvestment and 1 to {MAX_SWEEP_INVESTMENTS} steps')
+        investments = np.round(np.geomspace(minimum, maximum, steps), 2)
+    else:
+        raise ValueError('Investments parameter (or minInvestment and maxInvestment) is required')
+
+    investments = np.unique(investments)
+    if len(investments) > MAX_SWEEP_INVESTMENTS:
+        raise ValueError(f'Too many investment amounts: {len(investments)}. At most {MAX_SWEEP_INVESTMENTS} are allowed')
+    return investments
+
+
+def sweep_returns(investments: np.ndarray, pool_tvl: np.ndarray, total_fees: np.ndarray,
+                  start_prices: np.ndarray, end_prices: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Evaluate calculate_returns over a symbols x periods x investments grid in one pass.
+
+    Args:
+        investments: Investment amounts, shape (I,)
+        pool_tvl: Pool TVL per symbol, shape (S,)
+        total_fees: Pool fees per symbol and period, shape (S, P)
+        start_prices: First close per symbol and period, shape (S, P)
+        end_prices: Last close per symbol and period, shape (S, P)
+
+    Returns:
+        Dict with 'priceChange' (S, P), 'userTVLFraction' (S, I) and
+        'traditionalReturn', 'feesClaimed', 'tokenizedReturn' (S, P, I)
+    """
+    price_change = (end_prices - start_prices) / start_prices
+    fraction = tvl_fraction(investments[None, :], pool_tvl[:, None])
+    traditional = price_change[:, :, None] * investments[None, None, :]
+    fees = total_fees[:, :, None] * fraction[:, None, :]
+    return {
+        'priceChange': price_change,
+        'userTVLFraction': fraction,
+        'traditionalReturn': traditional,
+        'feesClaimed': fees,
+        'tokenizedReturn': traditional + fees
+    }
+
+
+def sweep_records(stocks: List[Dict[str, Any]], periods: List[str], investments: np.ndarray,
+                  grid: Dict[str, np.ndarray], errors: Dict[Tuple[int, int], str]) -> Iterator[Dict[str, Any]]:
+    """
+    Yield the /api/comparison/sweep records: a header with the grid axes, then
+    one record per symbol and period with arrays over the investment amounts.
+
+    Args:
+        stocks: TokenizedStock dictionaries, one per grid row
+        periods: Periods, one per grid column
+        investments: Investment amounts
+        grid: sweep_returns output
+        errors: (row, column) -> error message for cells without prices
+    """
+    yield {
+        'symbols': [map_tokenized_to_traditional(stock['symbol']) for stock in stocks],
+        'periods': periods,
+        'investments': investments.tolist()
+    }
+    for s, stock in enumerate(stocks):
+        symbol = map_tokenized_to_traditional(stock['symbol'])
+        for p, period in enumerate(periods):
+            if (s, p) in errors:
+                yield {'symbol': symbol, 'period': period, 'error': errors[(s, p)]}
+                continue
+            yield {
+                'symbol': symbol,
+                'tokenizedSymbol': stock['symbol'],
+                'period': period,
+                'poolTVL': stock['poolTVL'],
+                'totalFees': fees_for_period(stock, period),
+                'traditionalReturnPercentage': float(grid['priceChange'][s, p]) * 100,
+                'userTVLFraction': grid['userTVLFraction'][s].tolist(),
+                'traditionalReturn': np.round(grid['traditionalReturn'][s, p], 2).tolist(),
+                'feesClaimed': np.round(grid['feesClaimed'][s, p], 2).tolist(),
+                'tokenizedReturn': np.round(grid['tokenizedReturn'][s, p], 2).tolist()
+            }
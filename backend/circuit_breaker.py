@@ -0,0 +1,215 @@
+"""
+Per-provider circuit breakers for upstream data sources.
+Each breaker keeps a rolling window of call outcomes and latencies. When too
+many recent calls fail or run slow the breaker opens and callers skip that
+provider without spending retries on it; after a cool-down a limited number
+of probe calls decide whether it closes again.
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is refused because the provider's breaker is open"""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """Rolling-window circuit breaker for one upstream provider"""
+
+    def __init__(self, name: str, window_seconds: float = 60.0, min_calls: int = 5,
+                 failure_threshold: float = 0.5, slow_call_seconds: float = 8.0,
+                 slow_call_threshold: float = 0.8, open_seconds: float = 30.0,
+                 half_open_probes: int = 1):
+        """
+        Args:
+            name: Provider name, used in errors and stats
+            window_seconds: Age of the oldest outcome kept in the rolling window
+            min_calls: Outcomes required in the window before the breaker may trip
+            failure_threshold: Failure rate (0-1) that opens the breaker
+            slow_call_seconds: Latency above which a successful call counts as slow
+            slow_call_threshold: Slow-call rate (0-1) that opens the breaker
+            open_seconds: Cool-down before an open breaker lets probes through
+            half_open_probes: Concurrent probe calls allowed while half-open
+        """
+        self.name = name
+        self.window_seconds = window_seconds
+        self.min_calls = min_calls
+        self.failure_threshold = failure_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_threshold = slow_call_threshold
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+        # (finished at, succeeded, latency seconds)
+        self._outcomes: Deque[Tuple[float, bool, float]] = deque()
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probes = 0
+        self._lock = threading.Lock()
+        self.times_opened = 0
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._advance(time.monotonic())
+            return self._state
+
+    def _advance(self, now: float) -> None:
+        """Drop outcomes older than the window and move open -> half-open after the cool-down"""
+        cutoff = now - self.window_seconds
+        while self._outcomes and self._outcomes[0][0] < cutoff:
+            self._outcomes.popleft()
+        if self._state == OPEN and now - self._opened_at >= self.open_seconds:
+            self._state = HALF_OPEN
+            self._probes = 0
+
+    def _rates(self) -> Tuple[float, float]:
+        """(failure rate, slow-call rate) over the current window"""
+        total = len(self._outcomes)
+        if total == 0:
+            return 0.0, 0.0
+        failures = sum(1 for _, ok, _ in self._outcomes if not ok)
+        slow = sum(1 for _, ok, latency in self._outcomes if ok and latency >= self.slow_call_seconds)
+        return failures / total, slow / total
+
+    def _trip(self, now: float) -> None:
+        self._state = OPEN
+        self._opened_at = now
+        self._probes = 0
+        self.times_opened += 1
+
+    def allow_request(self) -> bool:
+        """
+        Ask whether a call may go to this provider now.
+
+        A True answer while half-open reserves a probe slot, which must be
+        released through record_success, record_failure or release.
+        """
+        with self._lock:
+            self._advance(time.monotonic())
+            if self._state == CLOSED:
+                return True
+            if self._state == HALF_OPEN and self._probes < self.half_open_probes:
+                self._probes += 1
+                return True
+            self.rejected += 1
+            return False
+
+    def retry_after(self) -> float:
+        """Seconds until an open breaker starts letting probes through"""
+        with self._lock:
+            if self._state != OPEN:
+                return 0.0
+            return max(self._opened_at + self.open_seconds - time.monotonic(), 0.0)
+
+    def record_success(self, latency: float) -> None:
+        """Record a completed call; a successful probe closes the breaker"""
+        now = time.monotonic()
+        with self._lock:
+            self._advance(now)
+            if self._state == HALF_OPEN:
+                self._state = CLOSED
+                self._outcomes.clear()
+            self._outcomes.append((now, True, latency))
+            self._evaluate(now)
+
+    def record_failure(self, latency: float) -> None:
+        """Record a failed call; a failed probe re-opens the breaker"""
+        now = time.monotonic()
+        with self._lock:
+            self._advance(now)
+            self._outcomes.append((now, False, latency))
+            if self._state == HALF_OPEN:
+                self._trip(now)
+            else:
+                self._evaluate(now)
+
+    def release(self) -> None:
+        """Give back a probe slot for a call that was made but says nothing about provider health"""
+        with self._lock:
+            if self._state == HALF_OPEN and self._probes > 0:
+                self._probes -= 1
+
+    def _evaluate(self, now: float) -> None:
+        if self._state != CLOSED or len(self._outcomes) < self.min_calls:
+            return
+        failure_rate, slow_rate = self._rates()
+        if failure_rate >= self.failure_threshold or slow_rate >= self.slow_call_threshold:
+            self._trip(now)
+
+    def health(self) -> Tuple[int, float, float]:
+        """
+        Sort key for routing: lower is healthier.
+
+        Returns:
+            (state rank, failure + slow-call rate, mean latency) over the window
+        """
+        with self._lock:
+            self._advance(time.monotonic())
+            rank = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}[self._state]
+            failure_rate, slow_rate = self._rates()
+            latencies = [latency for _, _, latency in self._outcomes]
+            mean_latency = sum(latencies) / len(latencies) if latencies else 0.0
+            return rank, failure_rate + slow_rate, mean_latency
+
+    def latency_percentile(self, percentile: float, min_samples: int = 5) -> Optional[float]:
+        """
+        Latency of successful calls at the given percentile (0-100) over the window.
+
+        Returns:
+            Seconds, or None while fewer than min_samples successes are in the window
+        """
+        with self._lock:
+            self._advance(time.monotonic())
+            latencies = sorted(latency for _, ok, latency in self._outcomes if ok)
+        if len(latencies) < max(min_samples, 1):
+            return None
+        index = min(int(len(latencies) * percentile / 100.0), len(latencies) - 1)
+        return latencies[index]
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the breaker state and rolling-window figures"""
+        with self._lock:
+            self._advance(time.monotonic())
+            failure_rate, slow_rate = self._rates()
+            latencies = [latency for _, _, latency in self._outcomes]
+            return {
+                'state': self._state,
+                'calls': len(self._outcomes),
+                'failureRate': failure_rate,
+                'slowCallRate': slow_rate,
+                'meanLatency': sum(latencies) / len(latencies) if latencies else 0.0,
+                'timesOpened': self.times_opened,
+                'rejected': self.rejected
+            }
+
+
+def rank_providers(providers: List[Tuple[str, Any]], breakers: Dict[str, CircuitBreaker]) -> List[Tuple[str, Any]]:
+    """
+    Order providers healthiest first.
+
+    Closed breakers come before half-open and open ones; among those, the
+    lower recent failure and slow-call rate wins, and the configured order
+    breaks ties so a healthy primary keeps its traffic.
+
+    Args:
+        providers: (name, provider) pairs in configured preference order
+        breakers: Breaker for each provider name
+    """
+    def key(item: Tuple[int, Tuple[str, Any]]) -> Tuple[int, float, int]:
+        index, (name, _) = item
+        rank, score, _ = breakers[name].health()
+        return rank, round(score, 1), index
+
+    return [provider for _, provider in sorted(enumerate(providers), key=key)]
@@ -0,0 +1,103 @@
+"""
+Shape-preserving downsampling of price series for charting.
+Implements Largest-Triangle-Three-Buckets (Steinarsson, 2013): the first
+and last points are kept, the rest are split into equal buckets, and from
+each bucket the point forming the largest triangle with the point kept from
+the previous bucket and the average of the next bucket is selected.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Whole-array refinement passes tried before finishing bucket by bucket
+MAX_PASSES = 16
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, max_points: int) -> np.ndarray:
+    """
+    Indices of the points LTTB keeps.
+
+    Each bucket's choice depends on the previous bucket's, so the selection is
+    refined in whole-array passes: every pass recomputes all buckets at once
+    from the previous pass's choices. After k passes the first k buckets are
+    final, and a pass that changes nothing is exactly the LTTB result, which
+    on real price series takes a handful of passes.
+
+    Args:
+        x: Strictly increasing x values (e.g. epoch nanoseconds)
+        y: Values
+        max_points: Number of points to keep (at least 3)
+
+    Returns:
+        Sorted indices into x and y
+    """
+    n = len(x)
+    if max_points >= n or max_points < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype='float64')
+    y = np.asarray(y, dtype='float64')
+    buckets = max_points - 2
+    # Bucket b covers [edges[b], edges[b + 1]); the final edge range [n - 1, n) is the last point.
+    # Integer division keeps the edges exact (floor(b * (n - 2) / buckets) in floats can fall short)
+    edges = np.append(np.arange(buckets + 1, dtype='int64') * (n - 2) // buckets + 1, n)
+    sizes = np.diff(edges)
+    bucket_of = np.repeat(np.arange(buckets + 1), sizes)[:n - 2]
+    inner = slice(1, n - 1)
+
+    # Average of the bucket after each bucket (the last point for the final bucket)
+    next_x = (np.add.reduceat(x[1:], edges[:-1] - 1) / sizes)[1:]
+    next_y = (np.add.reduceat(y[1:], edges[:-1] - 1) / sizes)[1:]
+    cx, cy = next_x[bucket_of], next_y[bucket_of]
+    px, py = x[inner], y[inner]
+
+    def select(previous: np.ndarray) -> np.ndarray:
+        """Pick each bucket's point given the point kept in the bucket before it"""
+        ax, ay = x[previous][bucket_of], y[previous][bucket_of]
+        area = np.abs((ax - cx) * (py - ay) - (ax - px) * (cy - ay))
+        # First point with the bucket's largest area, as in the sequential algorithm
+        best = np.maximum.reduceat(area, edges[:-2] - 1)
+        is_best = area == best[bucket_of]
+        candidates = np.flatnonzero(is_best)
+        _, first = np.unique(bucket_of[candidates], return_index=True)
+        return candidates[first] + 1
+
+    # Start from each bucket's first point as the previous choice
+    chosen = edges[:-2].copy()
+    for _ in range(MAX_PASSES):
+        previous = np.concatenate(([0], chosen[:-1]))
+        updated = select(previous)
+        if np.array_equal(updated, chosen):
+            break
+        chosen = updated
+    else:
+        chosen = _finish_sequentially(x, y, edges, next_x, next_y, chosen)
+
+    return np.concatenate(([0], chosen, [n - 1]))
+
+
+def _finish_sequentially(x: np.ndarray, y: np.ndarray, edges: np.ndarray,
+                         next_x: np.ndarray, next_y: np.ndarray, chosen: np.ndarray) -> np.ndarray:
+    """Classic bucket-by-bucket LTTB, for the rare series the passes do not settle on"""
+    chosen = chosen.copy()
+    previous = 0
+    for b in range(len(chosen)):
+        start, end = edges[b], edges[b + 1]
+        ax, ay = x[previous], y[previous]
+        area = np.abs((ax - next_x[b]) * (y[start:end] - ay) - (ax - x[start:end]) * (next_y[b] - ay))
+        previous = chosen[b] = start + int(np.argmax(area))
+    return chosen
+
+
+def downsample_frame(df: pd.DataFrame, max_points: int, column: str = 'Close') -> pd.DataFrame:
+    """
+    Downsample a date-indexed frame to at most max_points rows with LTTB on column.
+
+    Returns:
+        The selected rows (df itself if it is already small enough)
+    """
+    if len(df) <= max_points:
+        return df
+    x = df.index.asi8.astype('float64')
+    y = df[column].to_numpy(dtype='float64')
+    return df.iloc[lttb_indices(x, y, max_points)]
@@ -0,0 +1,147 @@
+"""
+Shared keep-alive HTTP sessions for upstream data sources.
+Each upstream host gets its own requests.Session with a bounded urllib3
+connection pool, so repeated calls reuse TCP/TLS connections instead of
+performing a fresh handshake every time.
+"""
+
+import os
+import threading
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Max keep-alive connections kept per upstream host
+DEFAULT_POOL_SIZES = {
+    'query1.finance.yahoo.com': 20,
+    'www.alphavantage.co': 4,
+    'stake.vaulto.ai': 4,
+}
+DEFAULT_POOL_SIZE = 10
+
+
+def parse_pool_sizes(spec: str) -> Dict[str, int]:
+    """
+    Parse a pool size specification.
+
+    Args:
+        spec: Comma-separated host=size pairs (e.g. "query1.finance.yahoo.com=32,www.alphavantage.co=2")
+
+    Returns:
+        Dict mapping host to pool size
+    """
+    sizes = {}
+    for item in spec.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        host, _, size = item.partition('=')
+        if not host or not size:
+            raise ValueError(f"Invalid pool size entry: {item!r}. Expected host=size")
+        sizes[host.strip().lower()] = int(size)
+    return sizes
+
+
+class SessionPool:
+    """Thread-safe registry of per-host pooled sessions"""
+
+    def __init__(self, pool_sizes: Optional[Dict[str, int]] = None, default_pool_size: int = DEFAULT_POOL_SIZE):
+        self.pool_sizes = dict(DEFAULT_POOL_SIZES, **(pool_sizes or {}))
+        self.default_pool_size = default_pool_size
+        self._sessions: Dict[str, requests.Session] = {}
+        self._adapters: Dict[str, HTTPAdapter] = {}
+        self._counters: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> 'SessionPool':
+        """Build a pool configured from UPSTREAM_POOL_SIZES and UPSTREAM_POOL_DEFAULT_SIZE"""
+        return cls(
+            pool_sizes=parse_pool_sizes(os.getenv('UPSTREAM_POOL_SIZES', '')),
+            default_pool_size=int(os.getenv('UPSTREAM_POOL_DEFAULT_SIZE', str(DEFAULT_POOL_SIZE)))
+        )
+
+    def session_for(self, url: str) -> requests.Session:
+        """Return the shared session for the host of url, creating it on first use"""
+        host = (urlsplit(url).hostname or '').lower()
+        with self._lock:
+            session = self._sessions.get(host)
+            if session is None:
+                size = self.pool_sizes.get(host, self.default_pool_size)
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=size, pool_block=False)
+                session = requests.Session()
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                self._sessions[host] = session
+                self._adapters[host] = adapter
+                self._counters[host] = {'requests': 0, 'errors': 0}
+            return session
+
+    def request(self, method: str, url: str, **kwargs: Any) -> requests.Response:
+        """Send a request through the pooled session for the url's host"""
+        session = self.session_for(url)
+        host = (urlsplit(url).hostname or '').lower()
+        try:
+            response = session.request(method, url, **kwargs)
+        except requests.RequestException:
+            self._count(host, 'errors')
+            raise
+        self._count(host, 'requests')
+        return response
+
+    def get(self, url: str, **kwargs: Any) -> requests.Response:
+        """Send a GET request through the pooled session for the url's host"""
+        return self.request('GET', url, **kwargs)
+
+    def _count(self, host: str, name: str) -> None:
+        with self._lock:
+            self._counters[host][name] += 1
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Return per-host request counts and connection pool usage"""
+        with self._lock:
+            stats = {}
+            for host, adapter in self._adapters.items():
+                opened = 0
+                idle = 0
+                pools = adapter.poolmanager.pools
+                for key in pools.keys():
+                    pool = pools.get(key)
+                    if pool is None:
+                        continue
+                    opened += pool.num_connections
+                    # The pool queue is pre-filled with None placeholders for unopened slots
+                    if pool.pool is not None:
+                        idle += sum(1 for conn in list(pool.pool.queue) if conn is not None)
+                stats[host] = {
+                    'poolSize': self.pool_sizes.get(host, self.default_pool_size),
+                    'requests': self._counters[host]['requests'],
+                    'errors': self._counters[host]['errors'],
+                    'connectionsOpened': opened,
+                    'idleConnections': idle,
+                }
+            return stats
+
+    def close(self) -> None:
+        """Close every session and drop its pooled connections"""
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+            self._adapters.clear()
+            self._counters.clear()
+
+
+_default_pool: Optional[SessionPool] = None
+_default_pool_lock = threading.Lock()
+
+
+def get_session_pool() -> SessionPool:
+    """Return the process-wide session pool"""
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None:
+            _default_pool = SessionPool.from_env()
+        return _default_pool
@@ -0,0 +1,220 @@
+"""
+Incremental parsing for large upstream JSON bodies.
+An Alpha Vantage 'full' series is 20+ years of daily bars inside a single
+top-level object. StreamingObjectParser is fed the body chunk by chunk as
+it arrives and hands out the members of that series object one at a time,
+so neither the whole body nor its fully decoded dict has to be held in
+memory at once. The other (small) top-level members are decoded normally.
+Keys of the streamed object are assumed to be unique.
+"""
+
+import codecs
+import json
+import re
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+# Characters that could continue a number cut off at a chunk boundary (e.g. '12' + '.5')
+_NUMBER_TAIL = re.compile(r'[0-9.eE+\-]*')
+
+
+class StreamingObjectParser:
+    """Push parser for a top-level JSON object with one member streamed item by item"""
+
+    def __init__(self, is_stream_key: Callable[[str], bool]):
+        """
+        Args:
+            is_stream_key: Picks the top-level key whose object value is streamed;
+                every other top-level member is decoded into header
+        """
+        self.is_stream_key = is_stream_key
+        self.header: Dict[str, Any] = {}
+        # Set once the streamed member starts
+        self.stream_key: Optional[str] = None
+        self._decoder = json.JSONDecoder()
+        self._text = codecs.getincrementaldecoder('utf-8')()
+        self._buf = ''
+        self._pos = 0
+        self._state = 'start'
+        self._key: Optional[str] = None
+        self._final = False
+
+    @property
+    def done(self) -> bool:
+        """Whether the closing brace of the top-level object has been read"""
+        return self._state == 'done'
+
+    def feed(self, chunk: bytes) -> List[Tuple[str, Any]]:
+        """
+        Parse the next chunk of the body.
+
+        Returns:
+            (key, value) members of the streamed object completed by this chunk
+        """
+        self._buf = self._buf[self._pos:] + self._text.decode(chunk, final=self._final)
+        self._pos = 0
+        items: List[Tuple[str, Any]] = []
+        while self._step(items):
+            pass
+        return items
+
+    def close(self) -> List[Tuple[str, Any]]:
+        """
+        Parse whatever is left once the body has ended.
+
+        Raises:
+            ValueError: If the body was not one complete JSON object
+        """
+        self._final = True
+        items = self.feed(b'')
+        if not self.done:
+            raise ValueError(f"Truncated or invalid JSON object (stopped in state '{self._state}' at {self._buf[:40]!r})")
+        return items
+
+    def _peek(self) -> Optional[str]:
+        """Skip whitespace and return the next character, or None if more input is needed"""
+        self._pos = _WHITESPACE.match(self._buf, self._pos).end()
+        return self._buf[self._pos] if self._pos < len(self._buf) else None
+
+    def _expect(self, char: str) -> bool:
+        next_char = self._peek()
+        if next_char is None:
+            return False
+        if next_char != char:
+            raise ValueError(f"Expected {char!r} at {self._buf[self._pos:self._pos + 40]!r}")
+        self._pos += 1
+        return True
+
+    def _decode(self) -> Tuple[bool, Any]:
+        """Decode the value at the cursor; (False, None) if it is not complete yet"""
+        if self._peek() is None:
+            return False, None
+        try:
+            value, end = self._decoder.raw_decode(self._buf, self._pos)
+        except json.JSONDecodeError:
+            if self._final:
+                raise
+            return False, None
+        # A number or literal running to the end of the buffer may continue in the next chunk
+        if (not self._final and not isinstance(value, (dict, list, str))
+                and _NUMBER_TAIL.match(self._buf, end).end() == len(self._buf)):
+            return False, None
+        self._pos = end
+        return True, value
+
+    def _decode_batch(self, items: List[Tuple[str, Any]]) -> bool:
+        """
+        Decode all complete items buffered so far with a single json.loads call,
+        which is several times faster than stepping through them one by one.
+        The cut is made at the last '},' in the buffer; if that is not an item
+        boundary (it falls inside a nested value or string), the slice is not
+        valid JSON and the caller falls back to item-by-item parsing.
+        """
+        cut = self._buf.rfind('},', self._pos)
+        if cut < 0:
+            return False
+        try:
+            batch = json.loads('{' + self._buf[self._pos:cut + 1] + '}')
+        except json.JSONDecodeError:
+            return False
+        items.extend(batch.items())
+        self._pos = cut + 2
+        return True
+
+    def _step(self, items: List[Tuple[str, Any]]) -> bool:
+        """Advance one token; False when more input is needed (or the object is complete)"""
+        state = self._state
+        if state == 'done':
+            return False
+
+        if state == 'start':
+            if not self._expect('{'):
+                return False
+            self._state = 'key'
+        elif state in ('key', 'item_key'):
+            if state == 'item_key' and self._decode_batch(items):
+                return True
+            next_char = self._peek()
+            if next_char is None:
+                return False
+            if next_char == '}':
+                self._pos += 1
+                self._state = 'done' if state == 'key' else 'separator'
+                return True
+            complete, key = self._decode()
+            if not complete:
+                return False
+            if not isinstance(key, str):
+                raise ValueError(f"Expected an object key, got {key!r}")
+            self._key = key
+            self._state = 'colon' if state == 'key' else 'item_colon'
+        elif state in ('colon', 'item_colon'):
+            if not self._expect(':'):
+                return False
+            self._state = 'value' if state == 'colon' else 'item_value'
+        elif state == 'value':
+            next_char = self._peek()
+            if next_char is None:
+                return False
+            if next_char == '{' and self.stream_key is None and self.is_stream_key(self._key):
+                self._pos += 1
+                self.stream_key = self._key
+                self._state = 'item_key'
+                return True
+            complete, value = self._decode()
+            if not complete:
+                return False
+            self.header[self._key] = value
+            self._state = 'separator'
+        elif state == 'item_value':
+            complete, value = self._decode()
+            if not complete:
+                return False
+            items.append((self._key, value))
+            self._state = 'item_separator'
+        elif state in ('separator', 'item_separator'):
+            next_char = self._peek()
+            if next_char is None:
+                return False
+            self._pos += 1
+            if next_char == ',':
+                self._state = 'key' if state == 'separator' else 'item_key'
+            elif next_char == '}':
+                self._state = 'done' if state == 'separator' else 'separator'
+            else:
+                raise ValueError(f"Expected ',' or '}}' at {self._buf[self._pos - 1:self._pos + 40]!r}")
+        return True
+
+
+def stream_object(chunks: Iterable[bytes],
+                  is_stream_key: Callable[[str], bool]) -> Tuple[StreamingObjectParser, Iterator[Tuple[str, Any]]]:
+    """
+    Start parsing a chunked JSON object, reading just far enough to fill in
+    the header members that precede the streamed member.
+
+    Args:
+        chunks: Body chunks, e.g. response.iter_content(...)
+        is_stream_key: See StreamingObjectParser
+
+    Returns:
+        (parser, iterator over the streamed member's (key, value) items). Consume
+        the iterator to the end to read the rest of the body.
+    """
+    parser = StreamingObjectParser(is_stream_key)
+    chunks = iter(chunks)
+    pending: List[Tuple[str, Any]] = []
+    for chunk in chunks:
+        pending.extend(parser.feed(chunk))
+        if parser.stream_key is not None or parser.done:
+            break
+    else:
+        pending.extend(parser.close())
+        return parser, iter(pending)
+
+    def items() -> Iterator[Tuple[str, Any]]:
+        yield from pending
+        for chunk in chunks:
+            yield from parser.feed(chunk)
+        yield from parser.close()
+
+    return parser, items()
@@ -0,0 +1,219 @@
+"""
+Minimal Prometheus-style metrics: counters and histograms updated on the
+hot path under a single short lock, plus callback metrics that read
+existing stats (cache hit counts, breaker state) only when scraped.
+Rendered in the Prometheus text exposition format by /api/metrics.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Tuple
+
+# Seconds; covers cache hits (sub-millisecond) through slow upstream retries
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 25.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _number(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Counter:
+    """Monotonic counter keyed by label values"""
+
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = labelnames
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, *labels: str) -> float:
+        with self._lock:
+            return self._values.get(labels, 0.0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} counter']
+        lines.extend(f'{self.name}{_labels(self.labelnames, labels)} {_number(value)}' for labels, value in values)
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram keyed by label values"""
+
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = labelnames
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts (last is +Inf), sum]
+        self._series: Dict[Tuple[str, ...], List[Any]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def count(self, *labels: str) -> int:
+        with self._lock:
+            series = self._series.get(labels)
+            return sum(series[0]) if series else 0
+
+    def render(self) -> List[str]:
+        with self._lock:
+            snapshot = sorted((labels, list(counts), total) for labels, (counts, total) in self._series.items())
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        for labels, counts, total in snapshot:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = f'le="{_number(bound)}"'
+                lines.append(f'{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}')
+            lines.append(f'{self.name}_sum{_labels(self.labelnames, labels)} {_number(total)}')
+            lines.append(f'{self.name}_count{_labels(self.labelnames, labels)} {cumulative}')
+        return lines
+
+
+class CallbackMetric:
+    """Metric whose samples are read from existing stats when scraped"""
+
+    def __init__(self, name: str, metric_type: str, help_text: str, labelnames: Tuple[str, ...],
+                 collect: Callable[[], Dict[Tuple[str, ...], float]]):
+        """
+        Args:
+            name: Metric name
+            metric_type: 'counter' or 'gauge'
+            help_text: HELP line text
+            labelnames: Label names, in the order of each sample's label values
+            collect: Returns {label values: value} at scrape time
+        """
+        self.name = name
+        self.metric_type = metric_type
+        self.help_text = help_text
+        self.labelnames = labelnames
+        self.collect = collect
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} {self.metric_type}']
+        for labels, value in sorted(self.collect().items()):
+            if value is None:
+                continue
+            lines.append(f'{self.name}{_labels(self.labelnames, labels)} {_number(value)}')
+        return lines
+
+
+# Serving
+HTTP_REQUESTS = Counter('http_requests_total', 'HTTP requests served', ('route', 'method', 'status'))
+HTTP_LATENCY = Histogram('http_request_duration_seconds', 'HTTP request latency by route', ('route',))
+
+# Upstream calls (one observation per attempt)
+UPSTREAM_REQUESTS = Counter('upstream_requests_total', 'Upstream call attempts by provider and outcome',
+                            ('provider', 'outcome'))
+UPSTREAM_LATENCY = Histogram('upstream_request_duration_seconds', 'Upstream call attempt latency by provider',
+                             ('provider',))
+UPSTREAM_RETRIES = Counter('upstream_retries_total', 'Upstream call retries by provider', ('provider',))
+
+METRICS = [HTTP_REQUESTS, HTTP_LATENCY, UPSTREAM_REQUESTS, UPSTREAM_LATENCY, UPSTREAM_RETRIES]
+
+
+def observe_request(route: str, method: str, status: int, seconds: float) -> None:
+    """Record one served HTTP request"""
+    HTTP_REQUESTS.inc(route, method, str(status))
+    HTTP_LATENCY.observe(seconds, route)
+
+
+@contextmanager
+def track_upstream(provider: str) -> Iterator[None]:
+    """Time one upstream call attempt and count it as ok or error"""
+    started = time.perf_counter()
+    outcome = 'error'
+    try:
+        yield
+        outcome = 'ok'
+    finally:
+        UPSTREAM_LATENCY.observe(time.perf_counter() - started, provider)
+        UPSTREAM_REQUESTS.inc(provider, outcome)
+
+
+def cache_metrics(caches: Callable[[], Dict[str, Dict[str, Any]]]) -> List[CallbackMetric]:
+    """
+    Callback metrics for TTLCache-style stats.
+
+    Args:
+        caches: Returns {cache name: cache.stats()} at scrape time
+    """
+    def field(key: str) -> Callable[[], Dict[Tuple[str, ...], float]]:
+        return lambda: {(name,): stats[key] for name, stats in caches().items()}
+
+    return [
+        CallbackMetric('cache_hits_total', 'counter', 'Cache hits', ('cache',), field('hits')),
+        CallbackMetric('cache_misses_total', 'counter', 'Cache misses', ('cache',), field('misses')),
+        CallbackMetric('cache_hit_ratio', 'gauge', 'Cache hits / lookups since start', ('cache',), field('hitRatio')),
+        CallbackMetric('cache_entries', 'gauge', 'Entries currently cached', ('cache',), field('size')),
+    ]
+
+
+def render(extra: Iterable[Any] = ()) -> str:
+    """Render all process metrics plus any callback metrics in Prometheus text format"""
+    lines: List[str] = []
+    for metric in list(METRICS) + list(extra):
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+
+def provider_metrics(stock_provider: Any, vaulto_refresher: Any, quota: Any) -> List[CallbackMetric]:
+    """
+    Callback metrics for the serving stack's in-process state.
+
+    Args:
+        stock_provider: StockDataProvider (or its async counterpart)
+        vaulto_refresher: VaultoRefresher holding the pool snapshot
+        quota: Alpha Vantage QuotaScheduler
+    """
+    state_values = {'closed': 0, 'half_open': 1, 'open': 2}
+
+    def breaker_states() -> Dict[Tuple[str, ...], float]:
+        return {(name,): state_values[stats['state']] for name, stats in stock_provider.breaker_stats().items()}
+
+    def vaulto_age() -> Dict[Tuple[str, ...], float]:
+        return {(): vaulto_refresher.current()['age']}
+
+    def quota_remaining() -> Dict[Tuple[str, ...], float]:
+        budget = quota.budget()
+        return {('minute',): budget['minuteRemaining'], ('day',): budget['dayRemaining']}
+
+    return cache_metrics(lambda: {'stock': stock_provider.cache.stats()}) + [
+        CallbackMetric('provider_circuit_state', 'gauge', 'Circuit breaker state (0 closed, 1 half-open, 2 open)',
+                       ('provider',), breaker_states),
+        CallbackMetric('vaulto_snapshot_age_seconds', 'gauge', 'Age of the Vaulto pool snapshot', (), vaulto_age),
+        CallbackMetric('alpha_vantage_quota_remaining', 'gauge', 'Alpha Vantage calls left in the window',
+                       ('window',), quota_remaining),
+    ]
@@ -0,0 +1,230 @@
+"""
+Memory-mapped archive of long daily price histories.
+Each symbol's series is one file in the uncompressed price_codec layout
+(timestamps array then closes array), listed in a JSON symbol index. Reads
+map the file once and slice it with a binary search, so serving a period is
+a pair of array views rather than a parse and filter. The archive is built
+and refreshed offline (see main()), e.g. from Alpha Vantage 'full' series:
+
+    python price_archive.py data/archive NVDA AAPL TSLA
+"""
+
+import json
+import mmap
+import os
+import re
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from price_codec import decode_series, encode_series, from_epoch_seconds, to_epoch_seconds
+
+_SYMBOL = re.compile(r'^[A-Z0-9.^=\-]{1,20}$')
+
+# Longest quota wait main() sleeps through before giving up on a symbol
+MAX_QUOTA_WAIT = 120.0
+
+
+class PriceArchive:
+    """Directory of memory-mapped per-symbol daily series with a JSON index"""
+
+    INDEX_FILE = 'index.json'
+
+    def __init__(self, root: str):
+        os.makedirs(root, exist_ok=True)
+        self.root = root
+        self._index: Dict[str, Dict[str, Any]] = {}
+        self._index_mtime: Optional[int] = None
+        # symbol -> (updatedAt of the mapped file, timestamps, closes)
+        self._maps: Dict[str, Tuple[float, np.ndarray, np.ndarray]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.root, name)
+
+    @staticmethod
+    def _check_symbol(symbol: str) -> str:
+        symbol = symbol.upper()
+        if not _SYMBOL.match(symbol):
+            raise ValueError(f"Invalid symbol for the price archive: {symbol}")
+        return symbol
+
+    def _load_index(self) -> None:
+        """Re-read the index if another process (e.g. the builder) replaced it"""
+        try:
+            mtime = os.stat(self._path(self.INDEX_FILE)).st_mtime_ns
+        except FileNotFoundError:
+            self._index, self._index_mtime = {}, None
+            return
+        if mtime != self._index_mtime:
+            with open(self._path(self.INDEX_FILE), 'r') as f:
+                self._index = json.load(f)
+            self._index_mtime = mtime
+
+    def entry(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """
+        Index entry for a symbol.
+
+        Returns:
+            Dict with 'file', 'rows', 'startTs', 'endTs' and 'updatedAt' (epoch
+            seconds), or None if the symbol is not archived
+        """
+        symbol = self._check_symbol(symbol)
+        with self._lock:
+            self._load_index()
+            entry = self._index.get(symbol)
+            return dict(entry) if entry is not None else None
+
+    def series(self, symbol: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Memory-mapped (timestamps, closes) arrays for a symbol.
+
+        The arrays are read-only views over the file and stay valid after the
+        file is replaced; the next call then maps the new file.
+
+        Returns:
+            (int64 epoch seconds, float64 closes), or None if not archived
+        """
+        symbol = self._check_symbol(symbol)
+        with self._lock:
+            self._load_index()
+            entry = self._index.get(symbol)
+            if entry is None:
+                self._maps.pop(symbol, None)
+                return None
+            mapped = self._maps.get(symbol)
+            if mapped is not None and mapped[0] == entry['updatedAt']:
+                return mapped[1], mapped[2]
+
+            with open(self._path(entry['file']), 'rb') as f:
+                # The arrays hold a reference to the map, which keeps it open
+                ts, closes = decode_series(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+            self._maps[symbol] = (entry['updatedAt'], ts, closes)
+            return ts, closes
+
+    def read(self, symbol: str, start_ts: int, end_ts: Optional[int] = None) -> Optional[pd.DataFrame]:
+        """
+        Bars in [start_ts, end_ts] as a Close frame over the mapped arrays (read-only, no copy).
+
+        Args:
+            symbol: Ticker symbol
+            start_ts: Inclusive lower bound (naive epoch seconds, as in price_store)
+            end_ts: Inclusive upper bound, or None for no bound
+
+        Returns:
+            DataFrame indexed by Date, or None if the symbol is not archived
+        """
+        arrays = self.series(symbol)
+        with self._lock:
+            if arrays is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        ts, closes = arrays
+        start = np.searchsorted(ts, start_ts, side='left')
+        end = len(ts) if end_ts is None else np.searchsorted(ts, end_ts, side='right')
+        return pd.DataFrame({'Close': closes[start:end]}, index=from_epoch_seconds(ts[start:end]), copy=False)
+
+    def write(self, symbol: str, df: pd.DataFrame) -> None:
+        """
+        Replace a symbol's archived series with df (a Close frame indexed by date).
+
+        The file and then the index are replaced atomically, so readers in
+        other processes see either the old or the new series.
+        """
+        symbol = self._check_symbol(symbol)
+        df = df.sort_index()
+        df = df[~df.index.duplicated(keep='last')]
+        ts = to_epoch_seconds(df.index)
+        if len(ts) == 0:
+            raise ValueError(f"No bars to archive for {symbol}")
+        name = f'{symbol}.pxa'
+        self._replace(name, encode_series(ts, df['Close'].to_numpy(dtype='float64')))
+
+        with self._lock:
+            self._load_index()
+            index = dict(self._index)
+            index[symbol] = {
+                'file': name,
+                'rows': int(len(ts)),
+                'startTs': int(ts[0]),
+                'endTs': int(ts[-1]),
+                'updatedAt': time.time()
+            }
+            self._replace(self.INDEX_FILE, json.dumps(index, indent=1, sort_keys=True).encode('utf-8'))
+            self._index, self._index_mtime = index, os.stat(self._path(self.INDEX_FILE)).st_mtime_ns
+
+    def _replace(self, name: str, data: bytes) -> None:
+        tmp = self._path(f'.{name}.{os.getpid()}.tmp')
+        with open(tmp, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, self._path(name))
+
+    def symbols(self) -> List[str]:
+        """Archived symbols, sorted"""
+        with self._lock:
+            self._load_index()
+            return sorted(self._index)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the number of archived symbols and bars, mapped symbols and hit counters"""
+        with self._lock:
+            self._load_index()
+            return {
+                'root': self.root,
+                'symbols': len(self._index),
+                'bars': sum(entry['rows'] for entry in self._index.values()),
+                'mapped': len(self._maps),
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+
+def main(argv: List[str]) -> int:
+    """Fetch each symbol's full daily history and write it to the archive"""
+    if len(argv) < 2:
+        print("Usage: python price_archive.py ARCHIVE_DIR SYMBOL [SYMBOL ...]")
+        return 2
+
+    from datetime import datetime, timedelta
+    from rate_limiter import RateLimitExceeded
+    from stock_data_provider import AlphaVantageProvider, YahooFinanceDirectProvider
+
+    archive = PriceArchive(argv[0])
+    api_key = os.getenv('ALPHA_VANTAGE_API_KEY')
+    alpha_vantage = AlphaVantageProvider(api_key, priority='background') if api_key else None
+    failures = 0
+    for symbol in argv[1:]:
+        while True:
+            try:
+                if alpha_vantage is not None:
+                    df = alpha_vantage.series(symbol, 'full')
+                else:
+                    now = datetime.now()
+                    df = YahooFinanceDirectProvider().fetch_range(symbol, now - timedelta(days=365 * 20), now)
+                archive.write(symbol, df)
+                print(f"Archived {len(df)} bars for {symbol.upper()}")
+            except RateLimitExceeded as e:
+                # Background calls never wait for quota, so pace the run here;
+                # the daily cap is not worth waiting out
+                if e.retry_after <= MAX_QUOTA_WAIT:
+                    print(f"Quota reached, retrying {symbol.upper()} in {e.retry_after:.0f}s")
+                    time.sleep(e.retry_after)
+                    continue
+                failures += 1
+                print(f"Failed to archive {symbol}: {e}")
+            except Exception as e:
+                failures += 1
+                print(f"Failed to archive {symbol}: {e}")
+            break
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
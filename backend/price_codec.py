@@ -0,0 +1,117 @@
+"""
+Compact binary encoding of price series.
+A series is a header followed by its int64 epoch-second timestamps and its
+float64 (or float32) closes as raw little-endian arrays, so decoding an
+uncompressed series is just a view over the buffer. Timestamps can be
+delta-encoded (bar spacing is nearly constant, so the deltas fit in int32
+and compress well) and the payload can be zlib-compressed, both at the cost
+of one decoding pass.
+"""
+
+import struct
+import zlib
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+
+# Magic, flags, row count and first timestamp (the base for delta-encoded timestamps),
+# padded to 24 bytes so the arrays after it stay 8-byte aligned (e.g. in a memory map)
+_HEADER = struct.Struct('<4sBxxxI4xq')
+_MAGIC = b'PXC1'
+
+FLAG_FLOAT32 = 1
+FLAG_DELTA = 2
+FLAG_DELTA32 = 4
+FLAG_ZLIB = 8
+
+
+def to_epoch_seconds(index: pd.DatetimeIndex) -> np.ndarray:
+    """Convert a DatetimeIndex to int64 seconds of its wall-clock time read as UTC"""
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    return index.values.astype('datetime64[s]').astype('int64')
+
+
+def from_epoch_seconds(ts: np.ndarray) -> pd.DatetimeIndex:
+    """Inverse of to_epoch_seconds (a view over ts, no conversion pass)"""
+    return pd.DatetimeIndex(np.asarray(ts, dtype='int64').view('datetime64[s]'), copy=False, name='Date')
+
+
+def encode_series(ts: np.ndarray, closes: np.ndarray, float32: bool = False,
+                  delta: bool = False, compress: bool = False, level: int = 1) -> bytes:
+    """
+    Encode a price series.
+
+    Args:
+        ts: Epoch seconds, int64
+        closes: Close prices, same length as ts
+        float32: Store closes as float32 (about 7 significant digits)
+        delta: Store timestamps as differences from the previous one
+        compress: zlib-compress the arrays
+        level: zlib compression level
+
+    Returns:
+        Encoded bytes
+    """
+    ts = np.asarray(ts, dtype='<i8')
+    closes = np.asarray(closes, dtype='<f4' if float32 else '<f8')
+    if len(ts) != len(closes):
+        raise ValueError(f"Got {len(ts)} timestamps but {len(closes)} closes")
+
+    flags = FLAG_FLOAT32 if float32 else 0
+    base = int(ts[0]) if len(ts) else 0
+    if delta:
+        flags |= FLAG_DELTA
+        ts = np.diff(ts, prepend=base)
+        if len(ts) and np.abs(ts).max() < 2 ** 31:
+            flags |= FLAG_DELTA32
+            ts = ts.astype('<i4')
+    payload = ts.tobytes() + closes.tobytes()
+    if compress:
+        flags |= FLAG_ZLIB
+        payload = zlib.compress(payload, level)
+    return _HEADER.pack(_MAGIC, flags, len(closes), base) + payload
+
+
+def decode_series(data: bytes) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Decode encode_series output.
+
+    Uncompressed closes (and timestamps, unless delta-encoded) are read-only
+    views over data rather than copies.
+
+    Returns:
+        (int64 epoch seconds, float64 or float32 closes)
+    """
+    magic, flags, rows, base = _HEADER.unpack_from(data)
+    if magic != _MAGIC:
+        raise ValueError(f"Not an encoded price series (magic {magic!r})")
+    payload, offset = data, _HEADER.size
+    if flags & FLAG_ZLIB:
+        payload, offset = zlib.decompress(memoryview(data)[_HEADER.size:]), 0
+
+    ts_dtype = '<i4' if flags & FLAG_DELTA32 else '<i8'
+    ts = np.frombuffer(payload, dtype=ts_dtype, count=rows, offset=offset)
+    closes = np.frombuffer(payload, dtype='<f4' if flags & FLAG_FLOAT32 else '<f8',
+                           count=rows, offset=offset + ts.nbytes)
+    if flags & FLAG_DELTA:
+        ts = base + np.cumsum(ts, dtype='int64')
+    return ts, closes
+
+
+def encode_frame(df: pd.DataFrame, **options) -> bytes:
+    """Encode a date-indexed Close frame (options as for encode_series)"""
+    return encode_series(to_epoch_seconds(df.index), df['Close'].to_numpy(), **options)
+
+
+def decode_frame(data: bytes) -> pd.DataFrame:
+    """
+    Decode encode_frame output into a Close frame indexed by Date.
+
+    The frame's arrays share data's memory where possible and are read-only,
+    so the encoded bytes can be cached and decoded for every caller without
+    one caller's frame affecting another's.
+    """
+    ts, closes = decode_series(data)
+    return pd.DataFrame({'Close': closes}, index=from_epoch_seconds(ts), copy=False)
@@ -0,0 +1,175 @@
+"""
+Persistent on-disk store for historical price bars.
+Bars are kept in a local SQLite database together with the time range each
+symbol has been fetched for, so that repeat requests only need to download
+the missing tail from upstream. Each (symbol, interval) series is stored as
+a single price_codec blob rather than a row per bar.
+"""
+
+import calendar
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from price_codec import decode_series, encode_series, from_epoch_seconds, to_epoch_seconds
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS series (
+    symbol TEXT NOT NULL,
+    interval TEXT NOT NULL,
+    rows INTEGER NOT NULL,
+    last_ts INTEGER NOT NULL,
+    data BLOB NOT NULL,
+    PRIMARY KEY (symbol, interval)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS coverage (
+    symbol TEXT NOT NULL,
+    interval TEXT NOT NULL,
+    start_ts INTEGER NOT NULL,
+    end_ts INTEGER NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (symbol, interval)
+);
+"""
+
+# Series change rarely and are read whole, so they are stored compressed
+STORE_CODEC = {'delta': True, 'compress': True}
+
+
+def naive_epoch(dt: datetime) -> int:
+    """Scalar counterpart of to_epoch_seconds for a naive datetime"""
+    return calendar.timegm(dt.timetuple())
+
+
+def from_naive_epoch(ts: int) -> datetime:
+    """Inverse of naive_epoch"""
+    return datetime(1970, 1, 1) + timedelta(seconds=ts)
+
+
+class PriceStore:
+    """SQLite-backed store of Close bars per (symbol, interval)"""
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    def _get_series(self, symbol: str, interval: str) -> Tuple[np.ndarray, np.ndarray]:
+        row = self._conn.execute(
+            "SELECT data FROM series WHERE symbol = ? AND interval = ?", (symbol, interval)
+        ).fetchone()
+        if row is None:
+            return np.empty(0, dtype='int64'), np.empty(0, dtype='float64')
+        return decode_series(row[0])
+
+    def _put_series(self, symbol: str, interval: str, ts: np.ndarray, closes: np.ndarray) -> None:
+        if len(ts) == 0:
+            self._conn.execute("DELETE FROM series WHERE symbol = ? AND interval = ?", (symbol, interval))
+            return
+        self._conn.execute(
+            "INSERT OR REPLACE INTO series VALUES (?, ?, ?, ?, ?)",
+            (symbol, interval, len(ts), int(ts[-1]), encode_series(ts, closes, **STORE_CODEC))
+        )
+
+    def coverage(self, symbol: str, interval: str) -> Optional[Tuple[int, int]]:
+        """
+        Return the (start_ts, end_ts) range already fetched for a symbol.
+
+        Timestamps are naive wall-clock datetimes expressed as epoch seconds.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT start_ts, end_ts FROM coverage WHERE symbol = ? AND interval = ?",
+                (symbol, interval)
+            ).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def last_timestamp(self, symbol: str, interval: str) -> Optional[int]:
+        """Timestamp of the newest stored bar, or None if nothing is stored"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT last_ts FROM series WHERE symbol = ? AND interval = ?",
+                (symbol, interval)
+            ).fetchone()
+        return row[0] if row else None
+
+    def read(self, symbol: str, interval: str, start_ts: int, end_ts: Optional[int] = None) -> pd.DataFrame:
+        """
+        Read stored bars in [start_ts, end_ts] as a Close DataFrame.
+
+        Args:
+            symbol: Ticker symbol
+            interval: Bar interval (e.g. '1d')
+            start_ts: Inclusive lower bound (epoch seconds)
+            end_ts: Inclusive upper bound, or None for no bound
+
+        Returns:
+            DataFrame indexed by Date with a Close column, sorted ascending (read-only)
+        """
+        with self._lock:
+            ts, closes = self._get_series(symbol, interval)
+
+        start = np.searchsorted(ts, start_ts, side='left')
+        end = len(ts) if end_ts is None else np.searchsorted(ts, end_ts, side='right')
+        return pd.DataFrame(
+            {'Close': closes[start:end]},
+            index=from_epoch_seconds(ts[start:end]),
+            copy=False
+        )
+
+    def write(self, symbol: str, interval: str, df: pd.DataFrame, start_ts: int, end_ts: int) -> None:
+        """
+        Replace the bars in [start_ts, end_ts] with df and extend the coverage range.
+
+        The whole range is replaced rather than upserted because upstreams
+        re-stamp the still-open latest bar (e.g. with the last trade time).
+
+        Args:
+            symbol: Ticker symbol
+            interval: Bar interval (e.g. '1d')
+            df: DataFrame indexed by Date with a Close column
+            start_ts: Start of the range df was fetched for (epoch seconds)
+            end_ts: End of the range df was fetched for (epoch seconds)
+        """
+        ts = to_epoch_seconds(df.index)
+        closes = df['Close'].to_numpy(dtype='float64')
+
+        with self._lock, self._conn:
+            old_ts, old_closes = self._get_series(symbol, interval)
+            keep = ((old_ts < start_ts) | (old_ts > end_ts)) & ~np.isin(old_ts, ts)
+            merged_ts = np.concatenate((old_ts[keep], ts))
+            merged_closes = np.concatenate((old_closes[keep], closes))
+            order = np.argsort(merged_ts, kind='stable')
+            self._put_series(symbol, interval, merged_ts[order], merged_closes[order])
+            self._conn.execute(
+                """
+                INSERT INTO coverage VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (symbol, interval) DO UPDATE SET
+                    start_ts = MIN(start_ts, excluded.start_ts),
+                    end_ts = MAX(end_ts, excluded.end_ts),
+                    updated_at = excluded.updated_at
+                """,
+                (symbol, interval, start_ts, end_ts, time.time())
+            )
+
+    def stats(self) -> dict:
+        """Return the number of stored symbols and bars, and the size of the stored series"""
+        with self._lock:
+            symbols, bars, size = self._conn.execute(
+                "SELECT COUNT(DISTINCT symbol), COALESCE(SUM(rows), 0), COALESCE(SUM(LENGTH(data)), 0) FROM series"
+            ).fetchone()
+        return {'path': self.path, 'symbols': symbols, 'bars': bars, 'bytes': size}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,213 @@
+"""
+Process-wide call budget for Alpha Vantage.
+A token bucket enforces the per-minute limit and a counter enforces the
+daily cap, so calls are queued or rejected before they reach the upstream
+quota instead of failing with a 'Note' response. Interactive requests take
+precedence over background work.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional, Tuple
+
+PRIORITIES = ('interactive', 'background')
+
+
+class RateLimitExceeded(Exception):
+    """Raised when a call cannot be made within the quota"""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class QuotaScheduler:
+    """Per-minute token bucket plus daily cap, shared by every caller in the process"""
+
+    # Seconds a caller waits for a token before being rejected, by priority
+    DEFAULT_TIMEOUTS = {
+        'interactive': 15.0,
+        'background': 0.0,
+    }
+    # Longest single sleep of an acquire_async caller yielding to interactive ones
+    ASYNC_POLL_INTERVAL = 0.05
+
+    def __init__(self, per_minute: int = 5, per_day: int = 500, background_reserve: int = 1):
+        """
+        Args:
+            per_minute: Calls allowed per minute (bucket capacity and refill rate)
+            per_day: Calls allowed per UTC day
+            background_reserve: Tokens background calls must leave in the bucket
+                for interactive requests
+        """
+        self.per_minute = per_minute
+        self.per_day = per_day
+        self.background_reserve = background_reserve
+        self._rate = per_minute / 60.0
+        self._tokens = float(per_minute)
+        self._updated = time.monotonic()
+        self._day = self._today()
+        self._day_used = 0
+        self._waiting = {p: 0 for p in PRIORITIES}
+        self._granted = {p: 0 for p in PRIORITIES}
+        self._rejected = {p: 0 for p in PRIORITIES}
+        self._cond = threading.Condition()
+
+    @classmethod
+    def from_env(cls) -> 'QuotaScheduler':
+        """Build a scheduler from ALPHA_VANTAGE_CALLS_PER_MINUTE and ALPHA_VANTAGE_CALLS_PER_DAY"""
+        return cls(
+            per_minute=int(os.getenv('ALPHA_VANTAGE_CALLS_PER_MINUTE', '5')),
+            per_day=int(os.getenv('ALPHA_VANTAGE_CALLS_PER_DAY', '500'))
+        )
+
+    @staticmethod
+    def _today() -> str:
+        return datetime.now(timezone.utc).strftime('%Y-%m-%d')
+
+    @staticmethod
+    def _seconds_until_day_reset() -> float:
+        now = datetime.now(timezone.utc)
+        tomorrow = (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+        return (tomorrow - now).total_seconds()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(float(self.per_minute), self._tokens + (now - self._updated) * self._rate)
+        self._updated = now
+        today = self._today()
+        if today != self._day:
+            self._day = today
+            self._day_used = 0
+
+    def _take(self, priority: str) -> Optional[Tuple[float, bool]]:
+        """
+        Take a token if priority may have one now (caller holds _cond).
+
+        Returns:
+            None if a token was taken, else (seconds until one may be free,
+            whether the caller is yielding to waiting interactive callers)
+
+        Raises:
+            RateLimitExceeded: If the daily cap is used up
+        """
+        self._refill()
+        if self._day_used >= self.per_day:
+            self._rejected[priority] += 1
+            raise RateLimitExceeded(
+                f"Alpha Vantage daily quota of {self.per_day} calls is used up",
+                retry_after=self._seconds_until_day_reset()
+            )
+
+        reserve = self.background_reserve if priority == 'background' else 0
+        yielding = priority == 'background' and self._waiting['interactive'] > 0
+        if not yielding and self._tokens >= 1 + reserve:
+            self._tokens -= 1
+            self._day_used += 1
+            self._granted[priority] += 1
+            return None
+        return max(1 + reserve - self._tokens, 0) / self._rate, yielding
+
+    def _deadline(self, priority: str, timeout: Optional[float]) -> float:
+        if priority not in PRIORITIES:
+            raise ValueError(f"Invalid priority: {priority}. Must be one of: {', '.join(PRIORITIES)}")
+        if timeout is None:
+            timeout = self.DEFAULT_TIMEOUTS[priority]
+        return time.monotonic() + timeout
+
+    def _check_wait(self, priority: str, wait: float, yielding: bool, remaining: float) -> None:
+        """Reject the caller if the wait cannot finish before its deadline (caller holds _cond)"""
+        if remaining <= 0 or (not yielding and wait > remaining):
+            self._rejected[priority] += 1
+            raise RateLimitExceeded(
+                f"Alpha Vantage rate limit of {self.per_minute} calls/min reached",
+                retry_after=wait
+            )
+
+    def acquire(self, priority: str = 'interactive', timeout: Optional[float] = None) -> None:
+        """
+        Take one call from the budget, waiting for a token if necessary.
+
+        Args:
+            priority: 'interactive' or 'background'. Background calls leave
+                background_reserve tokens for interactive ones and yield while
+                interactive callers are waiting.
+            timeout: Max seconds to wait (defaults to DEFAULT_TIMEOUTS[priority])
+
+        Raises:
+            RateLimitExceeded: If the daily cap is used up or no token frees up in time
+        """
+        deadline = self._deadline(priority, timeout)
+
+        with self._cond:
+            self._waiting[priority] += 1
+            try:
+                while True:
+                    pending = self._take(priority)
+                    if pending is None:
+                        return
+                    wait, yielding = pending
+                    remaining = deadline - time.monotonic()
+                    self._check_wait(priority, wait, yielding, remaining)
+                    self._cond.wait(min(wait, remaining) if wait > 0 else remaining)
+            finally:
+                self._waiting[priority] -= 1
+                self._cond.notify_all()
+
+    async def acquire_async(self, priority: str = 'interactive', timeout: Optional[float] = None) -> None:
+        """
+        Same as acquire, but waits with asyncio.sleep instead of holding a thread.
+
+        Raises:
+            RateLimitExceeded: If the daily cap is used up or no token frees up in time
+        """
+        deadline = self._deadline(priority, timeout)
+
+        with self._cond:
+            self._waiting[priority] += 1
+        try:
+            while True:
+                with self._cond:
+                    pending = self._take(priority)
+                    if pending is None:
+                        return
+                    wait, yielding = pending
+                    remaining = deadline - time.monotonic()
+                    self._check_wait(priority, wait, yielding, remaining)
+                # Blocking waiters are woken by notify; this one polls instead
+                await asyncio.sleep(min(wait if wait > 0 else self.ASYNC_POLL_INTERVAL, remaining))
+        finally:
+            with self._cond:
+                self._waiting[priority] -= 1
+                self._cond.notify_all()
+
+    def budget(self) -> Dict[str, Any]:
+        """Return the remaining per-minute and per-day budget and scheduler counters"""
+        with self._cond:
+            self._refill()
+            return {
+                'minuteRemaining': int(self._tokens),
+                'minuteLimit': self.per_minute,
+                'dayRemaining': max(self.per_day - self._day_used, 0),
+                'dayLimit': self.per_day,
+                'dayResetsIn': self._seconds_until_day_reset(),
+                'waiting': dict(self._waiting),
+                'granted': dict(self._granted),
+                'rejected': dict(self._rejected)
+            }
+
+
+_alpha_vantage_quota: Optional[QuotaScheduler] = None
+_alpha_vantage_quota_lock = threading.Lock()
+
+
+def get_alpha_vantage_quota() -> QuotaScheduler:
+    """Return the process-wide Alpha Vantage quota scheduler"""
+    global _alpha_vantage_quota
+    with _alpha_vantage_quota_lock:
+        if _alpha_vantage_quota is None:
+            _alpha_vantage_quota = QuotaScheduler.from_env()
+        return _alpha_vantage_quota
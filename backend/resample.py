@@ -0,0 +1,59 @@
+"""
+Local resampling of price series to coarser intervals.
+Bars are grouped into calendar days, weeks or months in one vectorized pass
+over the sorted index, so weekly and monthly views are derived from the
+cached daily series instead of being requested from upstream. Only closes
+are cached, so OHLC bars aggregate the closes within each period (open is
+the first close, high/low the extremes, close the last close).
+"""
+
+import numpy as np
+import pandas as pd
+
+# Interval -> pandas period frequency used to group bars
+INTERVALS = {
+    '1d': 'D',
+    '1wk': 'W',
+    '1mo': 'M',
+}
+
+
+def resample_frame(df: pd.DataFrame, interval: str = '1d', ohlc: bool = False) -> pd.DataFrame:
+    """
+    Aggregate a date-sorted Close frame into one bar per interval.
+
+    Each bar is dated by the last bar it contains, so weekly and monthly bars
+    fall on real trading days and the latest bar stays current. Periods
+    without any bars are skipped rather than filled.
+
+    Args:
+        df: DataFrame indexed by date (ascending) with a Close column
+        interval: One of INTERVALS
+        ohlc: Return Open/High/Low/Close columns instead of Close only
+
+    Returns:
+        Resampled DataFrame indexed by Date
+
+    Raises:
+        ValueError: If the interval is not supported
+    """
+    if interval not in INTERVALS:
+        raise ValueError(f"Invalid interval: {interval}. Must be one of: {', '.join(INTERVALS)}")
+    closes = df['Close'].to_numpy(dtype='float64')
+    if len(closes) == 0:
+        return pd.DataFrame(columns=['Open', 'High', 'Low', 'Close'] if ohlc else ['Close'], index=df.index)
+
+    # Sorted input, so each period's bars are one contiguous run
+    periods = df.index.to_period(INTERVALS[interval]).asi8
+    starts = np.flatnonzero(np.concatenate(([True], periods[1:] != periods[:-1])))
+    ends = np.append(starts[1:], len(closes)) - 1
+
+    index = df.index[ends]
+    if not ohlc:
+        return pd.DataFrame({'Close': closes[ends]}, index=index)
+    return pd.DataFrame({
+        'Open': closes[starts],
+        'High': np.maximum.reduceat(closes, starts),
+        'Low': np.minimum.reduceat(closes, starts),
+        'Close': closes[ends]
+    }, index=index)
@@ -0,0 +1,353 @@
+"""
+Request validation and response formatting shared by the Flask app
+(app.py) and the asyncio serving mode (async_app.py).
+"""
+
+import json
+import math
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from rate_limiter import RateLimitExceeded, get_alpha_vantage_quota
+from timing import span
+
+VALID_PERIODS = ['24h', '7d', '30d', '3m', '6m', '1y']
+
+# Bar intervals /api/stock-data can resample to (see resample.INTERVALS)
+VALID_INTERVALS = ['1d', '1wk', '1mo']
+
+# OHLC columns and their keys in rows ({date, price, open, ...}) and columnar ({prices, opens, ...}) bodies
+OHLC_FIELDS = [('Open', 'open', 'opens'), ('High', 'high', 'highs'), ('Low', 'low', 'lows')]
+
+# Response shapes for price series: [{date, price}, ...] or {dates: [...], prices: [...]}
+VALID_FORMATS = ['rows', 'columnar']
+
+# Upper bound for /api/stock-data/batch
+MAX_BATCH_SYMBOLS = 25
+
+# Streaming response modes: chunked JSON in the usual shape, or one JSON document per line
+STREAM_MODES = ['json', 'ndjson']
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
+# Bounds for the maxPoints (downsampling) parameter of /api/stock-data
+MIN_MAX_POINTS = 3
+MAX_MAX_POINTS = 100000
+
+# Price points serialized per streamed chunk
+STREAM_BATCH_ROWS = 500
+
+_encode = json.JSONEncoder(separators=(',', ':')).encode
+
+
+def parse_symbols(raw_symbols: str) -> List[str]:
+    """Split a comma-separated symbol list, upper-casing and deduplicating in request order"""
+    return list(dict.fromkeys(s.strip().upper() for s in raw_symbols.split(',') if s.strip()))
+
+
+def parse_max_points(raw: Optional[str]) -> Optional[int]:
+    """
+    Parse the maxPoints query parameter.
+
+    Returns:
+        The point cap, or None if the parameter was not given
+
+    Raises:
+        ValueError: If it is not an integer between MIN_MAX_POINTS and MAX_MAX_POINTS
+    """
+    if not raw:
+        return None
+    try:
+        max_points = int(raw)
+    except ValueError:
+        raise ValueError(f'Invalid maxPoints: {raw}')
+    if not MIN_MAX_POINTS <= max_points <= MAX_MAX_POINTS:
+        raise ValueError(f'maxPoints must be between {MIN_MAX_POINTS} and {MAX_MAX_POINTS}')
+    return max_points
+
+
+def parse_date_range(raw_start: Optional[str], raw_end: Optional[str]) -> Optional[Tuple[datetime, Optional[datetime]]]:
+    """
+    Parse the start/end query parameters of /api/stock-data.
+
+    Both take ISO dates or datetimes; a date-only end includes that whole day.
+    Timezone-aware values are converted to naive local time, like the price index.
+
+    Returns:
+        (start, end or None for the latest bar), or None if neither was given
+
+    Raises:
+        ValueError: If a value is invalid, end is given without start, or start is after end
+    """
+    if not raw_start:
+        if raw_end:
+            raise ValueError('start is required when end is given')
+        return None
+
+    def parse(name: str, raw: str) -> datetime:
+        try:
+            value = datetime.fromisoformat(raw)
+        except ValueError:
+            raise ValueError(f'Invalid {name}: {raw}. Expected an ISO date such as 2024-01-31')
+        if value.tzinfo is not None:
+            value = value.astimezone().replace(tzinfo=None)
+        return value
+
+    start = parse('start', raw_start)
+    end = None
+    if raw_end:
+        end = parse('end', raw_end)
+        if len(raw_end) == 10:
+            end += timedelta(days=1, microseconds=-1)
+        if start > end:
+            raise ValueError('start must not be after end')
+    return start, end
+
+
+def parse_interval(raw: Optional[str]) -> Optional[str]:
+    """
+    Parse the interval query parameter.
+
+    Raises:
+        ValueError: If it is not one of VALID_INTERVALS
+    """
+    if not raw:
+        return None
+    if raw not in VALID_INTERVALS:
+        raise ValueError(f'Invalid interval: {raw}. Must be one of: {", ".join(VALID_INTERVALS)}')
+    return raw
+
+
+def _ohlc_values(hist) -> List[Tuple[str, str, Any]]:
+    """(rows key, columnar key, values) for each OHLC column present besides Close"""
+    return [(key, plural, hist[column].to_numpy(dtype='float64'))
+            for column, key, plural in OHLC_FIELDS if column in hist.columns]
+
+
+def format_stock_data(symbol: str, hist, response_format: str = 'rows') -> Dict[str, Any]:
+    """
+    Build the /api/stock-data response body from a price DataFrame.
+
+    Dates and Close prices are formatted column-wise rather than row by row.
+
+    Args:
+        symbol: Stock ticker symbol
+        hist: DataFrame indexed by date with a Close column (and optionally
+            Open/High/Low, which are added to each point)
+        response_format: 'rows' for [{date, price}, ...] or 'columnar' for
+            parallel dates/prices arrays
+    """
+    with span('serialize'):
+        dates = hist.index.strftime('%Y-%m-%dT%H:%M:%S').tolist()
+        closes = hist['Close'].to_numpy(dtype='float64').tolist()
+        ohlc = [(key, plural, values.tolist()) for key, plural, values in _ohlc_values(hist)]
+
+        # Get current price (last close price)
+        current_price = closes[-1]
+
+        if response_format == 'columnar':
+            body = {
+                'symbol': symbol,
+                'dates': dates,
+                'prices': closes,
+                'currentPrice': current_price
+            }
+            body.update({plural: values for _, plural, values in ohlc})
+            return body
+
+        # Use Close price as the price point
+        if ohlc:
+            keys = ['date', 'price'] + [key for key, _, _ in ohlc]
+            prices = [dict(zip(keys, point)) for point in zip(dates, closes, *[values for _, _, values in ohlc])]
+        else:
+            prices = [{'date': date, 'price': price} for date, price in zip(dates, closes)]
+        return {
+            'symbol': symbol,
+            'prices': prices,
+            'currentPrice': current_price
+        }
+
+
+def ndjson_lines(records: Iterable[Any]) -> Iterator[str]:
+    """Serialize records as newline-delimited JSON, one record per line"""
+    for record in records:
+        yield _encode(record) + '\n'
+
+
+def stream_stock_data(symbol: str, hist, response_format: str = 'rows', mode: str = 'ndjson',
+                      batch_rows: int = STREAM_BATCH_ROWS) -> Iterator[str]:
+    """
+    Serialize the /api/stock-data response incrementally, batch_rows price points
+    at a time, so the serialized body is never built in memory at once.
+
+    Args:
+        symbol: Stock ticker symbol
+        hist: DataFrame indexed by date with a Close column
+        response_format: 'rows' or 'columnar' (json mode only)
+        mode: 'json' for the format_stock_data body as chunked JSON, or 'ndjson' for
+            a {symbol, count, currentPrice} line followed by one {date, price} line per point
+    """
+    closes = hist['Close'].to_numpy(dtype='float64')
+    current_price = float(closes[-1])
+    ohlc = _ohlc_values(hist)
+    keys = ['date', 'price'] + [key for key, _, _ in ohlc]
+
+    def batches() -> Iterator[Tuple[List[str], List[float]]]:
+        for start in range(0, len(closes), batch_rows):
+            dates = hist.index[start:start + batch_rows].strftime('%Y-%m-%dT%H:%M:%S').tolist()
+            yield dates, closes[start:start + batch_rows].tolist()
+
+    def points() -> Iterator[List[Dict[str, Any]]]:
+        for i, (dates, prices) in enumerate(batches()):
+            if not ohlc:
+                yield [{'date': date, 'price': price} for date, price in zip(dates, prices)]
+                continue
+            start = i * batch_rows
+            extra = [values[start:start + batch_rows].tolist() for _, _, values in ohlc]
+            yield [dict(zip(keys, point)) for point in zip(dates, prices, *extra)]
+
+    if mode == 'ndjson':
+        yield _encode({'symbol': symbol, 'count': len(closes), 'currentPrice': current_price}) + '\n'
+        for batch in points():
+            yield ''.join(_encode(point) + '\n' for point in batch)
+        return
+
+    head = _encode({'symbol': symbol, 'currentPrice': current_price})[:-1]
+    if response_format == 'columnar':
+        yield head + ',"dates":['
+        for i, (dates, _) in enumerate(batches()):
+            yield (',' if i else '') + _encode(dates)[1:-1]
+        for plural, values in [('prices', closes)] + [(plural, values) for _, plural, values in ohlc]:
+            yield f'],{_encode(plural)}:['
+            for i, start in enumerate(range(0, len(values), batch_rows)):
+                yield (',' if i else '') + _encode(values[start:start + batch_rows].tolist())[1:-1]
+        yield ']}'
+        return
+
+    yield head + ',"prices":['
+    for i, batch in enumerate(points()):
+        yield (',' if i else '') + ','.join(_encode(point) for point in batch)
+    yield ']}'
+
+
+def stream_alpha_vantage(parser, items: Iterator[Tuple[str, Any]], mode: str = 'json',
+                         batch_rows: int = STREAM_BATCH_ROWS) -> Iterator[str]:
+    """
+    Re-serialize an Alpha Vantage response while it is still being parsed
+    (see json_stream.stream_object), batch_rows days at a time.
+
+    Args:
+        parser: StreamingObjectParser positioned at the start of the time series
+        items: The parser's (date, values) iterator
+        mode: 'json' for the upstream document shape as chunked JSON, or 'ndjson'
+            for a line with the other top-level members (e.g. 'Meta Data')
+            followed by one {date, ...values} line per day
+    """
+    batch: List[str] = []
+    if mode == 'ndjson':
+        yield _encode(parser.header) + '\n'
+        for date, values in items:
+            batch.append(_encode({'date': date, **values}) + '\n')
+            if len(batch) >= batch_rows:
+                yield ''.join(batch)
+                batch = []
+        yield ''.join(batch)
+        return
+
+    emitted = list(parser.header)
+    yield '{' + ''.join(f'{_encode(key)}:{_encode(value)},' for key, value in parser.header.items()) + _encode(parser.stream_key) + ':{'
+    first = True
+    for date, values in items:
+        batch.append(f'{_encode(date)}:{_encode(values)}')
+        if len(batch) >= batch_rows:
+            yield ('' if first else ',') + ','.join(batch)
+            first = False
+            batch = []
+    if batch:
+        yield ('' if first else ',') + ','.join(batch)
+    # Members after the series only become known once it has been read
+    trailing = ''.join(f',{_encode(key)}:{_encode(value)}' for key, value in parser.header.items() if key not in emitted)
+    yield '}' + trailing + '}'
+
+
+def fetch_error_message(symbol: str, error_msg: str) -> str:
+    """Turn a provider error into a user-facing message"""
+    if "Yahoo Finance API error" in error_msg:
+        return f"Unable to fetch data for {symbol}. This may be due to Yahoo Finance API rate limiting or temporary issues. Please try again in a moment."
+    return f"Failed to fetch stock data for {symbol}: {error_msg}"
+
+
+def format_batch_results(symbols: List[str], fetched: Dict[str, Any], period: str,
+                         response_format: str = 'rows') -> Dict[str, Any]:
+    """
+    Build the /api/stock-data/batch response body.
+
+    Args:
+        symbols: Requested symbols, in request order
+        fetched: Map of symbol to DataFrame or the Exception raised fetching it
+        period: Requested period
+        response_format: 'rows' or 'columnar'
+    """
+    results = {}
+    error_count = 0
+    for symbol in symbols:
+        hist = fetched[symbol]
+        if isinstance(hist, Exception):
+            print(f"Error fetching stock data for {symbol}: {hist}")
+            results[symbol] = {'symbol': symbol, 'error': fetch_error_message(symbol, str(hist))}
+            error_count += 1
+        elif hist.empty:
+            results[symbol] = {'symbol': symbol, 'error': f'No data available for symbol {symbol}'}
+            error_count += 1
+        else:
+            results[symbol] = format_stock_data(symbol, hist, response_format)
+
+    return {
+        'period': period,
+        'results': results,
+        'count': len(symbols),
+        'errors': error_count
+    }
+
+
+def alpha_vantage_error(data: Dict[str, Any]) -> Optional[Tuple[str, int]]:
+    """
+    Check an Alpha Vantage payload for API errors.
+
+    Returns:
+        (error message, HTTP status) to return to the client, or None if the payload is usable
+    """
+    if 'Error Message' in data:
+        return data['Error Message'], 400
+
+    if 'Note' in data:
+        return 'API rate limit exceeded. Please try again later. (Alpha Vantage free tier: 5 calls/min, 500/day)', 429
+
+    return None
+
+
+def rate_limit_response(error: RateLimitExceeded) -> Tuple[Dict[str, Any], Dict[str, str]]:
+    """
+    Build the 429 body and headers for a call rejected by the Alpha Vantage quota scheduler.
+
+    Returns:
+        (response body, extra response headers)
+    """
+    budget = get_alpha_vantage_quota().budget()
+    body = {
+        'error': f'{error}. Please try again later. (Alpha Vantage free tier: 5 calls/min, 500/day)',
+        'retryAfter': error.retry_after,
+        'budget': {
+            'minuteRemaining': budget['minuteRemaining'],
+            'dayRemaining': budget['dayRemaining']
+        }
+    }
+    return body, {'Retry-After': str(max(1, math.ceil(error.retry_after)))}
+
+
+def quota_headers() -> Dict[str, str]:
+    """Headers advertising the remaining Alpha Vantage budget"""
+    budget = get_alpha_vantage_quota().budget()
+    return {
+        'X-RateLimit-Remaining-Minute': str(budget['minuteRemaining']),
+        'X-RateLimit-Remaining-Day': str(budget['dayRemaining'])
+    }
@@ -0,0 +1,213 @@
+"""
+Shared retry/backoff policy and per-request deadlines for upstream calls.
+Back-off uses decorrelated jitter so workers retrying the same outage do
+not stampede the upstream in lockstep, honors Retry-After on 429/503
+responses, and never sleeps past the deadline of the request being served.
+"""
+
+import asyncio
+import contextvars
+import random
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Iterator, Optional, Tuple, Type
+
+from metrics import UPSTREAM_RETRIES
+
+# Absolute time.monotonic() deadline of the request being served, if any.
+# Context variables follow asyncio tasks and asyncio.to_thread automatically;
+# thread pool work must be submitted through run_in_context.
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar('request_deadline', default=None)
+
+# Client errors that will not go away by asking again
+NON_RETRYABLE_STATUSES = {400, 401, 403, 404, 405, 422}
+
+
+class DeadlineExceeded(Exception):
+    """Raised when the request's time budget runs out before an upstream call succeeds"""
+
+
+class UpstreamHTTPError(Exception):
+    """Non-success HTTP status from an upstream, with its Retry-After hint if any"""
+
+    def __init__(self, message: str, status: int, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+    @property
+    def retryable(self) -> bool:
+        return self.status not in NON_RETRYABLE_STATUSES
+
+
+def set_deadline(seconds: float) -> contextvars.Token:
+    """
+    Start a time budget for the current request, keeping any tighter budget already set.
+
+    Returns:
+        Token for reset_deadline
+    """
+    deadline = time.monotonic() + seconds
+    current = _deadline.get()
+    if current is not None:
+        deadline = min(deadline, current)
+    return _deadline.set(deadline)
+
+
+def reset_deadline(token: contextvars.Token) -> None:
+    """Restore the budget that was in place before set_deadline"""
+    _deadline.reset(token)
+
+
+@contextmanager
+def deadline(seconds: float) -> Iterator[None]:
+    """Run a block under a time budget of seconds"""
+    token = set_deadline(seconds)
+    try:
+        yield
+    finally:
+        reset_deadline(token)
+
+
+def remaining_time() -> Optional[float]:
+    """Seconds left in the current request's budget, or None if it has none"""
+    current = _deadline.get()
+    if current is None:
+        return None
+    return current - time.monotonic()
+
+
+def attempt_timeout(timeout: float) -> float:
+    """
+    Timeout for one upstream call: the usual timeout, cut short by the request budget.
+
+    Raises:
+        DeadlineExceeded: If the budget is already spent
+    """
+    remaining = remaining_time()
+    if remaining is None:
+        return timeout
+    if remaining <= 0:
+        raise DeadlineExceeded("Request deadline exceeded before the upstream call")
+    return min(timeout, remaining)
+
+
+def run_in_context(pool, fn: Callable[..., Any], *args: Any):
+    """Submit fn to an executor so it sees the caller's context (and request deadline)"""
+    return pool.submit(contextvars.copy_context().run, fn, *args)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header (delta-seconds or HTTP-date) into seconds"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max((when - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+def check_response(response: Any, detail: str = '') -> None:
+    """
+    Raise UpstreamHTTPError for a non-2xx response (requests or httpx).
+
+    Args:
+        response: Upstream response
+        detail: Extra text for the error message (e.g. a snippet of the body)
+    """
+    status = response.status_code
+    if 200 <= status < 300:
+        return
+    retry_after = None
+    if status in (429, 503):
+        retry_after = parse_retry_after(response.headers.get('Retry-After'))
+    message = f"HTTP {status}: {detail}" if detail else f"HTTP {status}"
+    raise UpstreamHTTPError(message, status, retry_after)
+
+
+class RetryPolicy:
+    """Retry with decorrelated-jitter back-off, bounded by the request deadline"""
+
+    def __init__(self, max_attempts: int = 3, base_delay: float = 0.5, max_delay: float = 8.0,
+                 give_up_on: Tuple[Type[BaseException], ...] = (), name: str = 'upstream'):
+        """
+        Args:
+            max_attempts: Total attempts, including the first
+            base_delay: Smallest back-off between attempts (seconds)
+            max_delay: Largest back-off between attempts (seconds), unless the
+                upstream asks for longer through Retry-After
+            give_up_on: Exception types that are raised immediately, never retried
+            name: Provider label for the upstream_retries_total metric
+        """
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.give_up_on = (DeadlineExceeded,) + tuple(give_up_on)
+        self.name = name
+
+    def next_delay(self, previous: float) -> float:
+        """Decorrelated jitter: uniform between the base delay and three times the previous one"""
+        return min(self.max_delay, random.uniform(self.base_delay, max(previous, self.base_delay) * 3))
+
+    def _backoff(self, error: Exception, attempt: int, previous: float) -> Optional[float]:
+        """Seconds to sleep before the next attempt, or None to give up and re-raise"""
+        if isinstance(error, self.give_up_on) or attempt >= self.max_attempts - 1:
+            return None
+        if isinstance(error, UpstreamHTTPError) and not error.retryable:
+            return None
+
+        delay = self.next_delay(previous)
+        retry_after = getattr(error, 'retry_after', None)
+        if isinstance(error, UpstreamHTTPError) and retry_after is not None:
+            delay = max(delay, retry_after)
+
+        remaining = remaining_time()
+        if remaining is not None and delay >= remaining:
+            # Sleeping would use up the budget with nothing left for the retry
+            return None
+        return delay
+
+    def call(self, fn: Callable[[], Any], description: str = 'upstream call') -> Any:
+        """
+        Call fn until it succeeds or the policy gives up.
+
+        Raises:
+            The last error from fn, or DeadlineExceeded if the budget ran out first
+        """
+        delay = self.base_delay
+        for attempt in range(self.max_attempts):
+            attempt_timeout(float('inf'))
+            try:
+                return fn()
+            except Exception as e:
+                delay = self._backoff(e, attempt, delay)
+                if delay is None:
+                    raise
+                print(f"Error in {description} (attempt {attempt + 1}/{self.max_attempts}): {e}")
+                print(f"Retrying in {delay:.1f}s...")
+                UPSTREAM_RETRIES.inc(self.name)
+                time.sleep(delay)
+
+    async def call_async(self, fn: Callable[[], Awaitable[Any]], description: str = 'upstream call') -> Any:
+        """Asyncio counterpart of call; back-off sleeps are awaited"""
+        delay = self.base_delay
+        for attempt in range(self.max_attempts):
+            attempt_timeout(float('inf'))
+            try:
+                return await fn()
+            except Exception as e:
+                delay = self._backoff(e, attempt, delay)
+                if delay is None:
+                    raise
+                print(f"Error in {description} (attempt {attempt + 1}/{self.max_attempts}): {e}")
+                print(f"Retrying in {delay:.1f}s...")
+                UPSTREAM_RETRIES.inc(self.name)
+                await asyncio.sleep(delay)
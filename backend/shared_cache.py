@@ -0,0 +1,261 @@
+"""
+Cache shared between worker processes and nodes.
+Each gunicorn worker keeps its own TTLCache, so without a shared tier the
+same (symbol, period) is fetched once per worker and every node spends its
+own Alpha Vantage quota. SharedCache stores serialized values in a
+Redis-compatible backend with TTLs, and a short-lived lock per key makes
+sure only one worker fills a missing entry while the others wait for it.
+Redis is optional: MemoryCacheBackend is an in-process stand-in with the
+same semantics, used for tests and single-process setups.
+"""
+
+import json
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from retry import remaining_time
+
+# Deletes the lock only if it still holds our token (it may have expired and been taken over)
+_RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+def encode_json(value: Any) -> bytes:
+    """Serialize a JSON-compatible value compactly"""
+    return json.dumps(value, separators=(',', ':')).encode('utf-8')
+
+
+def decode_json(data: bytes) -> Any:
+    """Inverse of encode_json"""
+    return json.loads(data)
+
+
+class CacheBackend(ABC):
+    """Minimal key/value interface SharedCache needs (a subset of Redis commands)"""
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[bytes]:
+        """Return the value stored under key, or None"""
+
+    @abstractmethod
+    def set(self, key: str, value: bytes, ttl: float, only_if_missing: bool = False) -> bool:
+        """
+        Store value for ttl seconds.
+
+        Returns:
+            False if only_if_missing was set and the key already existed
+        """
+
+    @abstractmethod
+    def delete_if_equals(self, key: str, value: bytes) -> bool:
+        """Atomically delete key if it still holds value"""
+
+
+class MemoryCacheBackend(CacheBackend):
+    """In-process backend with Redis expiry and SET NX semantics"""
+
+    def __init__(self):
+        self._entries: Dict[str, Tuple[float, bytes]] = {}
+        self._lock = threading.Lock()
+
+    def _live(self, key: str, now: float) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= now:
+            del self._entries[key]
+            return None
+        return entry[1]
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            return self._live(key, time.monotonic())
+
+    def set(self, key: str, value: bytes, ttl: float, only_if_missing: bool = False) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            if only_if_missing and self._live(key, now) is not None:
+                return False
+            self._entries[key] = (now + ttl, bytes(value))
+            return True
+
+    def delete_if_equals(self, key: str, value: bytes) -> bool:
+        with self._lock:
+            if self._live(key, time.monotonic()) != value:
+                return False
+            del self._entries[key]
+            return True
+
+
+class RedisCacheBackend(CacheBackend):
+    """Backend on a Redis (or Redis-compatible, e.g. fakeredis) client"""
+
+    def __init__(self, url: Optional[str] = None, client: Any = None):
+        """
+        Args:
+            url: redis:// URL, used when no client is given
+            client: Existing redis.Redis-compatible client
+        """
+        if client is None:
+            try:
+                import redis
+            except ImportError:
+                raise Exception("SHARED_CACHE_URL points at Redis but the 'redis' package is not installed")
+            client = redis.Redis.from_url(url, socket_timeout=1.0, socket_connect_timeout=1.0)
+        self.client = client
+        self._release = client.register_script(_RELEASE_SCRIPT)
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.client.get(key)
+
+    def set(self, key: str, value: bytes, ttl: float, only_if_missing: bool = False) -> bool:
+        return bool(self.client.set(key, value, px=max(1, int(ttl * 1000)), nx=only_if_missing))
+
+    def delete_if_equals(self, key: str, value: bytes) -> bool:
+        return bool(self._release(keys=[key], args=[value]))
+
+
+class SharedCache:
+    """Namespaced cache over a CacheBackend with fill-once loading across processes"""
+
+    def __init__(self, backend: CacheBackend, namespace: str = 'visualizations',
+                 lock_ttl: float = 30.0, wait_timeout: float = 20.0, poll_interval: float = 0.05):
+        """
+        Args:
+            backend: Storage shared by all workers
+            namespace: Prefix for every key, so several deployments can share one Redis
+            lock_ttl: Seconds a fill lock is held at most (covers a crashed filler)
+            wait_timeout: Seconds a worker waits for another worker's fill before
+                loading the value itself
+            poll_interval: Seconds between checks while waiting
+        """
+        self.backend = backend
+        self.namespace = namespace
+        self.lock_ttl = lock_ttl
+        self.wait_timeout = wait_timeout
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self.counts = {'hits': 0, 'misses': 0, 'fills': 0, 'waits': 0, 'waitTimeouts': 0, 'errors': 0}
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self.counts[name] += 1
+
+    def _backend_call(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Run a backend command; an unreachable backend degrades to a miss instead of failing the request"""
+        try:
+            return fn(*args, **kwargs)
+        except Exception as e:
+            print(f"Shared cache error, continuing without it: {e}")
+            self._count('errors')
+            return None
+
+    def get(self, key: str, decode: Callable[[bytes], Any] = decode_json) -> Optional[Any]:
+        """Return the decoded value stored under key, or None"""
+        raw = self._backend_call(self.backend.get, f'{self.namespace}:{key}')
+        if raw is None:
+            return None
+        return decode(raw)
+
+    def set(self, key: str, value: Any, ttl: float, encode: Callable[[Any], bytes] = encode_json) -> None:
+        """Store value under key for ttl seconds"""
+        if ttl > 0:
+            self._backend_call(self.backend.set, f'{self.namespace}:{key}', encode(value), ttl)
+
+    def get_or_fill(self, key: str, loader: Callable[[], Any], ttl: float,
+                    encode: Callable[[Any], bytes] = encode_json,
+                    decode: Callable[[bytes], Any] = decode_json) -> Any:
+        """
+        Return the value under key, calling loader in at most one worker when it is missing.
+
+        The worker that takes the key's lock runs loader and stores the result;
+        the others poll until it appears. If the filler fails (its error is not
+        cached) or the wait exceeds wait_timeout or the request deadline, the
+        waiter runs loader itself. Errors from loader propagate to its caller.
+
+        Args:
+            key: Cache key (namespaced internally)
+            loader: Produces the value on a miss
+            ttl: Seconds the stored value stays fresh
+            encode: Serializes the value to bytes
+            decode: Inverse of encode
+        """
+        value = self.get(key, decode)
+        if value is not None:
+            self._count('hits')
+            return value
+        self._count('misses')
+
+        lock_key = f'{self.namespace}:lock:{key}'
+        token = uuid.uuid4().hex.encode('ascii')
+        locked = self._backend_call(self.backend.set, lock_key, token, self.lock_ttl, only_if_missing=True)
+        if locked is False:
+            value = self._wait_for(key, lock_key, decode)
+            if value is not None:
+                return value
+            locked = None
+
+        try:
+            if locked:
+                # Another worker may have filled it between our miss and taking the lock
+                value = self.get(key, decode)
+                if value is not None:
+                    return value
+            value = loader()
+            self._count('fills')
+            self.set(key, value, ttl, encode)
+            return value
+        finally:
+            if locked:
+                self._backend_call(self.backend.delete_if_equals, lock_key, token)
+
+    def _wait_for(self, key: str, lock_key: str, decode: Callable[[bytes], Any]) -> Optional[Any]:
+        """Poll for another worker's fill; None once its lock is gone without a value, or on timeout"""
+        self._count('waits')
+        wait = self.wait_timeout
+        remaining = remaining_time()
+        if remaining is not None:
+            wait = min(wait, remaining)
+        give_up_at = time.monotonic() + wait
+        while time.monotonic() < give_up_at:
+            time.sleep(self.poll_interval)
+            value = self.get(key, decode)
+            if value is not None:
+                self._count('hits')
+                return value
+            if self._backend_call(self.backend.get, lock_key) is None:
+                return None
+        self._count('waitTimeouts')
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit, fill and wait counters"""
+        with self._lock:
+            return dict(self.counts, backend=type(self.backend).__name__)
+
+
+def shared_cache_from_env(url: Optional[str]) -> Optional[SharedCache]:
+    """
+    Build the shared cache configured by SHARED_CACHE_URL.
+
+    Args:
+        url: 'redis://...' / 'rediss://...' for Redis, 'memory://' for the
+            in-process backend, or empty to disable the shared tier
+
+    Returns:
+        SharedCache, or None if disabled
+    """
+    if not url:
+        return None
+    if url.startswith('memory://'):
+        return SharedCache(MemoryCacheBackend())
+    if url.startswith(('redis://', 'rediss://', 'unix://')):
+        return SharedCache(RedisCacheBackend(url))
+    raise Exception(f"Unsupported SHARED_CACHE_URL scheme: {url}")
@@ -0,0 +1,85 @@
+"""
+Request coalescing for concurrent identical upstream calls.
+The first caller for a key runs the call; callers arriving while it is in
+flight wait for it and receive the same result or exception.
+"""
+
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class _Call:
+    """State of one in-flight call"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Deduplicates concurrent calls that share a key"""
+
+    def __init__(self):
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.shared = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """
+        Run fn once for all concurrent callers with the same key.
+
+        Args:
+            key: Identity of the call (e.g. (symbol, period))
+            fn: Zero-argument callable performing the work
+
+        Returns:
+            The value returned by fn
+
+        Raises:
+            Whatever exception fn raised, re-raised in every waiting caller
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.shared += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self.leaders += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def in_flight(self) -> int:
+        """Number of keys currently being fetched"""
+        with self._lock:
+            return len(self._calls)
+
+    def stats(self) -> Dict[str, int]:
+        """Return counters of leading and coalesced calls"""
+        with self._lock:
+            return {
+                'inFlight': len(self._calls),
+                'leaders': self.leaders,
+                'coalesced': self.shared
+            }
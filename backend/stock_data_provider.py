@@ -3,13 +3,153 @@ Stock data provider module with multiple data source implementations.
 Supports direct Yahoo Finance API and Alpha Vantage as fallback.
 """
 
-import requests
+import numpy as np
 import pandas as pd
-from datetime import datetime, timedelta
-from typing import Dict, List, Any, Tuple, Optional
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Iterable, List, Any, Tuple, Optional
+import threading
 import time
 import os
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 import yfinance as yf
+from dateutil import tz
+
+from cache import TTLCache
+from circuit_breaker import HALF_OPEN, CircuitBreaker, CircuitOpenError, rank_providers
+from downsample import downsample_frame
+from http_session import get_session_pool
+from json_stream import stream_object
+from metrics import track_upstream
+from price_archive import PriceArchive
+from price_codec import decode_frame, encode_frame
+from price_store import PriceStore, from_naive_epoch, naive_epoch
+from resample import INTERVALS, resample_frame
+from rate_limiter import RateLimitExceeded, get_alpha_vantage_quota
+from retry import (
+    DeadlineExceeded, RetryPolicy, UpstreamHTTPError, attempt_timeout, check_response, run_in_context
+)
+from shared_cache import SharedCache
+from singleflight import SingleFlight
+from timing import span
+
+
+class NoDataError(ValueError):
+    """Raised when an upstream has no data for the requested symbol or range.
+    
+    This is a client error (e.g. a mistyped ticker): it is not retried and
+    does not count against the provider's circuit breaker.
+    """
+
+
+def is_client_error(error: Exception) -> bool:
+    """Whether error says nothing about the provider's health (quota, bad request, unknown symbol)"""
+    if isinstance(error, UpstreamHTTPError):
+        return not error.retryable
+    return isinstance(error, (RateLimitExceeded, ValueError))
+
+
+def frame_from_yahoo_chart(timestamps: List[int], closes: List[Optional[float]]) -> pd.DataFrame:
+    """
+    Build a Close-price DataFrame from the timestamp and close arrays of a Yahoo chart result.
+    
+    Null closes are masked out in one pass and timestamps are shifted to
+    naive local time in bulk (matching datetime.fromtimestamp).
+    
+    Args:
+        timestamps: Epoch seconds from result['timestamp']
+        closes: Close prices from result['indicators']['quote'][0]['close'] (may contain None)
+    
+    Returns:
+        DataFrame indexed by Date with a single Close column, sorted ascending
+    """
+    ts = np.asarray(timestamps, dtype='int64')
+    close = np.array(closes, dtype='float64')  # None becomes NaN
+    
+    if len(ts) != len(close):
+        raise Exception("Timestamp and close arrays have different lengths")
+    
+    valid = ~np.isnan(close)
+    ts = ts[valid]
+    close = close[valid]
+    
+    # The local zone as a tzfile (TZ or /etc/localtime), which pandas converts
+    # in one pass over its transition table, so DST changes stay correct
+    index = pd.DatetimeIndex(ts.astype('datetime64[s]')).tz_localize(timezone.utc).tz_convert(tz.gettz()).tz_localize(None)
+    index.name = 'Date'
+    df = pd.DataFrame({'Close': close}, index=index)
+    
+    if not df.index.is_monotonic_increasing:
+        df.sort_index(inplace=True)
+    return df
+
+
+def slice_range(df: pd.DataFrame, start: Optional[datetime] = None,
+                end: Optional[datetime] = None) -> pd.DataFrame:
+    """
+    Rows of a date-sorted frame within [start, end], found by binary search.
+    
+    Returns:
+        A positional slice of df (no boolean mask over the whole index)
+    """
+    lo = _position(df.index, start, 'left') if start is not None else 0
+    hi = _position(df.index, end, 'right') if end is not None else len(df)
+    return df.iloc[lo:hi]
+
+
+def _position(index: pd.DatetimeIndex, value: datetime, side: str) -> int:
+    """searchsorted for a datetime that may be finer than the index's resolution (e.g. seconds)"""
+    value = pd.Timestamp(value)
+    unit = getattr(index, 'unit', 'ns')
+    if unit != 'ns':
+        # Bounds are inclusive: round a start up and an end down to the index's resolution
+        value = (value.ceil(unit) if side == 'left' else value.floor(unit)).as_unit(unit)
+    return int(index.searchsorted(value, side=side))
+
+
+def is_time_series_key(key: str) -> bool:
+    """Whether a top-level Alpha Vantage response key holds the price series"""
+    return 'Time Series' in key
+
+
+def frame_from_alpha_vantage(time_series) -> pd.DataFrame:
+    """
+    Build a Close-price DataFrame from an Alpha Vantage "Time Series (...)" object.
+    
+    Args:
+        time_series: Mapping of 'YYYY-MM-DD' date strings to OHLCV value dicts,
+            or an iterable of (date, values) pairs as they are parsed from a stream
+    
+    Returns:
+        DataFrame indexed by Date with a single Close column, sorted ascending
+    """
+    items = time_series.items() if isinstance(time_series, dict) else time_series
+    dates = []
+    closes = []
+    for date, values in items:
+        dates.append(date)
+        closes.append(values['4. close'])
+    return alpha_vantage_frame(dates, closes)
+
+
+def alpha_vantage_frame(dates: List[str], closes: List[str]) -> pd.DataFrame:
+    """
+    Build a Close-price DataFrame from parallel Alpha Vantage date and close strings.
+    
+    Returns:
+        DataFrame indexed by Date with a single Close column, sorted ascending
+    """
+    close = np.array(closes, dtype='float64')
+    
+    index = pd.to_datetime(dates, format='%Y-%m-%d')
+    index.name = 'Date'
+    df = pd.DataFrame({'Close': close}, index=index)
+    
+    # Alpha Vantage lists newest first; reversing is cheaper than a sort
+    if df.index.is_monotonic_decreasing:
+        df = df.iloc[::-1]
+    elif not df.index.is_monotonic_increasing:
+        df = df.sort_index()
+    return df
 
 
 class YahooFinanceDirectProvider:
@@ -28,6 +168,8 @@ class YahooFinanceDirectProvider:
             '24h': '1h',
             '7d': '1d',
             '30d': '1d',
+            '3m': '1d',
+            '6m': '1d',
             '1y': '1d',
         }
         return interval_map.get(period, '1d')
@@ -40,6 +182,8 @@ class YahooFinanceDirectProvider:
             '24h': timedelta(days=1),
             '7d': timedelta(days=7),
             '30d': timedelta(days=30),
+            '3m': timedelta(days=90),
+            '6m': timedelta(days=180),
             '1y': timedelta(days=365),
         }
         
@@ -64,104 +208,133 @@ class YahooFinanceDirectProvider:
                     # Fall through to yfinance fallback
             
             # Fallback to yfinance if Alpha Vantage is not available or failed
-            for attempt in range(max_retries):
-                try:
-                    ticker = yf.Ticker(symbol)
-                    hist = ticker.history(period="1y", interval="1d")
-                    
-                    if hist.empty:
-                        raise Exception(f"No data found for symbol {symbol}")
-                    
-                    # yfinance returns DataFrame with Date as index and Close as a column
-                    # Select only the Close column and ensure proper format
-                    df = hist[['Close']].copy()
-                    df.columns = ['Close']  # Ensure column name is 'Close'
-                    df.sort_index(inplace=True)
-                    
-                    # Remove any None/null values
-                    df = df.dropna()
-                    
-                    if df.empty:
-                        raise Exception("No valid data points found after filtering")
-                    
-                    return df
-                    
-                except Exception as e:
-                    if attempt < max_retries - 1:
-                        wait_time = 2 ** attempt
-                        print(f"Error fetching {symbol} with yfinance (attempt {attempt + 1}/{max_retries}): {e}")
-                        print(f"Retrying in {wait_time}s...")
-                        time.sleep(wait_time)
-                    else:
-                        raise Exception(f"Failed to fetch 1y data for {symbol}: {str(e)}")
-            
-            raise Exception(f"Failed to fetch 1y data for {symbol} after {max_retries} attempts")
+            return self.fetch_yfinance(symbol, max_retries)
         
-        # Use direct Yahoo Finance API for other periods (24h, 7d, 30d)
+        # Use direct Yahoo Finance API for other periods (24h, 7d, 30d, 3m, 6m)
         interval = self.get_interval_for_period(period)
         period1, period2 = self.get_timestamps_for_period(period)
+        return self._fetch_chart(symbol, period1, period2, interval, max_retries)
+    
+    # yfinance (period, interval) arguments for each API period
+    YFINANCE_PERIODS = {
+        '24h': ('1d', '1h'),
+        '7d': ('7d', '1d'),
+        '30d': ('1mo', '1d'),
+        '3m': ('3mo', '1d'),
+        '6m': ('6mo', '1d'),
+        '1y': ('1y', '1d'),
+    }
+    
+    def fetch_yfinance(self, symbol: str, max_retries: int = 3, period: str = '1y') -> pd.DataFrame:
+        """Fetch bars for period (one year of daily bars by default) through the yfinance library"""
+        yf_period, yf_interval = self.YFINANCE_PERIODS.get(period, ('1y', '1d'))
         
-        url = f"{self.BASE_URL}/{symbol}?period1={period1}&period2={period2}&interval={interval}&events=history"
+        def attempt() -> pd.DataFrame:
+            ticker = yf.Ticker(symbol)
+            with track_upstream('yfinance'), span('upstream'):
+                hist = ticker.history(period=yf_period, interval=yf_interval, timeout=attempt_timeout(10))
+            
+            if hist.empty:
+                raise NoDataError(f"No data found for symbol {symbol}")
+            
+            # yfinance returns DataFrame with Date as index and Close as a column
+            # Select only the Close column and ensure proper format
+            df = hist[['Close']].copy()
+            df.columns = ['Close']  # Ensure column name is 'Close'
+            df.sort_index(inplace=True)
+            
+            # Remove any None/null values
+            df = df.dropna()
+            
+            if df.empty:
+                raise NoDataError(f"No valid data points found for {symbol} after filtering")
+            
+            return df
         
-        for attempt in range(max_retries):
-            try:
-                response = requests.get(url, headers=self.headers, timeout=10)
-                
-                if response.status_code != 200:
-                    if attempt < max_retries - 1:
-                        time.sleep(2 ** attempt)
-                        continue
-                    raise Exception(f"HTTP {response.status_code}: {response.text[:200]}")
-                
+        try:
+            return RetryPolicy(max_retries, give_up_on=(NoDataError,), name='yfinance').call(
+                attempt, f"yfinance fetch for {symbol}")
+        except (DeadlineExceeded, NoDataError):
+            raise
+        except Exception as e:
+            raise Exception(f"Failed to fetch {period} data for {symbol}: {str(e)}")
+    
+    def fetch_range(self, symbol: str, start: datetime, end: datetime, interval: str = '1d',
+                    max_retries: int = 3) -> pd.DataFrame:
+        """Fetch bars between two local datetimes using the direct chart API"""
+        return self._fetch_chart(symbol, int(start.timestamp()), int(end.timestamp()), interval, max_retries)
+    
+    def chart_url(self, symbol: str, period1: int, period2: int, interval: str) -> str:
+        """Build the chart API URL for [period1, period2] epoch seconds"""
+        return f"{self.BASE_URL}/{symbol}?period1={period1}&period2={period2}&interval={interval}&events=history"
+    
+    @staticmethod
+    def parse_chart(data: Dict[str, Any], symbol: str) -> pd.DataFrame:
+        """Parse a decoded chart API response into a Close DataFrame"""
+        # Parse Yahoo Finance response
+        if 'chart' not in data or 'result' not in data['chart']:
+            raise Exception("Invalid response structure from Yahoo Finance")
+        
+        if not data['chart']['result'] or len(data['chart']['result']) == 0:
+            raise NoDataError(f"No data found for symbol {symbol}")
+        
+        result = data['chart']['result'][0]
+        
+        if 'timestamp' not in result or 'indicators' not in result:
+            raise Exception("Missing timestamp or indicators in response")
+        
+        timestamps = result['timestamp']
+        quotes = result['indicators']['quote'][0]
+        closes = quotes['close']
+        
+        if not timestamps or not closes:
+            raise NoDataError(f"No data found for symbol {symbol}")
+        
+        # Create DataFrame (None closes are skipped)
+        df = frame_from_yahoo_chart(timestamps, closes)
+        
+        if df.empty:
+            raise NoDataError(f"No valid data points found for {symbol}")
+        
+        return df
+    
+    def _fetch_chart(self, symbol: str, period1: int, period2: int, interval: str,
+                     max_retries: int = 3) -> pd.DataFrame:
+        """Fetch and parse a chart request for [period1, period2] epoch seconds"""
+        url = self.chart_url(symbol, period1, period2, interval)
+        
+        def attempt() -> pd.DataFrame:
+            with track_upstream('yahoo_direct'), span('upstream'):
+                response = get_session_pool().get(url, headers=self.headers, timeout=attempt_timeout(10))
+                check_response(response, response.text[:200])
+            with span('decode'):
                 data = response.json()
-                
-                # Parse Yahoo Finance response
-                if 'chart' not in data or 'result' not in data['chart']:
-                    raise Exception("Invalid response structure from Yahoo Finance")
-                
-                if not data['chart']['result'] or len(data['chart']['result']) == 0:
-                    raise Exception(f"No data found for symbol {symbol}")
-                
-                result = data['chart']['result'][0]
-                
-                if 'timestamp' not in result or 'indicators' not in result:
-                    raise Exception("Missing timestamp or indicators in response")
-                
-                timestamps = result['timestamp']
-                quotes = result['indicators']['quote'][0]
-                closes = quotes['close']
-                
-                if not timestamps or not closes:
-                    raise Exception("Empty timestamp or close data")
-                
-                # Create DataFrame
-                df_data = []
-                for i, timestamp in enumerate(timestamps):
-                    if closes[i] is not None:  # Skip None values
-                        df_data.append({
-                            'Date': datetime.fromtimestamp(timestamp),
-                            'Close': closes[i]
-                        })
-                
-                if not df_data:
-                    raise Exception("No valid data points found")
-                
-                df = pd.DataFrame(df_data)
-                df.set_index('Date', inplace=True)
-                df.sort_index(inplace=True)
-                
-                return df
-                
-            except Exception as e:
-                if attempt < max_retries - 1:
-                    wait_time = 2 ** attempt
-                    print(f"Error fetching {symbol} (attempt {attempt + 1}/{max_retries}): {e}")
-                    print(f"Retrying in {wait_time}s...")
-                    time.sleep(wait_time)
-                else:
-                    raise Exception(f"Failed to fetch data for {symbol}: {str(e)}")
+            with span('frame'):
+                return self.parse_chart(data, symbol)
         
-        raise Exception(f"Failed to fetch data for {symbol} after {max_retries} attempts")
+        try:
+            return RetryPolicy(max_retries, give_up_on=(NoDataError,), name='yahoo_direct').call(
+                attempt, f"chart fetch for {symbol}")
+        except (DeadlineExceeded, NoDataError):
+            raise
+        except UpstreamHTTPError as e:
+            # Yahoo answers an unknown symbol with 404
+            if e.status == 404:
+                raise NoDataError(f"No data found for symbol {symbol}") from e
+            raise
+        except Exception as e:
+            raise Exception(f"Failed to fetch data for {symbol}: {str(e)}")
+
+
+class YFinanceProvider:
+    """yfinance library provider, an independent path to Yahoo data (no API key required)"""
+    
+    def __init__(self):
+        self.yahoo = YahooFinanceDirectProvider()
+    
+    def fetch_data(self, symbol: str, period: str, max_retries: int = 3) -> pd.DataFrame:
+        """Fetch stock data for period through the yfinance library"""
+        return self.yahoo.fetch_yfinance(symbol, max_retries, period)
 
 
 class AlphaVantageProvider:
@@ -169,10 +342,34 @@ class AlphaVantageProvider:
     
     BASE_URL = "https://www.alphavantage.co/query"
     
-    def __init__(self, api_key: Optional[str] = None):
+    # Calendar days reliably covered by outputsize=compact (100 trading days)
+    COMPACT_DAYS = 140
+    
+    # Seconds to wait after a 'Note' (throttle) response; the limit is per minute
+    NOTE_RETRY_AFTER = 60.0
+    
+    # Response bodies are parsed incrementally in chunks of this many bytes
+    STREAM_CHUNK_SIZE = 64 * 1024
+    
+    # Calendar days each period covers; the series is daily, so 24h is the last two days
+    PERIOD_DAYS = {'24h': 2, '7d': 7, '30d': 30, '3m': 90, '6m': 180, '1y': 365}
+    
+    # Seconds a fetched series is reused (daily bars only change once a day)
+    SERIES_TTL = 300
+    
+    def __init__(self, api_key: Optional[str] = None, priority: str = 'interactive'):
+        """
+        Args:
+            api_key: Alpha Vantage API key (defaults to ALPHA_VANTAGE_API_KEY)
+            priority: Quota priority for this provider's calls ('interactive' or 'background')
+        """
         self.api_key = api_key or os.getenv('ALPHA_VANTAGE_API_KEY')
         if not self.api_key:
             raise ValueError("Alpha Vantage API key is required. Set ALPHA_VANTAGE_API_KEY environment variable.")
+        self.priority = priority
+        # symbol -> (outputsize, series)
+        self._series = TTLCache(max_entries=256, default_ttl=self.SERIES_TTL)
+        self._series_inflight = SingleFlight()
     
     def fetch_data(self, symbol: str, period: str, max_retries: int = 3) -> pd.DataFrame:
         """Fetch stock data using Alpha Vantage API
@@ -181,113 +378,649 @@ class AlphaVantageProvider:
         - No intraday data (24h period uses last 2 days of daily data)
         - TIME_SERIES_DAILY supports 'compact' (100 data points) and 'full' (20+ years)
         """
-        # Alpha Vantage free tier doesn't support intraday, so use daily data for 24h
-        # For 24h, we'll use the last 2 days of daily data
-        function = 'TIME_SERIES_DAILY'
+        df = self.series(symbol, self.outputsize_for_period(period), max_retries)
+        return self.slice_period(df, symbol, period)
+    
+    def series(self, symbol: str, outputsize: str = 'full', max_retries: int = 3) -> pd.DataFrame:
+        """The symbol's daily series, oldest first, shared by every period and range
+        
+        One series is kept per symbol for SERIES_TTL seconds. A cached 'full'
+        series also answers 'compact' requests, so periods and ranges are
+        sliced out of it rather than fetched again.
+        """
+        cached = self.cached_series(symbol, outputsize)
+        if cached is not None:
+            return cached
+        
+        def load() -> pd.DataFrame:
+            df = self._fetch_series(symbol, outputsize, max_retries)
+            self.remember_series(symbol, outputsize, df)
+            return df
+        
+        return self._series_inflight.do((symbol.upper(), outputsize), load)
+    
+    def cached_series(self, symbol: str, outputsize: str) -> Optional[pd.DataFrame]:
+        """The kept series for a symbol if it covers outputsize, else None"""
+        cached = self._series.get(symbol.upper())
+        if cached is not None and (cached[0] == 'full' or outputsize == 'compact'):
+            return cached[1]
+        return None
+    
+    def remember_series(self, symbol: str, outputsize: str, df: pd.DataFrame) -> None:
+        """Keep a freshly fetched series for later periods and ranges"""
+        self._series.set(symbol.upper(), (outputsize, df))
+    
+    @classmethod
+    def outputsize_for_period(cls, period: str) -> str:
+        """'full' for periods longer than 'compact' output covers (6m, 1y), else 'compact'"""
+        return 'full' if cls.PERIOD_DAYS.get(period, 0) > cls.COMPACT_DAYS else 'compact'
+    
+    @classmethod
+    def period_start(cls, period: str) -> Optional[datetime]:
+        """First date of a period, counted back from today's midnight (None for an unknown period)"""
+        if period not in cls.PERIOD_DAYS:
+            return None
+        end_date = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        return end_date - timedelta(days=cls.PERIOD_DAYS[period])
+    
+    @classmethod
+    def slice_period(cls, df: pd.DataFrame, symbol: str, period: str) -> pd.DataFrame:
+        """Keep the rows of a sorted daily series that fall within period"""
+        # For 24h, use last 2 days (since we can't get intraday with free tier)
+        df = slice_range(df, cls.period_start(period))
+        if df.empty:
+            raise NoDataError(f"No data available for {symbol} in the specified period {period}")
+        return df
+    
+    def fetch_range(self, symbol: str, start: datetime, end: datetime, interval: str = '1d',
+                    max_retries: int = 3) -> pd.DataFrame:
+        """Fetch daily bars between two datetimes
+        
+        'compact' output covers roughly the last 100 trading days, so older
+        ranges require the 'full' series.
+        """
+        if interval != '1d':
+            raise ValueError(f"Alpha Vantage provider only supports daily bars, got interval {interval}")
+        
+        outputsize = 'compact' if start >= datetime.now() - timedelta(days=self.COMPACT_DAYS) else 'full'
+        return slice_range(self.series(symbol, outputsize, max_retries), start, end)
+    
+    @staticmethod
+    def check_api_error(data: Dict[str, Any]) -> None:
+        """Raise for Alpha Vantage error payloads (unknown symbol, rate limit note)"""
+        if 'Error Message' in data:
+            raise Exception(data['Error Message'])
+        if 'Note' in data:
+            # Upstream throttling: retrying straight away would only spend more quota
+            raise RateLimitExceeded("Alpha Vantage rate limit exceeded. Please try again later.",
+                                    retry_after=AlphaVantageProvider.NOTE_RETRY_AFTER)
+    
+    @staticmethod
+    def parse_series(data: Dict[str, Any]) -> pd.DataFrame:
+        """Parse a decoded TIME_SERIES_DAILY response into a Close DataFrame, oldest first"""
+        # Check for API errors
+        AlphaVantageProvider.check_api_error(data)
+        
+        # Parse response
+        time_series_key = None
+        for key in data.keys():
+            if is_time_series_key(key):
+                time_series_key = key
+                break
+        
+        if not time_series_key:
+            raise Exception("Invalid response structure from Alpha Vantage")
         
-        # Use 'full' for 1y to get more historical data, 'compact' for shorter periods
-        outputsize = 'full' if period in ['1y'] else 'compact'
+        time_series = data[time_series_key]
         
-        params = {
-            'function': function,
+        # Convert to DataFrame
+        return frame_from_alpha_vantage(time_series)
+    
+    @staticmethod
+    def parse_series_stream(chunks: Iterable[bytes]) -> pd.DataFrame:
+        """
+        Parse a TIME_SERIES_DAILY response body chunk by chunk into a Close
+        DataFrame, oldest first. Only the dates and closes are kept while parsing,
+        so a 'full' (20+ year) body is never held or decoded whole.
+        """
+        parser, items = stream_object(chunks, is_time_series_key)
+        AlphaVantageProvider.check_api_error(parser.header)
+        if parser.stream_key is None:
+            raise Exception("Invalid response structure from Alpha Vantage")
+        return frame_from_alpha_vantage(items)
+    
+    def series_params(self, symbol: str, outputsize: str) -> Dict[str, str]:
+        """Query parameters for a TIME_SERIES_DAILY request"""
+        return {
+            'function': 'TIME_SERIES_DAILY',
             'symbol': symbol,
             'apikey': self.api_key,
             'outputsize': outputsize,
             'datatype': 'json'
         }
+    
+    def _fetch_series(self, symbol: str, outputsize: str, max_retries: int = 3) -> pd.DataFrame:
+        """Fetch and parse the TIME_SERIES_DAILY series for a symbol, oldest first"""
+        params = self.series_params(symbol, outputsize)
         
-        for attempt in range(max_retries):
+        def attempt() -> pd.DataFrame:
+            # Every attempt spends quota, so take a token before each one
+            with span('quota'):
+                get_alpha_vantage_quota().acquire(self.priority)
+            with track_upstream('alpha_vantage'), span('upstream'):
+                response = get_session_pool().get(self.BASE_URL, params=params, timeout=attempt_timeout(10), stream=True)
             try:
-                response = requests.get(self.BASE_URL, params=params, timeout=10)
-                
-                if response.status_code != 200:
-                    if attempt < max_retries - 1:
-                        time.sleep(2 ** attempt)
-                        continue
-                    raise Exception(f"HTTP {response.status_code}")
-                
-                data = response.json()
-                
-                # Check for API errors
-                if 'Error Message' in data:
-                    raise Exception(data['Error Message'])
-                if 'Note' in data:
-                    raise Exception("API rate limit exceeded. Please try again later.")
-                
-                # Parse response
-                time_series_key = None
-                for key in data.keys():
-                    if 'Time Series' in key:
-                        time_series_key = key
-                        break
-                
-                if not time_series_key:
-                    raise Exception("Invalid response structure from Alpha Vantage")
-                
-                time_series = data[time_series_key]
-                
-                # Convert to DataFrame
-                df_data = []
-                for date_str, values in time_series.items():
-                    df_data.append({
-                        'Date': pd.to_datetime(date_str),
-                        'Close': float(values['4. close'])
-                    })
-                
-                df = pd.DataFrame(df_data)
-                df.set_index('Date', inplace=True)
-                df.sort_index(inplace=True)
-                
-                # Filter by period
-                # Normalize end_date to midnight for proper date comparison
-                end_date = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-                if period == '24h':
-                    # For 24h, use last 2 days (since we can't get intraday with free tier)
-                    start_date = end_date - timedelta(days=2)
-                    df = df[df.index >= start_date]
-                elif period == '7d':
-                    start_date = end_date - timedelta(days=7)
-                    df = df[df.index >= start_date]
-                elif period == '30d':
-                    start_date = end_date - timedelta(days=30)
-                    df = df[df.index >= start_date]
-                elif period == '1y':
-                    start_date = end_date - timedelta(days=365)
-                    df = df[df.index >= start_date]
-                
-                # Ensure DataFrame is not empty after filtering
-                if df.empty:
-                    raise Exception(f"No data available for {symbol} in the specified period {period}")
-                
-                # Sort by date (ascending - oldest first)
-                df.sort_index(inplace=True)
-                
-                return df
-                
-            except Exception as e:
-                if attempt < max_retries - 1:
-                    wait_time = 2 ** attempt
-                    print(f"Error fetching {symbol} from Alpha Vantage (attempt {attempt + 1}/{max_retries}): {e}")
-                    time.sleep(wait_time)
-                else:
-                    raise
+                check_response(response)
+                # The body is parsed as it downloads, so this span includes the transfer
+                with span('decode'):
+                    return self.parse_series_stream(response.iter_content(self.STREAM_CHUNK_SIZE))
+            finally:
+                response.close()
         
-        raise Exception(f"Failed to fetch data for {symbol} after {max_retries} attempts")
+        # Retrying a quota rejection would only spend more of the quota
+        policy = RetryPolicy(max_retries, give_up_on=(RateLimitExceeded,), name='alpha_vantage')
+        return policy.call(attempt, f"Alpha Vantage fetch for {symbol}")
 
 
 class StockDataProvider:
-    """Main stock data provider with fallback support"""
+    """Main stock data provider with fallback support and response caching"""
+    
+    # Seconds a fetched series stays fresh, by period. Intraday data moves
+    # quickly; daily bars for long windows barely change within an hour.
+    CACHE_TTLS = {
+        '24h': 60,
+        '7d': 300,
+        '30d': 900,
+        '3m': 1800,
+        '6m': 1800,
+        '1y': 3600,
+    }
+    
+    # Periods served from daily bars, which are kept in the price store (if configured)
+    STORED_PERIODS = {
+        '7d': timedelta(days=7),
+        '30d': timedelta(days=30),
+        '3m': timedelta(days=90),
+        '6m': timedelta(days=180),
+        '1y': timedelta(days=365),
+    }
+    STORE_INTERVAL = '1d'
+    
+    # Periods the price archive serves (daily bars, counted back from midnight as
+    # Alpha Vantage does), and how long after its last refresh an archived series is used
+    ARCHIVE_PERIODS = {
+        '7d': timedelta(days=7),
+        '30d': timedelta(days=30),
+        '3m': timedelta(days=90),
+        '6m': timedelta(days=180),
+        '1y': timedelta(days=365),
+    }
+    ARCHIVE_MAX_AGE = 36 * 3600
     
-    def __init__(self, use_alpha_vantage: bool = False, alpha_vantage_key: Optional[str] = None):
+    # Daily history kept per symbol for date-range and resampled queries (see fetch_history)
+    BASE_DAYS = 5 * 365
+    BASE_TTL = 900
+    
+    # price_codec options for cached series: timestamps are delta-encoded (half
+    # the size of epoch seconds) while closes stay a view on decode
+    CACHE_CODEC = {'delta': True}
+    
+    # Bounds (seconds) for the hedge delay, and the delay used until enough latencies are recorded
+    HEDGE_MIN_DELAY = 0.25
+    HEDGE_MAX_DELAY = 8.0
+    HEDGE_DEFAULT_DELAY = 2.0
+    
+    # Worker threads shared by the primary and hedge calls of all hedged requests
+    HEDGE_POOL_SIZE = 32
+    
+    def __init__(self, use_alpha_vantage: bool = False, alpha_vantage_key: Optional[str] = None,
+                 cache_size: int = 256, cache_ttls: Optional[Dict[str, float]] = None,
+                 store: Optional[PriceStore] = None, hedge: bool = False,
+                 hedge_percentile: float = 95.0, hedge_provider: str = 'yfinance',
+                 shared_cache: Optional[SharedCache] = None, cache_float32: bool = False,
+                 archive: Optional[PriceArchive] = None):
+        """
+        Args:
+            use_alpha_vantage: Prefer Alpha Vantage, with Yahoo as fallback
+            alpha_vantage_key: Alpha Vantage API key
+            cache_size: Max (symbol, period) series kept in the response cache
+            cache_ttls: Per-period cache TTL overrides (see CACHE_TTLS)
+            store: Price store for daily bars, or None to always fetch whole windows
+            hedge: Send a second request to hedge_provider when the first is slow
+            hedge_percentile: Latency percentile of the routed provider after
+                which the hedge request is sent
+            hedge_provider: 'yfinance' or 'alphavantage'
+            shared_cache: Cache shared with other workers, checked after the
+                in-process cache; misses are filled by one worker at a time
+            cache_float32: Cache closes as float32, halving their size at
+                about 7 significant digits of precision
+            archive: Memory-mapped archive of daily histories; fresh archived
+                series are sliced directly instead of being fetched
+        """
         self.primary_provider = AlphaVantageProvider(alpha_vantage_key) if use_alpha_vantage and alpha_vantage_key else YahooFinanceDirectProvider()
         self.fallback_provider = YahooFinanceDirectProvider() if use_alpha_vantage else None
+        # (name, provider) in preference order; routing reorders by breaker health
+        self.providers = [(self.provider_name(self.primary_provider), self.primary_provider)]
+        if self.fallback_provider:
+            name = self.provider_name(self.fallback_provider)
+            if name == self.providers[0][0]:
+                name += '-fallback'
+            self.providers.append((name, self.fallback_provider))
+        self.breakers = {name: CircuitBreaker(name) for name, _ in self.providers}
+        
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+        self.hedge_provider = None
+        if hedge:
+            if hedge_provider == 'alphavantage' and alpha_vantage_key:
+                # Hedges are optional work: never take quota an interactive call is waiting for
+                self.hedge_provider = AlphaVantageProvider(alpha_vantage_key, priority='background')
+            else:
+                hedge_provider = 'yfinance'
+                self.hedge_provider = YFinanceProvider()
+            self.hedge_name = f'{hedge_provider}-hedge'
+            self.breakers[self.hedge_name] = CircuitBreaker(self.hedge_name)
+            self._hedge_pool = ThreadPoolExecutor(max_workers=self.HEDGE_POOL_SIZE, thread_name_prefix='stock-hedge')
+            # One slot per pool worker, so submitted work never waits in the pool's queue
+            self._hedge_slots = threading.BoundedSemaphore(self.HEDGE_POOL_SIZE)
+        self._hedge_lock = threading.Lock()
+        self.hedge_counts = {
+            'requests': 0, 'hedged': 0, 'hedgeWins': 0, 'primaryWins': 0, 'hedgeErrors': 0, 'saturated': 0
+        }
+        self.cache_ttls = dict(self.CACHE_TTLS, **(cache_ttls or {}))
+        self.cache = TTLCache(max_entries=cache_size)
+        self.cache_codec = dict(self.CACHE_CODEC, float32=cache_float32)
+        self.inflight = SingleFlight()
+        self.shared_cache = shared_cache
+        self.store = store
+        self.archive = archive
+        self.archive_periods = dict(self.ARCHIVE_PERIODS)
+        if isinstance(self.primary_provider, AlphaVantageProvider):
+            # Alpha Vantage answers 24h with the last two daily bars, which the archive has too
+            self.archive_periods['24h'] = timedelta(days=2)
     
     def fetch_data(self, symbol: str, period: str, max_retries: int = 3) -> pd.DataFrame:
-        """Fetch stock data with automatic fallback"""
+        """Fetch stock data, serving from the cache when a fresh copy exists
+        
+        Concurrent misses for the same (symbol, period) share a single
+        upstream call and all receive its result or its error. With a shared
+        cache, that also holds across workers: a miss is looked up there and
+        filled by whichever worker gets to it first.
+        
+        Series are cached encoded (see price_codec) and every call decodes its
+        own frame over the cached bytes, so the returned frame is read-only;
+        copy it before modifying.
+        """
+        archived = self._fetch_from_archive(symbol, period)
+        if archived is not None:
+            return archived
+        return self._fetch_cached(
+            (symbol.upper(), period), self.cache_ttls.get(period, self.cache.default_ttl),
+            lambda: self._fetch_uncached(symbol, period, max_retries)
+        )
+    
+    def fetch_base(self, symbol: str, max_retries: int = 3) -> pd.DataFrame:
+        """The symbol's daily bars for the last BASE_DAYS, cached like fetch_data results
+        
+        Ranges and coarser intervals are all derived from this one series.
+        """
+        start = self._midnight() - timedelta(days=self.BASE_DAYS)
+        archived = self._read_archive(symbol, naive_epoch(start))
+        if archived is not None:
+            return archived
+        
+        def fetch_whole() -> pd.DataFrame:
+            return self._fetch_range_upstream(symbol, start, datetime.now(), max_retries)
+        
+        def fetch() -> pd.DataFrame:
+            if self.store is not None:
+                return self._fetch_window_with_store(symbol, start, fetch_whole, max_retries)
+            return fetch_whole()
+        
+        return self._fetch_cached((symbol.upper(), 'base'), self.BASE_TTL, fetch)
+    
+    def fetch_history(self, symbol: str, start: datetime, end: Optional[datetime] = None,
+                      interval: str = '1d', ohlc: bool = False, max_retries: int = 3) -> pd.DataFrame:
+        """
+        Bars between start and end, sliced out of the base series and resampled locally.
+        
+        Args:
+            symbol: Stock ticker symbol
+            start: Inclusive start (naive local time); at most BASE_DAYS ago
+            end: Inclusive end, or None for the latest bar
+            interval: '1d', '1wk' or '1mo' (see resample.INTERVALS)
+            ohlc: Aggregate each interval into Open/High/Low/Close columns
+        
+        Raises:
+            ValueError: If start is older than the base series or the interval is invalid
+        """
+        earliest = self._midnight() - timedelta(days=self.BASE_DAYS)
+        if start < earliest:
+            raise ValueError(f"start must be on or after {earliest:%Y-%m-%d} ({self.BASE_DAYS} days of history are kept)")
+        if interval not in INTERVALS:
+            raise ValueError(f"Invalid interval: {interval}. Must be one of: {', '.join(INTERVALS)}")
+        
+        df = slice_range(self.fetch_base(symbol, max_retries), start, end)
+        if interval != '1d' or ohlc:
+            with span('resample'):
+                df = resample_frame(df, interval, ohlc)
+        return df
+    
+    @staticmethod
+    def _midnight() -> datetime:
+        return datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    
+    def _fetch_cached(self, key: Tuple[str, str], ttl: float, fetch: Callable[[], pd.DataFrame]) -> pd.DataFrame:
+        """Serve key from the cache, or fetch it once across threads (and workers, with a shared cache)"""
+        cached = self.cache.get(key)
+        if cached is not None:
+            return decode_frame(cached)
+        
+        def fetch_encoded() -> bytes:
+            return encode_frame(fetch(), **self.cache_codec)
+        
+        def load() -> bytes:
+            if self.shared_cache is not None:
+                # Workers use the same encoding, so the bytes pass through as they are
+                data = self.shared_cache.get_or_fill(f'stock:{key[0]}:{key[1]}', fetch_encoded, ttl,
+                                                     encode=bytes, decode=bytes)
+            else:
+                data = fetch_encoded()
+            self.cache.set(key, data, ttl=ttl)
+            return data
+        
+        return decode_frame(self.inflight.do(key, load))
+    
+    def fetch_downsampled(self, symbol: str, period: str, max_points: int, max_retries: int = 3) -> pd.DataFrame:
+        """Fetch stock data reduced to at most max_points rows with LTTB
+        
+        The downsampled frame is cached next to the raw series, with the same TTL,
+        so repeat chart requests skip the downsampling as well as the fetch.
+        """
+        key = (symbol.upper(), period, 'lttb', max_points)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return decode_frame(cached)
+        
+        df = self.fetch_data(symbol, period, max_retries)
+        if len(df) <= max_points:
+            return df
+        with span('downsample'):
+            data = encode_frame(downsample_frame(df, max_points), **self.cache_codec)
+        self.cache.set(key, data, ttl=self.cache_ttls.get(period))
+        return decode_frame(data)
+    
+    def _fetch_from_archive(self, symbol: str, period: str) -> Optional[pd.DataFrame]:
+        """Slice period out of the archived series, or None if the archive cannot serve it
+        
+        The archive is skipped for symbols it does not hold, series not
+        refreshed within ARCHIVE_MAX_AGE and series starting after the period.
+        """
+        if period not in self.archive_periods:
+            return None
+        return self._read_archive(symbol, naive_epoch(self._midnight() - self.archive_periods[period]))
+    
+    def _read_archive(self, symbol: str, start_ts: int) -> Optional[pd.DataFrame]:
+        """Archived bars since start_ts, or None if the archive is missing, stale or starts later"""
+        if self.archive is None:
+            return None
         try:
-            return self.primary_provider.fetch_data(symbol, period, max_retries)
+            entry = self.archive.entry(symbol)
+        except ValueError:
+            return None
+        if entry is None or time.time() - entry['updatedAt'] > self.ARCHIVE_MAX_AGE:
+            return None
+        if entry['startTs'] > start_ts:
+            return None
+        with span('archive'):
+            df = self.archive.read(symbol, start_ts)
+        return df if df is not None and not df.empty else None
+    
+    def fetch_many(self, symbols: List[str], period: str, max_workers: int = 8,
+                   max_retries: int = 3) -> Dict[str, Any]:
+        """Fetch several symbols concurrently through a bounded thread pool
+        
+        Returns:
+            Dict mapping each symbol to its DataFrame, or to the Exception
+            raised while fetching it
+        """
+        results: Dict[str, Any] = {}
+        if not symbols:
+            return results
+        
+        def fetch_one(symbol: str) -> Any:
+            try:
+                return self.fetch_data(symbol, period, max_retries)
+            except Exception as e:
+                return e
+        
+        workers = max(1, min(max_workers, len(symbols)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='stock-batch') as pool:
+            # Workers inherit the caller's context so the request deadline applies to them
+            futures = [run_in_context(pool, fetch_one, symbol) for symbol in symbols]
+            for symbol, future in zip(symbols, futures):
+                results[symbol] = future.result()
+        return results
+    
+    def _fetch_uncached(self, symbol: str, period: str, max_retries: int = 3) -> pd.DataFrame:
+        """Fetch stock data from the price store and/or upstream"""
+        if self.store is not None and period in self.STORED_PERIODS:
+            return self._fetch_with_store(symbol, period, max_retries)
+        return self._fetch_upstream(symbol, period, max_retries)
+    
+    def _fetch_with_store(self, symbol: str, period: str, max_retries: int = 3) -> pd.DataFrame:
+        """Serve a period's daily bars from the price store (see _fetch_window_with_store)"""
+        return self._fetch_window_with_store(
+            symbol, datetime.now() - self.STORED_PERIODS[period],
+            lambda: self._fetch_upstream(symbol, period, max_retries), max_retries
+        )
+    
+    def _fetch_window_with_store(self, symbol: str, start: datetime, fetch_whole: Callable[[], pd.DataFrame],
+                                 max_retries: int = 3) -> pd.DataFrame:
+        """Serve daily bars since start from the price store, downloading only what it is missing
+        
+        The first request for a window fetches it whole (with fetch_whole).
+        Later requests re-fetch from the day of the newest stored bar (which
+        may have been incomplete) up to now and merge that delta into the store.
+        """
+        symbol = symbol.upper()
+        interval = self.STORE_INTERVAL
+        now = datetime.now()
+        start_ts = naive_epoch(start)
+        now_ts = naive_epoch(now)
+        
+        with span('store'):
+            coverage = self.store.coverage(symbol, interval)
+        if coverage is None or start_ts < coverage[0]:
+            df = fetch_whole()
+            with span('store'):
+                self.store.write(symbol, interval, df, start_ts, now_ts)
+            return df
+        
+        with span('store'):
+            last_ts = self.store.last_timestamp(symbol, interval) or coverage[1]
+        tail_start_ts = last_ts - last_ts % 86400
+        try:
+            delta = self._fetch_range_upstream(symbol, from_naive_epoch(tail_start_ts), now, max_retries)
+            with span('store'):
+                self.store.write(symbol, interval, delta, tail_start_ts, now_ts)
         except Exception as e:
-            if self.fallback_provider:
-                print(f"Primary provider failed, trying fallback: {e}")
-                return self.fallback_provider.fetch_data(symbol, period, max_retries)
+            print(f"Incremental fetch failed for {symbol}, serving stored bars: {e}")
+        
+        with span('store'):
+            df = self.store.read(symbol, interval, start_ts)
+        if df.empty:
+            raise NoDataError(f"No data available for {symbol} since {start:%Y-%m-%d}")
+        return df
+    
+    @staticmethod
+    def provider_name(provider: Any) -> str:
+        """Short name used for a provider's circuit breaker and in stats"""
+        return 'alphavantage' if isinstance(provider, AlphaVantageProvider) else 'yahoo'
+    
+    def _fetch_upstream(self, symbol: str, period: str, max_retries: int = 3) -> pd.DataFrame:
+        """Fetch stock data from the healthiest available provider"""
+        if self.hedge:
+            return self._fetch_hedged(symbol, period, max_retries)
+        return self._route(symbol, lambda provider, retries: provider.fetch_data(symbol, period, retries), max_retries)
+    
+    def hedge_delay(self) -> float:
+        """Seconds to wait on the routed provider before sending the hedge request
+        
+        Tracks the configured latency percentile of the currently preferred
+        provider, so only its slowest calls are hedged.
+        """
+        name, _ = rank_providers(self.providers, self.breakers)[0]
+        delay = self.breakers[name].latency_percentile(self.hedge_percentile)
+        if delay is None:
+            return self.HEDGE_DEFAULT_DELAY
+        return min(max(delay, self.HEDGE_MIN_DELAY), self.HEDGE_MAX_DELAY)
+    
+    def _count(self, name: str) -> None:
+        with self._hedge_lock:
+            self.hedge_counts[name] += 1
+    
+    def _submit_hedge_work(self, fn: Callable[..., Any], *args: Any) -> Optional[Future]:
+        """Run fn on an idle hedge pool worker, or return None if every worker is busy"""
+        if not self._hedge_slots.acquire(blocking=False):
+            return None
+        try:
+            future = run_in_context(self._hedge_pool, fn, *args)
+        except BaseException:
+            self._hedge_slots.release()
             raise
+        future.add_done_callback(lambda _: self._hedge_slots.release())
+        return future
+    
+    def _fetch_hedged(self, symbol: str, period: str, max_retries: int = 3) -> pd.DataFrame:
+        """Fetch through the normal route, hedging to a second provider if it is slow
+        
+        Whichever request succeeds first wins; a request already on the wire
+        cannot be interrupted, so the loser runs to completion in the
+        background and its result is dropped (its outcome still feeds its
+        provider's breaker). Primary and hedge calls only ever take idle
+        workers of the bounded hedge pool: when it is saturated the request
+        is not hedged and the primary runs on the calling thread.
+        """
+        self._count('requests')
+        call = lambda provider, retries: provider.fetch_data(symbol, period, retries)
+        # Started on an idle worker, so the hedge delay never includes time spent queued
+        primary = self._submit_hedge_work(self._route, symbol, call, max_retries)
+        if primary is None:
+            self._count('saturated')
+            return self._route(symbol, call, max_retries)
+        done, _ = wait([primary], timeout=self.hedge_delay())
+        if done:
+            if primary.exception() is None:
+                self._count('primaryWins')
+            return primary.result()
+        
+        breaker = self.breakers[self.hedge_name]
+        
+        def run_hedge() -> pd.DataFrame:
+            # Taken on the worker, so only a hedge that actually runs holds a half-open probe slot
+            if primary.done() or not breaker.allow_request():
+                raise CircuitOpenError(f"Hedge skipped for {symbol}")
+            self._count('hedged')
+            started = time.monotonic()
+            try:
+                df = self.hedge_provider.fetch_data(symbol, period, 1)
+            except Exception as e:
+                if isinstance(e, DeadlineExceeded) or is_client_error(e):
+                    breaker.release()
+                else:
+                    breaker.record_failure(time.monotonic() - started)
+                raise
+            breaker.record_success(time.monotonic() - started)
+            return df
+        
+        hedge = self._submit_hedge_work(run_hedge)
+        if hedge is None:
+            self._count('saturated')
+            return primary.result()
+        pending = {primary, hedge}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is not None:
+                    continue
+                self._count('primaryWins' if future is primary else 'hedgeWins')
+                return future.result()
+        
+        # Both failed: report the routed provider's error
+        if not isinstance(hedge.exception(), CircuitOpenError):
+            self._count('hedgeErrors')
+        return primary.result()
+    
+    def _fetch_range_upstream(self, symbol: str, start: datetime, end: datetime,
+                              max_retries: int = 3) -> pd.DataFrame:
+        """Fetch daily bars for a date range from the healthiest available provider"""
+        return self._route(
+            symbol,
+            lambda provider, retries: provider.fetch_range(symbol, start, end, self.STORE_INTERVAL, retries),
+            max_retries
+        )
+    
+    def _route(self, symbol: str, call: Callable[[Any, int], pd.DataFrame], max_retries: int = 3) -> pd.DataFrame:
+        """Run call against providers healthiest first, skipping any whose breaker is open
+        
+        A provider only gets the full retry budget while its recent calls
+        are clean or when nothing else is left to try; otherwise a single
+        attempt decides and the next provider is tried straight away.
+        
+        Raises:
+            CircuitOpenError: If every provider's breaker is open
+        """
+        candidates = rank_providers(self.providers, self.breakers)
+        last_error: Optional[Exception] = None
+        
+        for index, (name, provider) in enumerate(candidates):
+            breaker = self.breakers[name]
+            if not breaker.allow_request():
+                continue
+            
+            _, score, _ = breaker.health()
+            is_last = index == len(candidates) - 1
+            retries = max_retries if is_last or (score == 0 and breaker.state != HALF_OPEN) else 1
+            
+            started = time.monotonic()
+            try:
+                df = call(provider, retries)
+            except (DeadlineExceeded, NoDataError):
+                # Out of time for this request, or the symbol/range does not
+                # exist; no point trying another provider
+                breaker.release()
+                raise
+            except Exception as e:
+                last_error = e
+                if is_client_error(e):
+                    # Local quota or rejected request: says nothing about the provider's health
+                    breaker.release()
+                    continue
+                breaker.record_failure(time.monotonic() - started)
+                if not is_last:
+                    print(f"Provider {name} failed for {symbol}, trying next: {e}")
+            else:
+                breaker.record_success(time.monotonic() - started)
+                return df
+        
+        if last_error is not None:
+            raise last_error
+        retry_after = min(breaker.retry_after() for breaker in self.breakers.values())
+        raise CircuitOpenError(
+            f"All providers are unavailable for {symbol}, retry in {retry_after:.0f}s",
+            retry_after=retry_after
+        )
+    
+    def breaker_stats(self) -> Dict[str, Any]:
+        """Circuit breaker state for each provider"""
+        return {name: breaker.stats() for name, breaker in self.breakers.items()}
+    
+    def hedge_stats(self) -> Dict[str, Any]:
+        """Hedged request counters and the current hedge delay"""
+        with self._hedge_lock:
+            counts = dict(self.hedge_counts)
+        counts['enabled'] = self.hedge
+        counts['hedgeRate'] = counts['hedged'] / counts['requests'] if counts['requests'] else 0.0
+        counts['delay'] = self.hedge_delay() if self.hedge else None
+        return counts
@@ -0,0 +1,226 @@
+"""
+Offline tests for the Flask routes, with the upstream providers stubbed out
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import json
+
+import pandas as pd
+import pytest
+
+# Keep the tests from writing a price store next to the app
+os.environ.setdefault('PRICE_STORE_PATH', '')
+
+import app as backend
+from stock_data_provider import NoDataError
+
+
+def _frame(prices):
+    index = pd.date_range('2024-01-01', periods=len(prices), freq='D')
+    return pd.DataFrame({'Close': prices}, index=index)
+
+
+@pytest.fixture
+def client(monkeypatch):
+    def fake_fetch(symbol, period, max_retries=3):
+        if symbol == 'BAD':
+            raise NoDataError("No data found for symbol BAD")
+        return _frame([10.0, 11.0, 12.5])
+
+    backend.stock_provider.cache.clear()
+    monkeypatch.setattr(backend.stock_provider, '_fetch_uncached', fake_fetch)
+    return backend.app.test_client()
+
+
+def test_stock_data(client):
+    response = client.get('/api/stock-data?symbol=nvda&period=7d')
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['symbol'] == 'NVDA'
+    assert body['currentPrice'] == 12.5
+    assert body['prices'][0] == {'date': '2024-01-01T00:00:00', 'price': 10.0}
+
+
+def test_stock_data_rejects_unknown_period(client):
+    response = client.get('/api/stock-data?symbol=NVDA&period=5y')
+    assert response.status_code == 400
+
+
+def test_batch_reports_per_symbol_errors(client):
+    response = client.get('/api/stock-data/batch?symbols=NVDA,bad,AAPL,nvda&period=30d')
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['count'] == 3
+    assert body['errors'] == 1
+    assert set(body['results']) == {'NVDA', 'BAD', 'AAPL'}
+    assert body['results']['AAPL']['currentPrice'] == 12.5
+    assert 'error' in body['results']['BAD']
+
+
+def test_batch_requires_symbols(client):
+    assert client.get('/api/stock-data/batch?period=30d').status_code == 400
+
+
+def test_stock_data_columnar_format(client):
+    response = client.get('/api/stock-data?symbol=NVDA&period=7d&format=columnar')
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['dates'] == ['2024-01-01T00:00:00', '2024-01-02T00:00:00', '2024-01-03T00:00:00']
+    assert body['prices'] == [10.0, 11.0, 12.5]
+    assert body['currentPrice'] == 12.5
+
+    assert client.get('/api/stock-data?symbol=NVDA&format=csv').status_code == 400
+
+
+def test_metrics_endpoint_reports_route_latency(client):
+    client.get('/api/health')
+    response = client.get('/api/metrics')
+
+    assert response.status_code == 200
+    assert response.content_type.startswith('text/plain')
+    text = response.get_data(as_text=True)
+    assert 'http_requests_total{route="/api/health",method="GET",status="200"}' in text
+    assert 'cache_hit_ratio{cache="stock"}' in text
+
+
+def test_stock_data_reports_server_timing(client):
+    response = client.get('/api/stock-data?symbol=NVDA&period=7d')
+    timing = response.headers['Server-Timing']
+    assert 'serialize;dur=' in timing
+    assert 'jsonify;dur=' in timing
+    assert timing.split(', ')[-1].startswith('total;dur=')
+
+
+POOLS = [{'symbol': 'NVDAon', 'poolTVL': 2000.0, 'fees24h': 1.0, 'volume24h': 100.0,
+          'fees30d': 30.0, 'volume30d': 3000.0, 'apr': 20.0}]
+
+
+def test_comparison_joins_prices_with_pool(client, monkeypatch):
+    monkeypatch.setattr(backend.vaulto_refresher, 'snapshot', lambda: {'stocks': POOLS})
+    response = client.get('/api/comparison?symbol=NVDAon&period=30d&investment=1000')
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['symbol'] == 'NVDA'
+    assert body['calculationResult']['userTVLFraction'] == 0.5
+    assert body['calculationResult']['feesClaimed'] == 15.0
+    assert body['calculationResult']['traditionalReturn'] == 250.0
+    assert body['chartData'][-1] == {'date': '2024-01-03T00:00:00', 'traditionalValue': 1250.0, 'tokenizedValue': 1265.0}
+    assert body['apr'] == 10.0
+    assert 'max-age=' in response.headers['Cache-Control']
+
+    revalidated = client.get('/api/comparison?symbol=nvda&period=30d&investment=1000',
+                             headers={'If-None-Match': response.headers['ETag']})
+    assert revalidated.status_code == 304
+
+
+def test_comparison_validates_inputs(client, monkeypatch):
+    monkeypatch.setattr(backend.vaulto_refresher, 'snapshot', lambda: {'stocks': POOLS})
+    assert client.get('/api/comparison?symbol=NVDA&period=30d&investment=0.5').status_code == 400
+    assert client.get('/api/comparison?symbol=NVDA&period=30d').status_code == 400
+    assert client.get('/api/comparison?symbol=AAPL&period=30d&investment=100').status_code == 404
+
+
+def test_comparison_sweep_streams_ndjson(client, monkeypatch):
+    monkeypatch.setattr(backend.vaulto_refresher, 'snapshot', lambda: {'stocks': POOLS})
+    response = client.get('/api/comparison/sweep?investments=1000,4000&periods=7d,30d')
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert lines[0] == {'symbols': ['NVDA'], 'periods': ['7d', '30d'], 'investments': [1000.0, 4000.0]}
+    assert [(line['symbol'], line['period']) for line in lines[1:]] == [('NVDA', '7d'), ('NVDA', '30d')]
+    thirty_days = lines[2]
+    assert thirty_days['userTVLFraction'] == [0.5, 1.0]
+    assert thirty_days['feesClaimed'] == [15.0, 30.0]
+    assert thirty_days['tokenizedReturn'] == [265.0, 1030.0]
+
+    assert client.get('/api/comparison/sweep?periods=30d').status_code == 400
+    assert client.get('/api/comparison/sweep?investments=100&symbols=AAPL').status_code == 404
+
+
+def test_stock_data_streams_ndjson(client):
+    response = client.get('/api/stock-data?symbol=NVDA&period=7d&stream=ndjson')
+    assert response.mimetype == 'application/x-ndjson'
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert lines[0] == {'symbol': 'NVDA', 'count': 3, 'currentPrice': 12.5}
+    assert lines[1:] == [
+        {'date': '2024-01-01T00:00:00', 'price': 10.0},
+        {'date': '2024-01-02T00:00:00', 'price': 11.0},
+        {'date': '2024-01-03T00:00:00', 'price': 12.5}
+    ]
+
+    for response_format in ('rows', 'columnar'):
+        chunked = client.get(f'/api/stock-data?symbol=NVDA&period=7d&format={response_format}&stream=json')
+        buffered = client.get(f'/api/stock-data?symbol=NVDA&period=7d&format={response_format}')
+        assert json.loads(chunked.get_data()) == buffered.get_json()
+
+
+def test_unknown_symbol_is_not_found(client):
+    response = client.get('/api/stock-data?symbol=bad&period=7d')
+    assert response.status_code == 404
+    assert response.get_json()['error'] == 'No data found for symbol BAD'
+
+
+def test_stock_data_downsamples_to_max_points(client, monkeypatch):
+    closes = [100.0 + (i % 7) for i in range(300)]
+    monkeypatch.setattr(backend.stock_provider, '_fetch_uncached',
+                        lambda symbol, period, max_retries=3: _frame(closes))
+
+    body = client.get('/api/stock-data?symbol=NVDA&period=30d&maxPoints=50&format=columnar').get_json()
+    assert len(body['prices']) == 50
+    assert body['dates'][0] == '2024-01-01T00:00:00'
+    assert body['currentPrice'] == closes[-1]
+    assert backend.stock_provider.cache.get(('NVDA', '30d', 'lttb', 50)) is not None
+
+    assert len(client.get('/api/stock-data?symbol=NVDA&period=30d').get_json()['prices']) == 300
+    assert client.get('/api/stock-data?symbol=NVDA&period=30d&maxPoints=2').status_code == 400
+
+
+def test_stock_data_date_range_is_resampled_from_base_series(client, monkeypatch):
+    calls = []
+    # Relative to today so the range stays inside the provider's base window
+    base = (pd.Timestamp.today().normalize() - pd.DateOffset(months=4)).replace(day=1)
+    first_month, second_month = base.days_in_month, (base + pd.offsets.MonthBegin(1)).days_in_month
+
+    def fake_range(symbol, start, end, max_retries=3):
+        calls.append(symbol)
+        index = pd.date_range(base, periods=90, freq='D')
+        return pd.DataFrame({'Close': [float(i) for i in range(len(index))]}, index=index)
+
+    def day(offset):
+        return (base + pd.Timedelta(days=offset)).strftime('%Y-%m-%d')
+
+    monkeypatch.setattr(backend.stock_provider, '_fetch_range_upstream', fake_range)
+
+    body = client.get(f'/api/stock-data?symbol=NVDA&start={day(9)}&end={day(19)}').get_json()
+    assert [p['date'][:10] for p in body['prices']][::10] == [day(9), day(19)]
+    assert body['currentPrice'] == 19.0
+
+    month_ends = [first_month - 1, first_month + second_month - 1]
+    body = client.get(f'/api/stock-data?symbol=NVDA&start={day(0)}&end={day(month_ends[1])}'
+                      '&interval=1mo&ohlc=true&format=columnar').get_json()
+    assert body['dates'] == [f'{day(offset)}T00:00:00' for offset in month_ends]
+    assert body['opens'] == [0.0, float(first_month)]
+    assert body['highs'] == body['prices'] == [float(offset) for offset in month_ends]
+    assert body['lows'] == [0.0, float(first_month)]
+
+    # Weekly bars end on Sundays
+    sunday = (6 - base.weekday()) % 7
+    rows = client.get(f'/api/stock-data?symbol=NVDA&start={day(0)}&interval=1wk&ohlc=1').get_json()['prices']
+    assert rows[0] == {'date': f'{day(sunday)}T00:00:00', 'price': float(sunday), 'open': 0.0, 'high': float(sunday), 'low': 0.0}
+    # Every range and interval above came from one cached base series
+    assert calls == ['NVDA']
+
+    assert client.get('/api/stock-data?symbol=NVDA&start=yesterday').status_code == 400
+    assert client.get(f'/api/stock-data?symbol=NVDA&end={day(0)}').status_code == 400
+    assert client.get(f'/api/stock-data?symbol=NVDA&start={day(31)}&end={day(0)}').status_code == 400
+    assert client.get(f'/api/stock-data?symbol=NVDA&start={day(0)}&interval=1h').status_code == 400
+    assert client.get('/api/stock-data?symbol=NVDA&start=1990-01-01').status_code == 400
+
+
+def test_stock_data_accepts_longer_periods(client):
+    for period in ('3m', '6m', '1y'):
+        body = client.get(f'/api/stock-data?symbol=NVDA&period={period}&interval=1wk').get_json()
+        assert body['prices'][-1]['price'] == 12.5
@@ -0,0 +1,118 @@
+"""
+Offline tests for the asyncio serving mode, with upstream HTTP mocked by httpx.MockTransport
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import asyncio
+import json
+
+import httpx
+
+import async_app
+from async_providers import AsyncStockDataProvider, AsyncYahooFinanceDirectProvider
+
+CHART = {
+    'chart': {
+        'result': [{
+            'timestamp': [1704205800, 1704292200, 1704378600],
+            'indicators': {'quote': [{'close': [185.5, None, 184.25]}]}
+        }]
+    }
+}
+
+
+def test_async_yahoo_provider_parses_chart():
+    requested = []
+
+    def handler(request):
+        requested.append(request.url.path)
+        return httpx.Response(200, json=CHART)
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            return await AsyncYahooFinanceDirectProvider(client).fetch_data('NVDA', '7d')
+
+    df = asyncio.run(run())
+    assert requested == ['/v8/finance/chart/NVDA']
+    assert list(df['Close']) == [185.5, 184.25]
+
+
+def test_concurrent_requests_share_one_upstream_call():
+    calls = []
+
+    async def handler(request):
+        calls.append(request.url.path)
+        await asyncio.sleep(0.05)
+        return httpx.Response(200, json=CHART)
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            provider = AsyncStockDataProvider(client)
+            return await provider.fetch_many(['AAPL', 'AAPL', 'MSFT'], '30d')
+
+    results = asyncio.run(run())
+    assert sorted(calls) == ['/v8/finance/chart/AAPL', '/v8/finance/chart/MSFT']
+    assert set(results) == {'AAPL', 'MSFT'}
+
+
+def test_routes_match_flask_response_shapes():
+    def upstream(request):
+        return httpx.Response(200, json=CHART)
+
+    async def run():
+        async_app.state.client = httpx.AsyncClient(transport=httpx.MockTransport(upstream))
+        async_app.state.stock_provider = AsyncStockDataProvider(async_app.state.client)
+        transport = httpx.ASGITransport(app=async_app.app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://test') as client:
+            ok = await client.get('/api/stock-data', params={'symbol': 'nvda', 'period': '7d'})
+            bad = await client.get('/api/stock-data', params={'symbol': 'NVDA', 'period': '5y'})
+            ranged = await client.get('/api/stock-data', params={'symbol': 'NVDA', 'start': '2024-01-10', 'interval': '1wk'})
+            missing = await client.get('/api/nope')
+        await async_app.state.client.aclose()
+        async_app.state.client = None
+        return ok, bad, ranged, missing
+
+    ok, bad, ranged, missing = asyncio.run(run())
+    assert ok.status_code == 200
+    assert ok.headers['access-control-allow-origin'] == '*'
+    body = ok.json()
+    assert body['symbol'] == 'NVDA'
+    assert body['currentPrice'] == 184.25
+    assert len(body['prices']) == 2
+    assert bad.status_code == 400
+    assert ranged.status_code == 501
+    assert 'start, interval' in ranged.json()['error']
+    assert missing.status_code == 404
+
+
+def test_comparison_sweep_streams_ndjson():
+    pools = [{'symbol': 'NVDAon', 'poolTVL': 2000.0, 'fees24h': 1.0, 'volume24h': 100.0,
+              'fees30d': 30.0, 'volume30d': 3000.0, 'apr': 20.0}]
+
+    def upstream(request):
+        return httpx.Response(200, json=CHART)
+
+    async def run():
+        async_app.state.client = httpx.AsyncClient(transport=httpx.MockTransport(upstream))
+        async_app.state.stock_provider = AsyncStockDataProvider(async_app.state.client)
+        async_app.state.vaulto.record_success(pools)
+        transport = httpx.ASGITransport(app=async_app.app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://test') as client:
+            ok = await client.get('/api/comparison/sweep', params={'investments': '1000,4000', 'periods': '7d'})
+            bad = await client.get('/api/comparison/sweep', params={'investments': '1000', 'periods': '5y'})
+            unknown = await client.get('/api/comparison/sweep', params={'investments': '100', 'symbols': 'AAPL'})
+        await async_app.state.client.aclose()
+        async_app.state.client = None
+        return ok, bad, unknown
+
+    ok, bad, unknown = asyncio.run(run())
+    assert ok.status_code == 200
+    assert ok.headers['content-type'].startswith('application/x-ndjson')
+    lines = [json.loads(line) for line in ok.text.splitlines()]
+    assert lines[0] == {'symbols': ['NVDA'], 'periods': ['7d'], 'investments': [1000.0, 4000.0]}
+    assert lines[1]['symbol'] == 'NVDA'
+    assert lines[1]['userTVLFraction'] == [0.5, 1.0]
+    assert bad.status_code == 400
+    assert unknown.status_code == 404
@@ -0,0 +1,96 @@
+"""
+Offline tests for the TTL/LRU response cache and its use in StockDataProvider
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import threading
+import time
+import pandas as pd
+
+from cache import TTLCache
+from stock_data_provider import StockDataProvider
+
+
+def _frame(prices):
+    index = pd.date_range('2024-01-01', periods=len(prices), freq='D')
+    return pd.DataFrame({'Close': prices}, index=index)
+
+
+def test_ttl_expiry():
+    cache = TTLCache(max_entries=4)
+    cache.set('a', 1, ttl=0.05)
+    assert cache.get('a') == 1
+    time.sleep(0.06)
+    assert cache.get('a') is None
+    stats = cache.stats()
+    assert stats['hits'] == 1
+    assert stats['misses'] == 1
+    assert stats['expirations'] == 1
+
+
+def test_lru_eviction():
+    cache = TTLCache(max_entries=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')  # 'b' is now least recently used
+    cache.set('c', 3)
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+    assert cache.stats()['evictions'] == 1
+
+
+def test_provider_serves_repeat_requests_from_cache():
+    provider = StockDataProvider()
+    calls = []
+
+    def fake_fetch(symbol, period, max_retries=3):
+        calls.append((symbol, period))
+        return _frame([1.0, 2.0, 3.0])
+
+    provider.primary_provider.fetch_data = fake_fetch
+
+    first = provider.fetch_data('nvda', '30d')
+    first['Close'] = 0.0  # callers get their own copy
+    second = provider.fetch_data('NVDA', '30d')
+    provider.fetch_data('NVDA', '7d')
+
+    assert calls == [('nvda', '30d'), ('NVDA', '7d')]
+    assert list(second['Close']) == [1.0, 2.0, 3.0]
+    assert provider.cache.stats()['hits'] == 1
+
+
+def test_concurrent_misses_share_one_upstream_call():
+    provider = StockDataProvider()
+    calls = []
+    release = threading.Event()
+
+    def slow_fetch(symbol, period, max_retries=3):
+        calls.append(symbol)
+        release.wait(2)
+        raise Exception("Yahoo Finance API error")
+
+    provider.primary_provider.fetch_data = slow_fetch
+
+    errors = []
+
+    def worker():
+        try:
+            provider.fetch_data('AAPL', '24h')
+        except Exception as e:
+            errors.append(str(e))
+
+    threads = [threading.Thread(target=worker) for _ in range(5)]
+    for t in threads:
+        t.start()
+    while provider.inflight.stats()['coalesced'] < 4:
+        time.sleep(0.01)
+    release.set()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert errors == ["Yahoo Finance API error"] * 5
+    assert provider.inflight.in_flight() == 0
@@ -0,0 +1,71 @@
+"""
+Offline tests for the server-side return model (calculations.py)
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import pytest
+
+from calculations import (
+    calculate_returns, chart_values, fees_for_period, find_pool, parse_investment, parse_investment_grid,
+    sweep_returns, tvl_fraction
+)
+
+STOCK = {'symbol': 'TSLAon', 'poolTVL': 500.0, 'fees24h': 2.0, 'volume24h': 10.0,
+         'fees30d': 60.0, 'volume30d': 300.0, 'apr': None}
+
+
+def test_fees_for_period_matches_frontend():
+    assert fees_for_period(STOCK, '24h') == 2.0
+    assert fees_for_period(STOCK, '7d') == 14.0
+    assert fees_for_period(STOCK, '30d') == 60.0
+    assert fees_for_period(STOCK, '3m') == pytest.approx(180.0)
+    assert fees_for_period(STOCK, '1y') == pytest.approx(730.0)
+
+
+def test_tvl_fraction_caps_and_broadcasts():
+    assert tvl_fraction(1000, 500) == 1.0
+    assert tvl_fraction(10, 0) == 1.0
+    fractions = tvl_fraction(np.array([[50.0], [250.0]]), np.array([100.0, 500.0]))
+    assert fractions.tolist() == [[0.5, 0.1], [1.0, 0.5]]
+
+
+def test_returns_and_chart_agree_at_the_last_point():
+    closes = np.array([100.0, 90.0, 120.0])
+    result = calculate_returns(250.0, 500.0, 60.0, closes[0], closes[-1])
+    traditional, tokenized = chart_values(closes, 250.0, 500.0, 60.0)
+
+    assert result['tokenizedReturn'] == pytest.approx(50.0 + 30.0)
+    assert traditional.tolist() == pytest.approx([250.0, 225.0, 300.0])
+    assert tokenized[-1] == pytest.approx(result['totalTokenizedValue'])
+
+
+def test_find_pool_and_parse_investment():
+    assert find_pool([STOCK], 'tsla') is STOCK
+    assert find_pool([STOCK], 'TSLAon') is STOCK
+    assert find_pool([STOCK], 'NVDA') is None
+    assert parse_investment('1500.5') == 1500.5
+    for raw in (None, 'abc', '0.5', 'inf'):
+        with pytest.raises(ValueError):
+            parse_investment(raw)
+
+
+def test_sweep_matches_scalar_model():
+    investments = parse_investment_grid(None, '10', '10000', '7')
+    assert investments[0] == 10.0 and investments[-1] == 10000.0 and len(investments) == 7
+
+    pool_tvl = np.array([500.0, 0.0])
+    total_fees = np.array([[14.0, 60.0], [5.0, 7.0]])
+    starts = np.array([[100.0, 80.0], [10.0, 12.0]])
+    ends = np.array([[110.0, 120.0], [9.0, 15.0]])
+    grid = sweep_returns(investments, pool_tvl, total_fees, starts, ends)
+
+    assert grid['tokenizedReturn'].shape == (2, 2, 7)
+    for s in range(2):
+        for p in range(2):
+            for i, investment in enumerate(investments):
+                expected = calculate_returns(investment, pool_tvl[s], total_fees[s, p], starts[s, p], ends[s, p])
+                assert grid['tokenizedReturn'][s, p, i] == pytest.approx(expected['tokenizedReturn'])
+                assert grid['userTVLFraction'][s, i] == pytest.approx(expected['userTVLFraction'])
@@ -0,0 +1,140 @@
+"""
+Offline tests for provider circuit breakers and health-based routing
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import json
+import time
+
+import pandas as pd
+import pytest
+import requests
+
+import stock_data_provider
+from circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+from stock_data_provider import NoDataError, StockDataProvider, YahooFinanceDirectProvider
+
+CHART = {'chart': {'result': [{
+    'timestamp': [1704205800],
+    'indicators': {'quote': [{'close': [185.5]}]}
+}], 'error': None}}
+
+
+class FakeProvider:
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.calls = []
+
+    def fetch_data(self, symbol, period, max_retries=3):
+        self.calls.append(max_retries)
+        if self.fail:
+            raise Exception("HTTP 429: Too Many Requests")
+        return pd.DataFrame({'Close': [1.0]}, index=pd.to_datetime(['2024-01-02']))
+
+
+def make_provider(primary, fallback, **breaker_args):
+    provider = StockDataProvider()
+    provider.providers = [('primary', primary), ('fallback', fallback)]
+    provider.breakers = {name: CircuitBreaker(name, **breaker_args) for name, _ in provider.providers}
+    return provider
+
+
+def test_breaker_opens_on_failure_rate_and_recovers_through_probe():
+    breaker = CircuitBreaker('yahoo', min_calls=4, failure_threshold=0.5, open_seconds=0.05)
+    breaker.record_success(0.1)
+    breaker.record_success(0.1)
+    breaker.record_failure(0.1)
+    assert breaker.state == CLOSED
+    breaker.record_failure(0.1)
+    assert breaker.state == OPEN
+    assert not breaker.allow_request()
+
+    time.sleep(0.06)
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow_request()
+    # Only one probe at a time
+    assert not breaker.allow_request()
+    breaker.record_success(0.1)
+    assert breaker.state == CLOSED
+
+
+def test_failed_probe_reopens_breaker():
+    breaker = CircuitBreaker('yahoo', min_calls=1, open_seconds=0.05)
+    breaker.record_failure(0.1)
+    time.sleep(0.06)
+    assert breaker.allow_request()
+    breaker.record_failure(0.1)
+    assert breaker.state == OPEN
+    assert breaker.times_opened == 2
+
+
+def test_slow_calls_trip_breaker():
+    breaker = CircuitBreaker('alphavantage', min_calls=2, slow_call_seconds=1.0, slow_call_threshold=1.0)
+    breaker.record_success(2.0)
+    breaker.record_success(3.0)
+    assert breaker.state == OPEN
+
+
+def test_routing_skips_tripped_provider():
+    primary, fallback = FakeProvider(fail=True), FakeProvider()
+    provider = make_provider(primary, fallback, min_calls=1, open_seconds=60)
+
+    for _ in range(3):
+        provider._fetch_upstream('AAPL', '7d')
+
+    # Once tripped the primary is not called at all
+    assert primary.calls == [3]
+    assert fallback.calls == [3, 3, 3]
+    assert provider.breakers['primary'].state == OPEN
+
+
+def test_unhealthy_provider_gets_single_attempt_before_fallback():
+    primary, fallback = FakeProvider(fail=True), FakeProvider()
+    provider = make_provider(primary, fallback, min_calls=10)
+    provider.breakers['primary'].record_failure(0.1)
+    provider.breakers['fallback'].record_failure(0.1)
+
+    provider._fetch_upstream('AAPL', '7d')
+
+    # Equal health keeps the configured order, but neither is clean, so the
+    # primary gets one attempt before falling through
+    assert primary.calls == [1]
+    assert fallback.calls == [3]
+
+
+def test_all_breakers_open_fails_fast():
+    provider = make_provider(FakeProvider(fail=True), FakeProvider(fail=True), min_calls=1, open_seconds=60)
+    with pytest.raises(Exception):
+        provider._fetch_upstream('AAPL', '7d')
+
+    with pytest.raises(CircuitOpenError) as excinfo:
+        provider._fetch_upstream('AAPL', '7d')
+    assert excinfo.value.retry_after > 0
+
+
+def test_unknown_symbols_leave_breaker_closed(monkeypatch):
+    def chart_response(status, body):
+        response = requests.Response()
+        response.status_code = status
+        response._content = json.dumps(body).encode('utf-8')
+        return response
+
+    class FakeSessions:
+        def get(self, url, **kwargs):
+            if '/NOPE' in url:
+                return chart_response(404, {'chart': {'result': None, 'error': {'code': 'Not Found'}}})
+            if '/EMPTY' in url:
+                return chart_response(200, {'chart': {'result': [], 'error': None}})
+            return chart_response(200, CHART)
+
+    monkeypatch.setattr(stock_data_provider, 'get_session_pool', FakeSessions)
+    provider = make_provider(YahooFinanceDirectProvider(), FakeProvider(fail=True), min_calls=1, open_seconds=60)
+    for symbol in ['NOPE', 'EMPTY'] * 3:
+        with pytest.raises(NoDataError):
+            provider._fetch_upstream(symbol, '7d')
+
+    assert provider.breakers['primary'].state == CLOSED
+    assert provider.breakers['fallback'].state == CLOSED
+    assert list(provider._fetch_upstream('AAPL', '24h')['Close']) == [185.5]
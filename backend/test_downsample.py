@@ -0,0 +1,57 @@
+"""
+Offline tests for LTTB downsampling
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import pandas as pd
+
+import downsample
+from downsample import downsample_frame, lttb_indices
+
+
+def _reference_lttb(x, y, max_points):
+    """Textbook bucket-by-bucket LTTB"""
+    n = len(x)
+    buckets = max_points - 2
+    edge = lambda b: b * (n - 2) // buckets + 1 if b <= buckets else n
+    selected, previous = [0], 0
+    for b in range(buckets):
+        avg_x, avg_y = np.mean(x[edge(b + 1):edge(b + 2)]), np.mean(y[edge(b + 1):edge(b + 2)])
+        start, end = edge(b), edge(b + 1)
+        area = np.abs((x[previous] - avg_x) * (y[start:end] - y[previous]) - (x[previous] - x[start:end]) * (avg_y - y[previous]))
+        previous = start + int(np.argmax(area))
+        selected.append(previous)
+    return selected + [n - 1]
+
+
+def test_matches_reference_implementation():
+    rng = np.random.default_rng(7)
+    for n, max_points in [(10, 3), (17, 13), (262, 100), (1000, 999), (5000, 700)]:
+        x = np.cumsum(rng.uniform(1, 5, n))
+        y = np.round(np.cumsum(rng.normal(0, 1, n)), 1)  # rounding creates ties
+        assert lttb_indices(x, y, max_points).tolist() == _reference_lttb(x, y, max_points)
+
+
+def test_sequential_fallback_matches(monkeypatch):
+    rng = np.random.default_rng(11)
+    x = np.arange(3000, dtype='float64')
+    y = np.cumsum(rng.normal(0, 1, 3000))
+    expected = lttb_indices(x, y, 250)
+    monkeypatch.setattr(downsample, 'MAX_PASSES', 0)
+    assert lttb_indices(x, y, 250).tolist() == expected.tolist()
+
+
+def test_downsample_frame_keeps_endpoints_and_peaks():
+    index = pd.date_range('2024-01-01', periods=500, freq='D')
+    close = np.full(500, 100.0)
+    close[123] = 250.0
+    df = pd.DataFrame({'Close': close}, index=index)
+
+    sampled = downsample_frame(df, 20)
+    assert len(sampled) == 20
+    assert sampled.index[0] == index[0] and sampled.index[-1] == index[-1]
+    assert sampled['Close'].max() == 250.0
+    assert downsample_frame(df, 1000) is df
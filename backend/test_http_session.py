@@ -0,0 +1,61 @@
+"""
+Offline tests for the pooled upstream HTTP sessions, against a local keep-alive server
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from http_session import SessionPool, parse_pool_sizes
+
+
+class _OkHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        body = b'{"ok": true}'
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server_url():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _OkHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_parse_pool_sizes():
+    assert parse_pool_sizes('') == {}
+    assert parse_pool_sizes('Query1.Finance.Yahoo.com=32, www.alphavantage.co=2') == {
+        'query1.finance.yahoo.com': 32,
+        'www.alphavantage.co': 2,
+    }
+    with pytest.raises(ValueError):
+        parse_pool_sizes('stake.vaulto.ai')
+
+
+def test_sequential_requests_reuse_one_connection(server_url):
+    pool = SessionPool(pool_sizes={'127.0.0.1': 3})
+    for _ in range(5):
+        assert pool.get(f"{server_url}/chart", timeout=5).json() == {'ok': True}
+
+    stats = pool.stats()['127.0.0.1']
+    assert stats['requests'] == 5
+    assert stats['poolSize'] == 3
+    assert stats['connectionsOpened'] == 1
+    assert stats['idleConnections'] == 1
+    pool.close()
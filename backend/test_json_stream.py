@@ -0,0 +1,52 @@
+"""
+Offline tests for the incremental JSON parser used on Alpha Vantage bodies
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import json
+
+import pytest
+
+from json_stream import stream_object
+
+SERIES = {
+    'Meta Data': {'2. Symbol': 'NVDA', 'note': 'café },'},
+    'Time Series (Daily)': {
+        f'2024-01-{day:02d}': {'4. close': f'{100 + day}.5', 'nested': {'x': [day, 1e-3]}}
+        for day in range(1, 29)
+    },
+    'trailer': -12.5e2
+}
+
+
+def _chunks(body: bytes, size: int):
+    return [body[i:i + size] for i in range(0, len(body), size)]
+
+
+@pytest.mark.parametrize('size', [1, 3, 17, 256, 1 << 20])
+@pytest.mark.parametrize('indent', [None, 2])
+def test_streamed_items_match_json_loads(size, indent):
+    body = json.dumps(SERIES, indent=indent, ensure_ascii=False).encode('utf-8')
+    parser, items = stream_object(_chunks(body, size), lambda key: 'Time Series' in key)
+
+    assert parser.header['Meta Data'] == SERIES['Meta Data']
+    assert parser.stream_key == 'Time Series (Daily)'
+    assert list(items) == list(SERIES['Time Series (Daily)'].items())
+    assert parser.header['trailer'] == -1250.0
+    assert parser.done
+
+
+def test_error_payload_has_no_stream():
+    parser, items = stream_object(_chunks(b'{"Error Message": "Invalid API call"}', 5), lambda key: 'Time Series' in key)
+    assert list(items) == []
+    assert parser.stream_key is None
+    assert parser.header == {'Error Message': 'Invalid API call'}
+
+
+def test_truncated_body_raises():
+    parser, items = stream_object([b'{"Time Series (Daily)": {"2024-01-02": {"4. close": "1"},'],
+                                  lambda key: 'Time Series' in key)
+    with pytest.raises(ValueError):
+        list(items)
@@ -0,0 +1,47 @@
+"""
+Offline tests for the Prometheus-style metrics module
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+
+from metrics import CallbackMetric, Counter, Histogram, UPSTREAM_REQUESTS, render, track_upstream
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram('latency_seconds', 'Latency', ('route',), buckets=(0.1, 1.0))
+    histogram.observe(0.05, '/a')
+    histogram.observe(0.1, '/a')
+    histogram.observe(3.0, '/a')
+
+    lines = histogram.render()
+    assert 'latency_seconds_bucket{route="/a",le="0.1"} 2' in lines
+    assert 'latency_seconds_bucket{route="/a",le="1"} 2' in lines
+    assert 'latency_seconds_bucket{route="/a",le="+Inf"} 3' in lines
+    assert 'latency_seconds_count{route="/a"} 3' in lines
+    assert '# TYPE latency_seconds histogram' in lines
+
+
+def test_counter_escapes_label_values():
+    counter = Counter('things_total', 'Things', ('name',))
+    counter.inc('say "hi"')
+    counter.inc('say "hi"', amount=2)
+    assert 'things_total{name="say \\"hi\\""} 3' in counter.render()
+
+
+def test_track_upstream_counts_errors():
+    before = UPSTREAM_REQUESTS.value('test_provider', 'error')
+    with pytest.raises(RuntimeError):
+        with track_upstream('test_provider'):
+            raise RuntimeError('boom')
+    assert UPSTREAM_REQUESTS.value('test_provider', 'error') == before + 1
+
+
+def test_render_includes_callback_metrics():
+    gauge = CallbackMetric('queue_depth', 'gauge', 'Depth', ('queue',), lambda: {('a',): 4, ('b',): None})
+    text = render([gauge])
+    assert 'queue_depth{queue="a"} 4' in text
+    assert 'queue="b"' not in text
+    assert text.endswith('\n')
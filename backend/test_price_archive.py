@@ -0,0 +1,103 @@
+"""
+Offline tests for the memory-mapped price archive
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pytest
+
+from price_archive import PriceArchive, main
+from price_store import naive_epoch
+from rate_limiter import RateLimitExceeded
+from stock_data_provider import AlphaVantageProvider, StockDataProvider
+
+
+def _daily_frame(days, base=100.0):
+    end = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    index = pd.date_range(end=end, periods=days, freq='D', name='Date')
+    return pd.DataFrame({'Close': [base + i for i in range(days)]}, index=index)
+
+
+def test_read_slices_mapped_series(tmp_path):
+    archive = PriceArchive(str(tmp_path))
+    df = _daily_frame(400)
+    archive.write('nvda', df.iloc[::-1])
+
+    start_ts = naive_epoch(df.index[-10].to_pydatetime())
+    end_ts = naive_epoch(df.index[-5].to_pydatetime())
+    read = archive.read('NVDA', start_ts, end_ts)
+    assert list(read['Close']) == list(df['Close'].iloc[-10:-4])
+    assert read.index.equals(df.index[-10:-4])
+    assert not read['Close'].to_numpy().flags.writeable
+    assert archive.read('AAPL', start_ts) is None
+    assert archive.stats()['bars'] == 400
+
+    with pytest.raises(ValueError):
+        archive.read('../etc', start_ts)
+
+
+def test_other_processes_see_rewrites(tmp_path):
+    writer = PriceArchive(str(tmp_path))
+    reader = PriceArchive(str(tmp_path))
+    writer.write('NVDA', _daily_frame(5))
+    assert reader.read('NVDA', 0)['Close'].iloc[-1] == 104.0
+
+    old = reader.read('NVDA', 0)
+    writer.write('NVDA', _daily_frame(5, base=200.0))
+    assert reader.read('NVDA', 0)['Close'].iloc[-1] == 204.0
+    # Frames over the previous mapping stay readable
+    assert old['Close'].iloc[-1] == 104.0
+
+
+def test_provider_serves_fresh_archived_series(tmp_path):
+    archive = PriceArchive(str(tmp_path))
+    archive.write('NVDA', _daily_frame(400))
+    provider = StockDataProvider(archive=archive)
+
+    def fetch(symbol, period, max_retries=3):
+        raise AssertionError("should be served from the archive")
+
+    provider._fetch_uncached = fetch
+    df = provider.fetch_data('nvda', '30d')
+    assert len(df) == 31
+    assert df['Close'].iloc[-1] == 499.0
+
+
+def test_provider_skips_stale_or_short_archive(tmp_path):
+    archive = PriceArchive(str(tmp_path))
+    archive.write('NVDA', _daily_frame(10))
+    provider = StockDataProvider(archive=archive)
+    calls = []
+
+    def fetch(symbol, period, max_retries=3):
+        calls.append(period)
+        return _daily_frame(30)
+
+    provider._fetch_uncached = fetch
+    provider.fetch_data('NVDA', '30d')
+    assert calls == ['30d']
+
+    archive.write('NVDA', _daily_frame(400))
+    provider.ARCHIVE_MAX_AGE = -1
+    provider.fetch_data('NVDA', '1y')
+    assert calls == ['30d', '1y']
+
+
+def test_builder_waits_out_the_minute_quota(tmp_path, monkeypatch):
+    calls = []
+
+    def series(self, symbol, outputsize='full', max_retries=3):
+        calls.append(symbol)
+        if len(calls) == 2:
+            raise RateLimitExceeded("Alpha Vantage rate limit of 5 calls/min reached", retry_after=0.01)
+        return _daily_frame(5)
+
+    monkeypatch.setenv('ALPHA_VANTAGE_API_KEY', 'test')
+    monkeypatch.setattr(AlphaVantageProvider, 'series', series)
+    assert main([str(tmp_path), 'NVDA', 'AAPL']) == 0
+    assert calls == ['NVDA', 'AAPL', 'AAPL']
+    assert PriceArchive(str(tmp_path)).symbols() == ['AAPL', 'NVDA']
@@ -0,0 +1,52 @@
+"""
+Offline tests for the binary price series encoding
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from price_codec import decode_frame, decode_series, encode_frame, encode_series
+
+
+def _frame(rows=300):
+    index = pd.date_range('2020-01-01 16:00', periods=rows, freq='D', name='Date')
+    return pd.DataFrame({'Close': 100 + np.cumsum(np.random.default_rng(0).normal(size=rows))}, index=index)
+
+
+@pytest.mark.parametrize('options', [{}, {'delta': True}, {'delta': True, 'compress': True}])
+def test_frame_round_trip(options):
+    df = _frame()
+    decoded = decode_frame(encode_frame(df, **options))
+    assert decoded.index.equals(df.index)
+    assert decoded.index.name == 'Date'
+    assert np.array_equal(decoded['Close'].to_numpy(), df['Close'].to_numpy())
+
+
+def test_encoding_sizes():
+    df = _frame()
+    plain = encode_frame(df)
+    assert len(plain) == 24 + 300 * 16
+    # Daily deltas fit in int32 and float32 halves the closes
+    assert len(encode_frame(df, delta=True)) == 24 + 300 * 12
+    assert len(encode_frame(df, delta=True, float32=True)) == 24 + 300 * 8
+    assert len(encode_frame(df, delta=True, compress=True)) < 300 * 10
+
+
+def test_uncompressed_decode_is_a_view():
+    data = encode_frame(_frame())
+    closes = decode_frame(data)['Close'].to_numpy()
+    assert np.shares_memory(closes, np.frombuffer(data, dtype='uint8'))
+    assert not closes.flags.writeable
+
+
+def test_float32_and_empty_series():
+    ts, closes = decode_series(encode_series([1, 2, 3], [1.5, 2.25, 3.125], float32=True, delta=True))
+    assert ts.tolist() == [1, 2, 3]
+    assert closes.dtype == np.float32 and closes.tolist() == [1.5, 2.25, 3.125]
+
+    ts, closes = decode_series(encode_series([], [], delta=True, compress=True))
+    assert len(ts) == 0 and len(closes) == 0
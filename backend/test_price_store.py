@@ -0,0 +1,64 @@
+"""
+Offline tests for the on-disk price store and incremental gap-filling
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from price_store import PriceStore, naive_epoch
+from stock_data_provider import StockDataProvider
+
+
+def _daily_frame(start, days, base=100.0):
+    index = pd.date_range(start, periods=days, freq='D', name='Date')
+    return pd.DataFrame({'Close': [base + i for i in range(days)]}, index=index)
+
+
+def test_store_round_trip(tmp_path):
+    store = PriceStore(str(tmp_path / 'prices.sqlite3'))
+    df = _daily_frame('2024-01-01 09:30', 5)
+    start_ts = naive_epoch(datetime(2024, 1, 1))
+    end_ts = naive_epoch(datetime(2024, 1, 6))
+    store.write('NVDA', '1d', df, start_ts, end_ts)
+
+    assert store.coverage('NVDA', '1d') == (start_ts, end_ts)
+    read = store.read('NVDA', '1d', naive_epoch(datetime(2024, 1, 3)))
+    assert list(read['Close']) == [102.0, 103.0, 104.0]
+    assert read.index[0] == pd.Timestamp('2024-01-03 09:30')
+
+    # Re-writing a range replaces bars that were re-stamped upstream
+    store.write('NVDA', '1d', _daily_frame('2024-01-05 16:00', 1, base=200.0),
+                naive_epoch(datetime(2024, 1, 5)), end_ts)
+    assert list(store.read('NVDA', '1d', start_ts)['Close']) == [100.0, 101.0, 102.0, 103.0, 200.0]
+
+
+def test_provider_fetches_only_the_missing_tail(tmp_path):
+    provider = StockDataProvider(store=PriceStore(str(tmp_path / 'prices.sqlite3')))
+    upstream = provider.primary_provider
+    calls = []
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+
+    def fake_fetch_data(symbol, period, max_retries=3):
+        calls.append(('period', period))
+        return _daily_frame(today - timedelta(days=29), 30)
+
+    def fake_fetch_range(symbol, start, end, interval='1d', max_retries=3):
+        calls.append(('range', start))
+        return _daily_frame(start, (today - start).days + 1, base=500.0)
+
+    upstream.fetch_data = fake_fetch_data
+    upstream.fetch_range = fake_fetch_range
+
+    first = provider.fetch_data('AAPL', '30d')
+    provider.cache.clear()
+    second = provider.fetch_data('AAPL', '7d')
+
+    assert calls == [('period', '30d'), ('range', today)]
+    assert len(first) == 30
+    assert second['Close'].iloc[-1] == 500.0
+    assert list(second['Close'].iloc[:-1]) == list(first['Close'].iloc[-len(second):-1])
+
@@ -0,0 +1,105 @@
+"""
+Offline tests for the Alpha Vantage quota scheduler
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from rate_limiter import QuotaScheduler, RateLimitExceeded
+
+
+def test_bucket_rejects_once_minute_budget_is_spent():
+    quota = QuotaScheduler(per_minute=5, per_day=500)
+    for _ in range(5):
+        quota.acquire('interactive', timeout=0)
+
+    with pytest.raises(RateLimitExceeded) as excinfo:
+        quota.acquire('interactive', timeout=0)
+    assert 0 < excinfo.value.retry_after <= 12
+
+    budget = quota.budget()
+    assert budget['minuteRemaining'] == 0
+    assert budget['dayRemaining'] == 495
+    assert budget['rejected']['interactive'] == 1
+
+
+def test_background_calls_leave_reserve_for_interactive():
+    quota = QuotaScheduler(per_minute=3, per_day=500, background_reserve=1)
+    quota.acquire('background')
+    quota.acquire('background')
+
+    with pytest.raises(RateLimitExceeded):
+        quota.acquire('background')
+
+    # The reserved token is still there for a user-facing request
+    quota.acquire('interactive', timeout=0)
+
+
+def test_daily_cap_rejects_with_time_until_reset():
+    quota = QuotaScheduler(per_minute=60, per_day=2)
+    quota.acquire()
+    quota.acquire()
+
+    with pytest.raises(RateLimitExceeded) as excinfo:
+        quota.acquire(timeout=5)
+    assert excinfo.value.retry_after <= 24 * 3600
+    assert quota.budget()['dayRemaining'] == 0
+
+
+def test_interactive_caller_waits_for_refill():
+    # 600/min refills a token every 0.1s
+    quota = QuotaScheduler(per_minute=600, per_day=500)
+    quota._tokens = 0.0
+
+    start = time.monotonic()
+    quota.acquire('interactive', timeout=1)
+    assert time.monotonic() - start < 1
+
+
+def test_background_yields_to_waiting_interactive_caller():
+    quota = QuotaScheduler(per_minute=60, per_day=500, background_reserve=0)
+    quota._tokens = 0.0
+    results = []
+
+    def interactive():
+        quota.acquire('interactive', timeout=5)
+        results.append('interactive')
+
+    thread = threading.Thread(target=interactive)
+    thread.start()
+    time.sleep(0.05)
+    with pytest.raises(RateLimitExceeded):
+        quota.acquire('background', timeout=0)
+    thread.join()
+    assert results == ['interactive']
+
+
+def test_async_waiters_do_not_hold_threads():
+    # 600/min refills a token every 0.1s
+    quota = QuotaScheduler(per_minute=600, per_day=500)
+    quota._tokens = 0.0
+    ticks = []
+
+    async def ticker():
+        for _ in range(5):
+            ticks.append(time.monotonic())
+            await asyncio.sleep(0.02)
+
+    async def run():
+        await asyncio.gather(*(quota.acquire_async('interactive', timeout=1) for _ in range(3)), ticker())
+        with pytest.raises(RateLimitExceeded):
+            await quota.acquire_async('interactive', timeout=0)
+
+    start = time.monotonic()
+    asyncio.run(run())
+    assert 0.2 < time.monotonic() - start < 1
+    # The loop kept running while the waiters slept
+    assert len(ticks) == 5 and ticks[-1] - start < 0.2
+    assert quota.budget()['granted']['interactive'] == 3
+    assert quota.budget()['waiting'] == {'interactive': 0, 'background': 0}
@@ -0,0 +1,41 @@
+"""
+Offline tests for local resampling of price series
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from resample import resample_frame
+
+
+def _business_days(periods=120):
+    index = pd.bdate_range('2024-01-01', periods=periods, name='Date')
+    closes = 100 + np.cumsum(np.random.default_rng(1).normal(size=periods))
+    return pd.DataFrame({'Close': closes}, index=index)
+
+
+def test_ohlc_matches_pandas_resample():
+    df = _business_days()
+    weekly = resample_frame(df, '1wk', ohlc=True)
+    expected = df['Close'].resample('W').ohlc().dropna()
+
+    assert list(weekly.columns) == ['Open', 'High', 'Low', 'Close']
+    for column in ('open', 'high', 'low', 'close'):
+        assert np.array_equal(weekly[column.capitalize()].to_numpy(), expected[column].to_numpy())
+    # Bars are dated by the last trading day of each week
+    assert (weekly.index.dayofweek == 4).all()
+
+
+def test_gaps_are_skipped_and_daily_is_identity():
+    df = _business_days(60).drop(pd.bdate_range('2024-02-01', '2024-02-29'))
+    monthly = resample_frame(df, '1mo')
+    assert list(monthly.index.month) == [1, 3]
+    assert monthly['Close'].tolist() == [df['Close'].loc['2024-01'].iloc[-1], df['Close'].iloc[-1]]
+
+    assert resample_frame(df, '1d').equals(df)
+    with pytest.raises(ValueError):
+        resample_frame(df, '1h')
@@ -0,0 +1,101 @@
+"""
+Offline tests for the shared retry policy and request deadlines
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import retry
+from retry import (
+    DeadlineExceeded, RetryPolicy, UpstreamHTTPError, deadline, parse_retry_after,
+    remaining_time, run_in_context
+)
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    recorded = []
+    monkeypatch.setattr(retry.time, 'sleep', recorded.append)
+    return recorded
+
+
+def flaky(errors, result='ok'):
+    calls = []
+
+    def fn():
+        calls.append(1)
+        if len(calls) <= len(errors):
+            raise errors[len(calls) - 1]
+        return result
+
+    return fn, calls
+
+
+def test_retries_with_jittered_backoff_until_success(sleeps):
+    fn, calls = flaky([Exception('boom'), Exception('boom')])
+    policy = RetryPolicy(max_attempts=3, base_delay=0.5, max_delay=8.0)
+
+    assert policy.call(fn) == 'ok'
+    assert len(calls) == 3
+    assert len(sleeps) == 2
+    assert all(0.5 <= delay <= 8.0 for delay in sleeps)
+
+
+def test_gives_up_after_max_attempts(sleeps):
+    fn, calls = flaky([Exception('boom')] * 5)
+    with pytest.raises(Exception, match='boom'):
+        RetryPolicy(max_attempts=3).call(fn)
+    assert len(calls) == 3
+
+
+def test_non_retryable_status_is_not_retried(sleeps):
+    fn, calls = flaky([UpstreamHTTPError('HTTP 404', 404)])
+    with pytest.raises(UpstreamHTTPError):
+        RetryPolicy(max_attempts=3).call(fn)
+    assert len(calls) == 1
+    assert sleeps == []
+
+
+def test_retry_after_is_honored(sleeps):
+    fn, calls = flaky([UpstreamHTTPError('HTTP 429', 429, retry_after=5.0)])
+    RetryPolicy(max_attempts=3, max_delay=1.0).call(fn)
+    assert sleeps == [5.0]
+
+
+def test_backoff_never_sleeps_past_deadline(sleeps):
+    fn, calls = flaky([UpstreamHTTPError('HTTP 429', 429, retry_after=30.0)])
+    with deadline(2.0):
+        with pytest.raises(UpstreamHTTPError):
+            RetryPolicy(max_attempts=3).call(fn)
+    assert sleeps == []
+
+
+def test_spent_deadline_stops_before_calling():
+    fn, calls = flaky([])
+    with deadline(-1):
+        with pytest.raises(DeadlineExceeded):
+            RetryPolicy().call(fn)
+    assert calls == []
+
+
+def test_deadline_nests_and_propagates_to_pool_threads():
+    with deadline(10.0):
+        with deadline(60.0):
+            assert remaining_time() <= 10.0
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            inherited = run_in_context(pool, remaining_time).result()
+            plain = pool.submit(remaining_time).result()
+    assert inherited is not None and 0 < inherited <= 10.0
+    assert plain is None
+    assert remaining_time() is None
+
+
+def test_parse_retry_after_forms():
+    assert parse_retry_after('120') == 120.0
+    assert parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT') == 0.0
+    assert parse_retry_after('soon') is None
+    assert parse_retry_after(None) is None
@@ -0,0 +1,113 @@
+"""
+Offline tests for the cross-worker shared cache, using the in-process backend
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+from shared_cache import CacheBackend, MemoryCacheBackend, SharedCache
+from stock_data_provider import StockDataProvider
+from vaulto_refresher import VaultoRefresher
+
+
+def make_frame():
+    index = pd.DatetimeIndex(['2024-01-02 00:00:00', '2024-01-03 15:30:00', '2024-01-04 00:00:00'])
+    index.name = 'Date'
+    return pd.DataFrame({'Close': [101.5, 99.25, 100.0]}, index=index)
+
+
+def test_concurrent_misses_across_workers_fill_once():
+    backend = MemoryCacheBackend()
+    workers = [SharedCache(backend, poll_interval=0.01) for _ in range(4)]
+    calls = []
+
+    def loader():
+        calls.append(1)
+        time.sleep(0.1)
+        return {'value': 42}
+
+    results = []
+    threads = [threading.Thread(target=lambda w=w: results.append(w.get_or_fill('key', loader, ttl=60)))
+               for w in workers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results == [{'value': 42}] * 4
+    assert sum(w.counts['waits'] for w in workers) == 3
+
+
+def test_failed_fill_is_not_cached_and_releases_lock():
+    cache = SharedCache(MemoryCacheBackend())
+
+    def failing():
+        raise Exception("upstream down")
+
+    try:
+        cache.get_or_fill('key', failing, ttl=60)
+        assert False, "expected the loader's error"
+    except Exception as e:
+        assert str(e) == "upstream down"
+    assert cache.get_or_fill('key', lambda: [1], ttl=60) == [1]
+    assert cache.counts['waits'] == 0
+
+
+def test_entries_expire():
+    backend = MemoryCacheBackend()
+    backend.set('k', b'v', ttl=0.05)
+    assert backend.set('k', b'other', ttl=1, only_if_missing=True) is False
+    time.sleep(0.06)
+    assert backend.get('k') is None
+    assert backend.set('k', b'other', ttl=1, only_if_missing=True) is True
+
+
+def test_providers_in_different_workers_share_fetches():
+    shared = SharedCache(MemoryCacheBackend())
+    calls = []
+
+    def fetch(symbol, period, max_retries=3):
+        calls.append((symbol, period))
+        return make_frame()
+
+    workers = [StockDataProvider(shared_cache=shared) for _ in range(2)]
+    for worker in workers:
+        worker._fetch_uncached = fetch
+
+    first = workers[0].fetch_data('nvda', '30d')
+    second = workers[1].fetch_data('NVDA', '30d')
+    assert calls == [('nvda', '30d')]
+    assert first.index.equals(second.index)
+    assert first['Close'].tolist() == second['Close'].tolist()
+
+
+def test_refreshers_share_vaulto_snapshot():
+    shared = SharedCache(MemoryCacheBackend())
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        return [{'symbol': 'NVDAon', 'poolTVL': 1000.0}]
+
+    first = VaultoRefresher(fetch=fetch, interval=3600, shared_cache=shared)
+    second = VaultoRefresher(fetch=fetch, interval=3600, shared_cache=shared)
+    assert first.refresh() and second.refresh()
+    assert len(calls) == 1
+    assert second.current()['stocks'] == first.current()['stocks']
+    assert second.current()['fetchedAt'] == first.current()['fetchedAt']
+
+
+def test_incomplete_backend_fails_at_construction():
+    class GetOnly(CacheBackend):
+        def get(self, key):
+            return None
+
+    with pytest.raises(TypeError):
+        GetOnly()
@@ -0,0 +1,167 @@
+"""
+Offline tests for the stock data provider parse paths
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import io
+import json
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pytest
+import requests
+
+import stock_data_provider
+from circuit_breaker import HALF_OPEN, CircuitBreaker
+from rate_limiter import QuotaScheduler, RateLimitExceeded
+from stock_data_provider import AlphaVantageProvider, StockDataProvider, frame_from_alpha_vantage, frame_from_yahoo_chart
+
+
+def test_yahoo_chart_masks_null_closes():
+    timestamps = [1704205800, 1704292200, 1704378600]
+    df = frame_from_yahoo_chart(timestamps, [185.5, None, 184.25])
+
+    assert list(df['Close']) == [185.5, 184.25]
+    assert list(df.index) == [datetime.fromtimestamp(1704205800), datetime.fromtimestamp(1704378600)]
+    assert df.index.name == 'Date'
+
+
+def test_alpha_vantage_series_is_returned_oldest_first():
+    series = {
+        '2024-01-04': {'4. close': '181.91'},
+        '2024-01-03': {'4. close': '184.25'},
+        '2024-01-02': {'4. close': '185.64'},
+    }
+    df = frame_from_alpha_vantage(series)
+
+    assert list(df['Close']) == [185.64, 184.25, 181.91]
+    assert df.index[0] == datetime(2024, 1, 2)
+    assert df.index.is_monotonic_increasing
+
+
+def test_alpha_vantage_stream_parse_matches_buffered_parse():
+    payload = {
+        'Meta Data': {'2. Symbol': 'NVDA'},
+        'Time Series (Daily)': {
+            '2024-01-04': {'1. open': '180.0', '4. close': '181.91'},
+            '2024-01-03': {'1. open': '183.0', '4. close': '184.25'},
+            '2024-01-02': {'1. open': '184.0', '4. close': '185.64'},
+        }
+    }
+    body = json.dumps(payload).encode('utf-8')
+    chunks = [body[i:i + 10] for i in range(0, len(body), 10)]
+
+    assert AlphaVantageProvider.parse_series_stream(chunks).equals(AlphaVantageProvider.parse_series(payload))
+    with pytest.raises(Exception, match='Invalid API call'):
+        AlphaVantageProvider.parse_series_stream([b'{"Error Message": "Invalid API call"}'])
+
+
+def test_alpha_vantage_periods_share_one_series():
+    provider = AlphaVantageProvider('test-key')
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    index = pd.date_range(end=today, periods=800, freq='D', name='Date')
+    full = pd.DataFrame({'Close': [float(i) for i in range(800)]}, index=index)
+    fetches = []
+
+    def fetch_series(symbol, outputsize, max_retries=3):
+        fetches.append(outputsize)
+        return full if outputsize == 'full' else full.iloc[-100:]
+
+    provider._fetch_series = fetch_series
+    assert len(provider.fetch_data('NVDA', '1y')) == 366
+    # The cached full series answers the compact periods and arbitrary ranges
+    assert list(provider.fetch_data('nvda', '7d')['Close']) == [float(i) for i in range(792, 800)]
+    assert len(provider.fetch_data('NVDA', '24h')) == 3
+    ranged = provider.fetch_range('NVDA', today - timedelta(days=600), today - timedelta(days=590))
+    assert ranged.equals(full[(full.index >= today - timedelta(days=600)) & (full.index <= today - timedelta(days=590))])
+    assert fetches == ['full']
+
+
+class SlowProvider:
+    def __init__(self, delay, close):
+        self.delay = delay
+        self.close = close
+        self.calls = 0
+
+    def fetch_data(self, symbol, period, max_retries=3):
+        self.calls += 1
+        time.sleep(self.delay)
+        return pd.DataFrame({'Close': [self.close]}, index=pd.to_datetime(['2024-01-02']))
+
+
+def make_hedged_provider(primary_delay, hedge_delay):
+    provider = StockDataProvider(hedge=True)
+    provider.providers = [('yahoo', SlowProvider(primary_delay, 1.0))]
+    provider.breakers['yahoo'] = CircuitBreaker('yahoo')
+    provider.hedge_provider = SlowProvider(hedge_delay, 2.0)
+    provider.HEDGE_DEFAULT_DELAY = 0.05
+    return provider
+
+
+def test_slow_primary_is_hedged_and_hedge_wins():
+    provider = make_hedged_provider(primary_delay=0.5, hedge_delay=0.0)
+    df = provider._fetch_upstream('AAPL', '7d')
+
+    assert list(df['Close']) == [2.0]
+    stats = provider.hedge_stats()
+    assert stats['hedged'] == 1
+    assert stats['hedgeWins'] == 1
+    assert stats['hedgeRate'] == 1.0
+
+
+def test_fast_primary_is_not_hedged():
+    provider = make_hedged_provider(primary_delay=0.0, hedge_delay=0.0)
+    df = provider._fetch_upstream('AAPL', '7d')
+
+    assert list(df['Close']) == [1.0]
+    assert provider.hedge_provider.calls == 0
+    assert provider.hedge_stats()['primaryWins'] == 1
+
+
+def test_saturated_hedge_pool_skips_hedge_and_keeps_half_open_probe():
+    provider = make_hedged_provider(primary_delay=0.2, hedge_delay=0.0)
+    breaker = CircuitBreaker(provider.hedge_name, min_calls=1, open_seconds=0.0)
+    breaker.record_failure(0.1)
+    assert breaker.state == HALF_OPEN
+    provider.breakers[provider.hedge_name] = breaker
+    # Room for the primary only
+    provider._hedge_slots = threading.BoundedSemaphore(1)
+
+    df = provider._fetch_upstream('AAPL', '7d')
+    assert list(df['Close']) == [1.0]
+    assert provider.hedge_provider.calls == 0
+    assert provider.hedge_stats()['saturated'] == 1
+    assert breaker.allow_request()
+
+    # No room at all: the primary runs on the calling thread, unhedged
+    provider._hedge_slots = threading.BoundedSemaphore(1)
+    provider._hedge_slots.acquire()
+    assert list(provider._fetch_upstream('AAPL', '7d')['Close']) == [1.0]
+    assert provider.hedge_stats()['saturated'] == 2
+    assert provider.hedge_provider.calls == 0
+
+
+def test_alpha_vantage_note_is_rate_limited_without_retries(monkeypatch):
+    quota = QuotaScheduler(per_minute=60, per_day=500)
+    calls = []
+
+    class NoteSessions:
+        def get(self, url, **kwargs):
+            calls.append(url)
+            response = requests.Response()
+            response.status_code = 200
+            response.raw = io.BytesIO(json.dumps({'Note': 'Our standard API rate limit is 5 calls per minute.'}).encode('utf-8'))
+            return response
+
+    monkeypatch.setattr(stock_data_provider, 'get_session_pool', NoteSessions)
+    monkeypatch.setattr(stock_data_provider, 'get_alpha_vantage_quota', lambda: quota)
+    with pytest.raises(RateLimitExceeded) as excinfo:
+        AlphaVantageProvider('test').fetch_data('NVDA', '30d')
+
+    assert excinfo.value.retry_after == AlphaVantageProvider.NOTE_RETRY_AFTER
+    assert len(calls) == 1
+    assert quota.budget()['granted']['interactive'] == 1
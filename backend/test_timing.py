@@ -0,0 +1,53 @@
+"""
+Offline tests for request span timing and the opt-in profiler
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from timing import RequestProfiler, current_timer, finish_request, span, start_request
+
+
+def test_spans_accumulate_per_request():
+    token = start_request()
+    try:
+        with span('upstream'):
+            pass
+        with span('upstream'):
+            pass
+        with span('decode'):
+            pass
+        header = current_timer().server_timing()
+    finally:
+        finish_request(token)
+
+    assert header.startswith('upstream;dur=')
+    assert 'desc="x2"' in header
+    assert 'decode;dur=' in header
+    assert current_timer() is None
+
+
+def test_span_outside_request_is_noop():
+    with span('upstream'):
+        pass
+    assert current_timer() is None
+
+
+def test_header_mode_profiles_only_flagged_requests(tmp_path):
+    profiler = RequestProfiler(mode='header', directory=str(tmp_path))
+    assert profiler.start({}) is None
+
+    started = profiler.start({'X-Profile': '1'})
+    assert started is not None
+    sum(i * i for i in range(1000))
+    path = profiler.finish(started, 'GET /api/stock-data?symbol=NVDA', elapsed=0.01)
+
+    assert path is not None and os.path.exists(path)
+    assert os.path.exists(path[:-len('.prof')] + '.txt')
+
+
+def test_sample_mode_skips_fast_requests(tmp_path):
+    profiler = RequestProfiler(mode='sample', directory=str(tmp_path), slow_ms=500, sample_rate=1.0)
+    started = profiler.start({})
+    assert profiler.finish(started, 'GET /api/health', elapsed=0.01) is None
+    assert os.listdir(tmp_path) == []
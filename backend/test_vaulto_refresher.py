@@ -0,0 +1,47 @@
+"""
+Offline tests for the background Vaulto pool refresher
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from vaulto_refresher import VaultoRefresher
+
+
+def test_last_good_snapshot_is_served_when_refresh_fails():
+    responses = [[{'symbol': 'NVDAon', 'poolTVL': 1000.0}], Exception("timeout")]
+
+    def fetch():
+        result = responses.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    refresher = VaultoRefresher(fetch=fetch, interval=3600)
+    first = refresher.snapshot()
+    assert first['stocks'][0]['symbol'] == 'NVDAon'
+    assert first['stale'] is False
+    assert first['age'] >= 0
+
+    assert refresher.refresh() is False
+    second = refresher.snapshot()
+    assert second['stocks'] == first['stocks']
+    assert second['stale'] is True
+    assert second['lastError'] == 'timeout'
+    refresher.stop()
+
+
+def test_snapshot_retries_until_first_success():
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        if len(calls) == 1:
+            raise Exception("connection refused")
+        return [{'symbol': 'TSLAon'}]
+
+    refresher = VaultoRefresher(fetch=fetch, interval=3600)
+    snapshot = refresher.snapshot()
+    assert snapshot['stocks'] == [{'symbol': 'TSLAon'}]
+    assert len(calls) == 2
+    refresher.stop()
@@ -0,0 +1,182 @@
+"""
+Request-scoped span timing and opt-in profiling.
+Code on the request path wraps its stages in span('name'); the durations
+are summed per request and returned in a Server-Timing header, so browser
+dev tools show where the time went (upstream fetch, JSON decode, DataFrame
+build, serialization, jsonify). Outside a request span() is a no-op.
+
+Slow requests can also be profiled with cProfile and the reports written to
+a local directory (see RequestProfiler).
+"""
+
+import contextvars
+import cProfile
+import io
+import os
+import pstats
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterator, Mapping, Optional, Tuple
+
+
+class RequestTimer:
+    """Accumulated span durations for one request"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        # name -> (total seconds, count); batch workers add concurrently
+        self.spans: Dict[str, Tuple[float, int]] = {}
+        self._lock = threading.Lock()
+
+    def add(self, name: str, seconds: float) -> None:
+        with self._lock:
+            total, count = self.spans.get(name, (0.0, 0))
+            self.spans[name] = (total + seconds, count + 1)
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def server_timing(self) -> str:
+        """Server-Timing header value, in milliseconds, with the request total last"""
+        with self._lock:
+            spans = list(self.spans.items())
+        parts = [
+            f'{name};dur={total * 1000:.1f}' + (f';desc="x{count}"' if count > 1 else '')
+            for name, (total, count) in spans
+        ]
+        parts.append(f'total;dur={self.elapsed() * 1000:.1f}')
+        return ', '.join(parts)
+
+
+_timer: contextvars.ContextVar[Optional[RequestTimer]] = contextvars.ContextVar('request_timer', default=None)
+
+
+def start_request() -> contextvars.Token:
+    """Begin timing the current request; returns a token for finish_request"""
+    return _timer.set(RequestTimer())
+
+
+def current_timer() -> Optional[RequestTimer]:
+    return _timer.get()
+
+
+def finish_request(token: contextvars.Token) -> None:
+    _timer.reset(token)
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    """Time a stage of the current request (nothing is recorded outside a request)"""
+    timer = _timer.get()
+    if timer is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timer.add(name, time.perf_counter() - started)
+
+
+class RequestProfiler:
+    """cProfile requests on demand and keep reports for the slow ones
+
+    Modes:
+        off: never profile (default)
+        header: profile requests sent with 'X-Profile: 1'; their report is always written
+        sample: profile a random sample_rate fraction of requests; reports are
+            written only for requests slower than slow_ms
+    """
+
+    MODES = ('off', 'header', 'sample')
+    HEADER = 'X-Profile'
+
+    def __init__(self, mode: str = 'off', directory: str = 'profiles', slow_ms: float = 500.0,
+                 sample_rate: float = 0.01, top: int = 40):
+        if mode not in self.MODES:
+            raise ValueError(f"Invalid profiling mode: {mode}. Must be one of: {', '.join(self.MODES)}")
+        self.mode = mode
+        self.directory = directory
+        self.slow_ms = slow_ms
+        self.sample_rate = sample_rate
+        self.top = top
+        # Only one profiler can be active at a time; concurrent requests go unprofiled
+        self._active = threading.Lock()
+        self.reports_written = 0
+
+    @classmethod
+    def from_env(cls, default_directory: str) -> 'RequestProfiler':
+        """Build a profiler from PROFILE_MODE, PROFILE_DIR, PROFILE_SLOW_MS and PROFILE_SAMPLE_RATE"""
+        return cls(
+            mode=os.getenv('PROFILE_MODE', 'off'),
+            directory=os.getenv('PROFILE_DIR', default_directory),
+            slow_ms=float(os.getenv('PROFILE_SLOW_MS', '500')),
+            sample_rate=float(os.getenv('PROFILE_SAMPLE_RATE', '0.01'))
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != 'off'
+
+    def start(self, headers: Mapping[str, str]) -> Optional[Tuple[cProfile.Profile, bool]]:
+        """
+        Start profiling this request if the mode selects it.
+
+        Returns:
+            (profile, forced) to pass to finish, or None if not profiled
+        """
+        if self.mode == 'header':
+            forced = headers.get(self.HEADER, '') in ('1', 'true')
+            if not forced:
+                return None
+        elif self.mode == 'sample':
+            forced = False
+            if random.random() >= self.sample_rate:
+                return None
+        else:
+            return None
+
+        if not self._active.acquire(blocking=False):
+            return None
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Another profiler (e.g. a debugger) already owns the hook
+            self._active.release()
+            return None
+        return profile, forced
+
+    def finish(self, started: Tuple[cProfile.Profile, bool], label: str, elapsed: float) -> Optional[str]:
+        """
+        Stop profiling and write the report if the request was slow (or explicitly asked for).
+
+        Returns:
+            Path of the written .prof file, or None
+        """
+        profile, forced = started
+        profile.disable()
+        self._active.release()
+        if not forced and elapsed * 1000 < self.slow_ms:
+            return None
+
+        os.makedirs(self.directory, exist_ok=True)
+        safe_label = re.sub(r'[^A-Za-z0-9_.-]+', '_', label).strip('_') or 'request'
+        stamp = datetime.now().strftime('%Y%m%dT%H%M%S_%f')
+        base = os.path.join(self.directory, f'{stamp}_{safe_label}_{elapsed * 1000:.0f}ms')
+
+        # Binary stats for snakeviz/pstats, plus a readable summary alongside
+        profile.dump_stats(base + '.prof')
+        summary = io.StringIO()
+        pstats.Stats(profile, stream=summary).sort_stats('cumulative').print_stats(self.top)
+        with open(base + '.txt', 'w') as f:
+            f.write(f"{label} took {elapsed * 1000:.1f}ms\n\n")
+            f.write(summary.getvalue())
+
+        self.reports_written += 1
+        print(f"Wrote profile for {label} ({elapsed * 1000:.0f}ms) to {base}.prof")
+        return base + '.prof'
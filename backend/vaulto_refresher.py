@@ -0,0 +1,149 @@
+"""
+Background refresher for Vaulto pool data.
+Polls stake.vaulto.ai on an interval and keeps the latest parsed pool
+snapshot in memory, so requests are served instantly. If a refresh fails,
+the last good snapshot keeps being served and is flagged as stale.
+With a shared cache, workers reuse each other's snapshot and only one of
+them scrapes per interval.
+"""
+
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from shared_cache import SharedCache
+from vaulto_scraper import scrape_vaulto_data
+
+
+class VaultoRefresher:
+    """Holds the latest Vaulto pool snapshot and refreshes it in a daemon thread"""
+
+    def __init__(self, fetch: Callable[[], List[Dict[str, Any]]] = scrape_vaulto_data,
+                 interval: float = 60.0, shared_cache: Optional[SharedCache] = None):
+        self.fetch = fetch
+        self.interval = interval
+        self.shared_cache = shared_cache
+        self._stocks: Optional[List[Dict[str, Any]]] = None
+        self._fetched_at: Optional[float] = None
+        self._last_error: Optional[str] = None
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._first_attempt = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.refreshes = 0
+        self.failures = 0
+
+    def start(self) -> None:
+        """Start the background refresh thread (no-op if already running)"""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='vaulto-refresher', daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background refresh thread"""
+        self._stop.set()
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout=5)
+
+    def _run(self) -> None:
+        if self._fetched_at is None:
+            self.refresh()
+        self._first_attempt.set()
+        while not self._stop.wait(self.interval):
+            self.refresh()
+
+    def refresh(self) -> bool:
+        """
+        Fetch a new snapshot, keeping the previous one if the fetch fails.
+        With a shared cache, a snapshot another worker fetched less than an
+        interval ago is used instead of scraping again.
+
+        Returns:
+            True if the snapshot was replaced
+        """
+        with self._refresh_lock:
+            try:
+                if self.shared_cache is not None:
+                    shared = self.shared_cache.get_or_fill('vaulto:snapshot', self._fetch_snapshot, self.interval)
+                else:
+                    shared = self._fetch_snapshot()
+            except Exception as e:
+                self.record_failure(e)
+                return False
+            self.record_success(shared['stocks'], shared['fetchedAt'])
+            return True
+
+    def _fetch_snapshot(self) -> Dict[str, Any]:
+        return {'stocks': self.fetch(), 'fetchedAt': time.time()}
+
+    def record_success(self, stocks: List[Dict[str, Any]], fetched_at: Optional[float] = None) -> None:
+        """Replace the snapshot with freshly fetched stocks (fetched now unless fetched_at is given)"""
+        with self._lock:
+            self._stocks = stocks
+            self._fetched_at = time.time() if fetched_at is None else fetched_at
+            self._last_error = None
+            self.refreshes += 1
+
+    def record_failure(self, error: Exception) -> None:
+        """Record a failed refresh; the previous snapshot is kept"""
+        print(f"Vaulto refresh failed, keeping last snapshot: {error}")
+        with self._lock:
+            self._last_error = str(error)
+            self.failures += 1
+
+    def has_snapshot(self) -> bool:
+        """Whether any refresh has succeeded yet"""
+        return self._fetched_at is not None
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Return the latest snapshot with its age.
+
+        Starts the refresher on first use and waits for its initial fetch.
+        While no snapshot exists (e.g. the initial fetch failed), each call
+        retries the fetch synchronously.
+
+        Returns:
+            See current()
+        """
+        self.start()
+        if self._fetched_at is None:
+            self._first_attempt.wait(timeout=30)
+            if self._fetched_at is None:
+                self.refresh()
+        return self.current()
+
+    def current(self) -> Dict[str, Any]:
+        """
+        Return the snapshot held right now, without starting or waiting for a refresh.
+
+        Returns:
+            Dict with 'stocks' (None if nothing could be fetched yet),
+            'fetchedAt', 'age' (seconds), 'stale' and 'lastError'
+        """
+        with self._lock:
+            fetched_at = self._fetched_at
+            age = time.time() - fetched_at if fetched_at is not None else None
+            return {
+                'stocks': self._stocks,
+                'fetchedAt': datetime.fromtimestamp(fetched_at, tz=timezone.utc).isoformat() if fetched_at is not None else None,
+                'age': age,
+                'stale': self._last_error is not None or (age is not None and age > 2 * self.interval),
+                'lastError': self._last_error
+            }
+
+    def stats(self) -> Dict[str, Any]:
+        """Return refresh counters"""
+        with self._lock:
+            return {
+                'interval': self.interval,
+                'refreshes': self.refreshes,
+                'failures': self.failures,
+                'age': time.time() - self._fetched_at if self._fetched_at is not None else None
+            }
@@ -6,6 +6,10 @@ import requests
 import json
 from typing import List, Dict, Optional
 
+from http_session import get_session_pool
+from metrics import track_upstream
+from retry import DeadlineExceeded, RetryPolicy, UpstreamHTTPError, attempt_timeout, check_response
+
 BASE_URL = "https://stake.vaulto.ai"
 API_ENDPOINT = f"{BASE_URL}/api/cache/tokenized-stock-pools"
 
@@ -111,6 +115,80 @@ def parse_percentage(percentage_str: str) -> Optional[float]:
         return None
 
 
+# Request headers for the Vaulto API
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept': 'application/json'
+}
+
+
+def parse_pools(data: Dict) -> List[Dict[str, any]]:
+    """
+    Convert a tokenized-stock-pools API response into TokenizedStock dictionaries
+    
+    Args:
+        data: Decoded JSON response from the pools endpoint
+    
+    Returns:
+        List of dictionaries matching TokenizedStock format
+    
+    Raises:
+        Exception: If the response has no usable pools
+    """
+    if 'pools' not in data:
+        raise Exception("API response missing 'pools' field")
+    
+    pools = data['pools']
+    if not pools:
+        raise Exception("API returned empty pools array")
+    
+    print(f"Found {len(pools)} pools in API response")
+    
+    stocks = []
+    
+    for pool in pools:
+        try:
+            # Extract tokenized stock symbol
+            symbol = _extract_tokenized_symbol(pool)
+            
+            if not symbol:
+                print(f"Warning: Could not extract symbol from pool {pool.get('hash', 'unknown')}")
+                continue
+            
+            # Extract data from pool
+            pool_tvl = float(pool.get('tvl', 0))
+            fees24h = float(pool.get('fees24h', 0))
+            volume24h = float(pool.get('volume24h', 0))
+            fees30d = float(pool.get('fees30d', 0))
+            volume30d = float(pool.get('volume30d', 0))
+            apr = pool.get('apr')
+            
+            # Convert APR to float or None
+            apr_float = float(apr) if apr is not None else None
+            
+            stocks.append({
+                'symbol': symbol,
+                'poolTVL': pool_tvl,
+                'fees24h': fees24h,
+                'volume24h': volume24h,
+                'fees30d': fees30d,
+                'volume30d': volume30d,
+                'apr': apr_float
+            })
+            
+            print(f"Parsed stock {len(stocks)}: {symbol} - TVL=${pool_tvl:,.2f}, APR={apr_float}%")
+            
+        except (ValueError, KeyError, TypeError) as e:
+            print(f"Warning: Failed to parse pool {pool.get('hash', 'unknown')}: {e}")
+            continue
+    
+    if not stocks:
+        raise Exception("No valid stocks could be extracted from API response")
+    
+    print(f"Successfully parsed {len(stocks)} stocks")
+    return stocks
+
+
 def scrape_vaulto_data() -> List[Dict[str, any]]:
     """
     Fetch TVL and volume data from stake.vaulto.ai API endpoint
@@ -130,73 +208,22 @@ def scrape_vaulto_data() -> List[Dict[str, any]]:
     Raises:
         Exception: If fetching fails
     """
+    def attempt() -> Dict:
+        with track_upstream('vaulto'):
+            response = get_session_pool().get(API_ENDPOINT, headers=HEADERS, timeout=attempt_timeout(15))
+            check_response(response)
+        return response.json()
+    
     try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-            'Accept': 'application/json'
-        }
-        
         print(f"Fetching data from {API_ENDPOINT}...")
-        response = requests.get(API_ENDPOINT, headers=headers, timeout=15)
-        response.raise_for_status()
-        
         # Parse JSON response
-        data = response.json()
-        
-        if 'pools' not in data:
-            raise Exception("API response missing 'pools' field")
-        
-        pools = data['pools']
-        if not pools:
-            raise Exception("API returned empty pools array")
-        
-        print(f"Found {len(pools)} pools in API response")
-        
-        stocks = []
-        
-        for pool in pools:
-            try:
-                # Extract tokenized stock symbol
-                symbol = _extract_tokenized_symbol(pool)
-                
-                if not symbol:
-                    print(f"Warning: Could not extract symbol from pool {pool.get('hash', 'unknown')}")
-                    continue
-                
-                # Extract data from pool
-                pool_tvl = float(pool.get('tvl', 0))
-                fees24h = float(pool.get('fees24h', 0))
-                volume24h = float(pool.get('volume24h', 0))
-                fees30d = float(pool.get('fees30d', 0))
-                volume30d = float(pool.get('volume30d', 0))
-                apr = pool.get('apr')
-                
-                # Convert APR to float or None
-                apr_float = float(apr) if apr is not None else None
-                
-                stocks.append({
-                    'symbol': symbol,
-                    'poolTVL': pool_tvl,
-                    'fees24h': fees24h,
-                    'volume24h': volume24h,
-                    'fees30d': fees30d,
-                    'volume30d': volume30d,
-                    'apr': apr_float
-                })
-                
-                print(f"Parsed stock {len(stocks)}: {symbol} - TVL=${pool_tvl:,.2f}, APR={apr_float}%")
-                
-            except (ValueError, KeyError, TypeError) as e:
-                print(f"Warning: Failed to parse pool {pool.get('hash', 'unknown')}: {e}")
-                continue
-        
-        if not stocks:
-            raise Exception("No valid stocks could be extracted from API response")
+        data = RetryPolicy(max_attempts=3, name='vaulto').call(attempt, "Vaulto pool fetch")
         
-        print(f"Successfully parsed {len(stocks)} stocks")
-        return stocks
+        return parse_pools(data)
     
-    except requests.RequestException as e:
+    except DeadlineExceeded:
+        raise
+    except (requests.RequestException, UpstreamHTTPError) as e:
         raise Exception(f"Failed to fetch data from API: {str(e)}")
     except json.JSONDecodeError as e:
         raise Exception(f"Failed to parse JSON response: {str(e)}")